@@ -5,10 +5,21 @@
 @Version: 1.0
 @Description: APP INITIALIZATION
 """
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api import api_v1, API_V1_PREFIX
+from app.data_parser import dataWarmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # drop the uploaded files still waiting for the warm-up
+    dataWarmup.shutdown(wait=False)
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.mount(API_V1_PREFIX, api_v1)
 # import os
 # from flask import Flask, current_app, send_file
@@ -4,6 +4,10 @@ from app.file import fileManager
 from app.api.utils import make_response
 from app.schemes import (
     DataPreviewRequestBodyModel,
+    DataMetadataRequestBodyModel,
+    DataSourceMetaModel,
+    DataProfileRequestBodyModel,
+    DataProfileModel,
     User,
     BasicResponseModel,
     XLSXDataParserConfigModel,
@@ -15,9 +19,17 @@ from app.schemes import (
     XLSXDataPreviewResponseDataModel,
     XLSDataPreviewResponseDataModel,
     CSVDataPreviewResponseDataModel,
+    ArrowParserConfigModel,
+    ParquetDataSourceModel,
+    ArrowDataSourceModel,
+    ArrowDataPreviewResponseDataModel,
+    NDJSONParserConfigModel,
+    NDJSONDataSourceModel,
+    NDJSONDataPreviewResponseDataModel,
 )
 from app.data_parser import (
     dataParser,
+    HAS_PYARROW,
 )
 from .._constants import API_V1_LIST
 from ..dependencies import get_current_user
@@ -31,25 +43,46 @@ router = APIRouter(
     tags=DATA_API_META["tags"],
 )
 
+# The Parquet and Arrow IPC data sources are only accepted if their plugins are loaded
+ARROW_CONFIG_MODELS = (ArrowParserConfigModel,) if HAS_PYARROW else ()
+ARROW_DATA_SOURCE_MODELS = (
+    (ParquetDataSourceModel, ArrowDataSourceModel) if HAS_PYARROW else ()
+)
+ARROW_PREVIEW_MODELS = (ArrowDataPreviewResponseDataModel,) if HAS_PYARROW else ()
+
+DataParserConfigModels = Union[
+    XLSXDataParserConfigModel,
+    XLSParserConfigModel,
+    CSVParserConfigModel,
+    *ARROW_CONFIG_MODELS,
+    NDJSONParserConfigModel,
+]
+DataSourceModels = Union[
+    XLSXDataSourceModel,
+    XLSDataSourceModel,
+    CSVDataSourceModel,
+    *ARROW_DATA_SOURCE_MODELS,
+    NDJSONDataSourceModel,
+]
+DataPreviewResponseDataModels = Union[
+    XLSDataPreviewResponseDataModel,
+    XLSXDataPreviewResponseDataModel,
+    CSVDataPreviewResponseDataModel,
+    *ARROW_PREVIEW_MODELS,
+    NDJSONDataPreviewResponseDataModel,
+]
+
 
 @router.post(
     DATA_API_RESOURCES["preview"]["path"],
     status_code=status.HTTP_200_OK,
-    response_model=BasicResponseModel[
-        Union[
-            XLSDataPreviewResponseDataModel,
-            XLSXDataPreviewResponseDataModel,
-            CSVDataPreviewResponseDataModel,
-        ]
-    ],
+    response_model=BasicResponseModel[DataPreviewResponseDataModels],
 )
 async def preview_data(
     request_body: Annotated[
         DataPreviewRequestBodyModel[
-            Union[
-                XLSXDataParserConfigModel, XLSParserConfigModel, CSVParserConfigModel
-            ],
-            Union[XLSXDataSourceModel, XLSDataSourceModel, CSVDataSourceModel],
+            DataParserConfigModels,
+            DataSourceModels,
         ],
         Body(),
     ],
@@ -63,5 +96,59 @@ async def preview_data(
         token = data_source.token
         file_item = user_file_manager.get_file_from_token(token)
         return make_response(
-            data=dataParser.preview(data_source.type, file_item, config.model_dump())
+            data=dataParser.preview(
+                data_source.type, file_item, config.model_dump(), prefetch=True
+            )
+        )
+
+
+@router.post(
+    DATA_API_RESOURCES["metadata"]["path"],
+    status_code=status.HTTP_200_OK,
+    response_model=BasicResponseModel[DataSourceMetaModel],
+)
+async def metadata_data(
+    request_body: Annotated[
+        DataMetadataRequestBodyModel[DataSourceModels],
+        Body(),
+    ],
+    user: User = Depends(get_current_user),
+):
+    """Data source metadata API, the sheets and their dimensions without parsing the data."""
+    data_source = request_body.data_source
+    if data_source.source_type == "file":
+        user_file_manager = fileManager.get_user_manager(user)
+        token = data_source.token
+        file_item = user_file_manager.get_file_from_token(token)
+        return make_response(data=dataParser.metadata(data_source.type, file_item))
+
+
+@router.post(
+    DATA_API_RESOURCES["profile"]["path"],
+    status_code=status.HTTP_200_OK,
+    response_model=BasicResponseModel[DataProfileModel],
+)
+async def profile_data(
+    request_body: Annotated[
+        DataProfileRequestBodyModel[
+            DataParserConfigModels,
+            DataSourceModels,
+        ],
+        Body(),
+    ],
+    user: User = Depends(get_current_user),
+):
+    """Data profile API, the type, empty ratio, distinct count and samples of each column."""
+    data_source = request_body.data_source
+    config = request_body.config
+    if data_source.source_type == "file":
+        user_file_manager = fileManager.get_user_manager(user)
+        token = data_source.token
+        file_item = user_file_manager.get_file_from_token(token)
+        return make_response(
+            data=dataParser.profile(
+                data_source.type,
+                file_item,
+                None if config is None else config.model_dump(),
+            )
         )
@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import APIRouter, File, UploadFile, status, Depends, Form, Body, Query
 from app.schemes import (
     BasicResponseModel,
@@ -10,6 +10,8 @@ from app.schemes import (
 from app.api.types import APIResourceItem
 
 from app.api.utils import make_response
+from app.utils import get_file_type
+from app.data_parser import UNSUPPORTED_TYPES
 from app.file import (
     fileManager,
     CaculateMD5Exception,
@@ -36,6 +38,8 @@ router = APIRouter(
     prefix=FILE_API_META["prefix"],
     tags=FILE_API_META["tags"],
 )
+# The routes are plain functions run in the threadpool, as the files are
+# written and hashed with blocking I/O
 
 
 @router.post(
@@ -43,16 +47,16 @@ router = APIRouter(
     status_code=status.HTTP_200_OK,
     response_model=BasicResponseModel[UploadResponseDataModel],
 )
-async def upload(
+def upload(
     file: Annotated[UploadFile, File(description="Uploaded File")],
     user: User = Depends(get_current_user),
 ):
+    file_type = get_file_type(file.filename)
+    if file_type in UNSUPPORTED_TYPES:
+        raise ApiInvalidFileException(f"Not supported file type: {file_type}")
     try:
         user_file_manager = fileManager.get_user_manager(user)
-        token = user_file_manager.save_file(
-            file.filename,
-            file.file.read(),
-        )
+        token = user_file_manager.save_file(file.filename, file.file)
         return make_response(
             code=ResponseStatusCode.SUCCESS,
             data={"token": token},
@@ -68,11 +72,15 @@ async def upload(
     status_code=status.HTTP_200_OK,
     response_model=BasicResponseModel[None],
 )
-async def upload_chunk(
+def upload_chunk(
     file: Annotated[UploadFile, File(description="Uploaded File Chunk")],
     user: User = Depends(get_current_user),
     token: str = Form(description="File Token"),
     index: int = Form(description="Chunk Index"),
+    md5: Optional[str] = Form(
+        default=None,
+        description="Chunk MD5, checked before the chunk is written",
+    ),
 ):
     if not user:
         raise UnAuthorizedException("unauthorized")
@@ -82,6 +90,7 @@ async def upload_chunk(
             token,
             index,
             file.file.read(),
+            md5,
         )
         return make_response()
     except Exception as e:
@@ -93,12 +102,15 @@ async def upload_chunk(
     status_code=status.HTTP_200_OK,
     response_model=BasicResponseModel[UploadResponseDataModel],
 )
-async def start_chunk(
+def start_chunk(
     chunk_meta: Annotated[StartUploadFileChunkRequestBodyModel, Body()],
     user: User = Depends(get_current_user),
 ):
     if not user:
         raise UnAuthorizedException("unauthorized")
+    file_type = get_file_type(chunk_meta.filename)
+    if file_type in UNSUPPORTED_TYPES:
+        raise ApiInvalidFileException(f"Not supported file type: {file_type}")
     try:
         user_file_manager = fileManager.get_user_manager(user)
         file_token = user_file_manager.start_chunk(
@@ -119,7 +131,7 @@ async def start_chunk(
     status_code=status.HTTP_200_OK,
     response_model=BasicResponseModel[UploadResponseDataModel],
 )
-async def assemble_chunk(
+def assemble_chunk(
     token: Annotated[str, Query()],
     user: User = Depends(get_current_user),
 ):
@@ -138,7 +150,7 @@ async def assemble_chunk(
     status_code=status.HTTP_200_OK,
     response_model=BasicResponseModel[None],
 )
-async def delete(
+def delete(
     token: Annotated[str, Query()],
     user: User = Depends(get_current_user),
 ):
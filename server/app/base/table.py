@@ -25,7 +25,7 @@ from .events import (
     OnBaseTableUploadAttachmentsEvent,
     BaseTableUploadAttachmentsContext,
 )
-from .const import LINK_FIELD_TYPES
+from .const import LINK_FIELD_TYPES, MAX_CREATE_RECORDS_ONCE_LIMIT
 from .cell import ICell
 from .field import IBaseField, get_base_fields, FieldMap
 from .record import IBaseRecord, get_base_table_records, IRecord, IDiffRecord, DiffType
@@ -330,7 +330,13 @@ class IDataTable(ITable[IRecord]):
         self.events = events
 
     def records_iterator(self):
-        for records in self.data_parser.parse(self.type, self.data, self.config):
+        for records in self.data_parser.parse(
+            self.type,
+            self.data,
+            self.config,
+            batch_size=MAX_CREATE_RECORDS_ONCE_LIMIT,
+            columns={f.source_field for f in self.fields},
+        ):
             yield [
                 IRecord(
                     cells=[
@@ -1,9 +1,28 @@
+from app.file import fileManager
 from .core import DataParser
 from .xlsx import XLSXParser
 from .xls import XLSParser
 from .csv import CSVParser
-
+from .ndjson import NDJSONParser
+from .arrow import (
+    ParquetParser,
+    ArrowParser,
+    HAS_PYARROW,
+    PARQUET_SUPPORTED_TYPES,
+    ARROW_SUPPORTED_TYPES,
+)
+from .warmup import Warmup
 
 dataParser = DataParser(
-    plugins=[XLSXParser(), XLSParser(), CSVParser()],
+    plugins=[XLSXParser(), XLSParser(), CSVParser(), NDJSONParser()]
+    + ([ParquetParser(), ArrowParser()] if HAS_PYARROW else []),
 )
+
+UNSUPPORTED_TYPES = (
+    set() if HAS_PYARROW else PARQUET_SUPPORTED_TYPES | ARROW_SUPPORTED_TYPES
+)
+"""Types of the data sources whose plugin is not loaded, their uploads are rejected"""
+
+dataWarmup = Warmup(dataParser)
+fileManager.add_save_hook(dataWarmup.submit)
+fileManager.add_delete_hook(dataParser.prefetcher.cancel)
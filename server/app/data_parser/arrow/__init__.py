@@ -0,0 +1,46 @@
+from app.file import FileItem
+from app.data_parser.core import DataParsePlugin
+from app.data_parser.columnar import batch_columns
+from app.data_parser.constants import DEFAULT_BATCH_SIZE
+from app.data_parser.utils import batch_rows
+from .types import ReadArrowConfig
+from .read_arrow import *
+from .constants import PARQUET_SUPPORTED_TYPES, ARROW_SUPPORTED_TYPES
+
+HAS_PYARROW = not pa is None
+"""The Parquet and Arrow plugins are only registered if pyarrow is installed"""
+
+
+class ParquetParser(DataParsePlugin[FileItem, ReadArrowConfig]):
+    type = PARQUET_SUPPORTED_TYPES
+    name = "Parquet Parser"
+    source_type = ".parquet"
+
+    def parse(
+        self,
+        data,
+        config,
+        context,
+        batch_size=DEFAULT_BATCH_SIZE,
+        columnar=False,
+        columns=None,
+    ):
+        if columnar:
+            return batch_columns(
+                iter_values_arrow(data, self.source_type, config, columns), batch_size
+            )
+        return batch_rows(
+            iter_row_arrow(data, self.source_type, config, columns), batch_size
+        )
+
+    def preview(self, data, config):
+        return paginate_load_arrow(data, self.source_type, config, parse_data=True)
+
+    def metadata(self, data):
+        return load_metadata_arrow(data, self.source_type)
+
+
+class ArrowParser(ParquetParser):
+    type = ARROW_SUPPORTED_TYPES
+    name = "Arrow IPC Parser"
+    source_type = ".arrow"
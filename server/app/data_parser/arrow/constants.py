@@ -0,0 +1,3 @@
+PARQUET_SUPPORTED_TYPES = {".parquet"}
+ARROW_SUPPORTED_TYPES = {".arrow", ".feather"}
+"""Arrow IPC file format, the Feather V2 files are the same format"""
@@ -0,0 +1,281 @@
+"""Parquet and Arrow IPC parse plugin
+
+The row groups of a Parquet file and the record batches of an Arrow IPC file
+are read one at a time, so a page only reads the row groups it covers and a
+parse only reads the columns of the header in `columns`.
+"""
+
+import os
+import bisect
+import itertools
+from decimal import Decimal
+from datetime import date, datetime, time
+from typing import Callable, Generator, Iterable
+import orjson
+from app.file import FileItem
+from .constants import PARQUET_SUPPORTED_TYPES
+from .types import ReadArrowConfig
+from ..constants import METADATA_HEAD_ROWS
+from ..exceptions import InvalidConfigValue, InvalidHeader
+from ..row_filter import get_row_filter
+from ..types import (
+    BasicValueType,
+    CanPaginationData,
+    DataSourceMeta,
+    PaginationConfig,
+    ParsedData,
+)
+from ..utils import get_page_range, get_projection, get_sheet_meta, parse_data_to_dict
+from ..workbook_pool import workbookPool
+from ..xlsx import DEFAULT_PAGINATE_CONFIG, DEFAULT_PAGE_TOKEN
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class ArrowSource:
+    """Random access to the row groups of a Parquet file or the record batches of an Arrow IPC file"""
+
+    def __init__(self, path: str, type: str):
+        self._parquet = None
+        self._ipc = None
+        self._mmap = None
+        if type in PARQUET_SUPPORTED_TYPES:
+            self._parquet = pq.ParquetFile(path, memory_map=True)
+            self.schema = self._parquet.schema_arrow
+            meta = self._parquet.metadata
+            lengths = [meta.row_group(i).num_rows for i in range(meta.num_row_groups)]
+        else:
+            self._mmap = pa.memory_map(path, "r")
+            self._ipc = ipc.open_file(self._mmap)
+            self.schema = self._ipc.schema
+            lengths = [
+                self._ipc.get_batch(i).num_rows
+                for i in range(self._ipc.num_record_batches)
+            ]
+        self.fields = [str(name) for name in self.schema.names]
+        self.offsets = [0, *itertools.accumulate(lengths)]
+
+    @property
+    def total(self) -> int:
+        """Number of the rows"""
+        return self.offsets[-1]
+
+    def read(self, index: int, columns: list[str] | None = None):
+        """Read the row group or the record batch, only the `columns` if it is set"""
+        if not self._parquet is None:
+            return self._parquet.read_row_group(index, columns=columns)
+        batch = self._ipc.get_batch(index)
+        return batch if columns is None else batch.select(columns)
+
+    def iter_rows(
+        self, start: int, stop: int | None = None, columns: list[str] | None = None
+    ) -> Generator[list[BasicValueType], None, None]:
+        """Yield the rows in [start, stop), only the cells of the `columns` if it is set"""
+        stop = self.total if stop is None else min(stop, self.total)
+        if start >= stop:
+            return
+        first = bisect.bisect_right(self.offsets, start) - 1
+        for index in range(first, len(self.offsets) - 1):
+            offset = self.offsets[index]
+            if offset >= stop:
+                break
+            data = self.read(index, columns)
+            begin = max(start - offset, 0)
+            data = data.slice(begin, min(stop - offset, data.num_rows) - begin)
+            values = [
+                [parse_arrow_value(v) for v in column.to_pylist()]
+                for column in data.columns
+            ]
+            yield from (list(row) for row in zip(*values))
+
+    def close(self):
+        if not self._parquet is None:
+            self._parquet.close()
+        if not self._mmap is None:
+            self._mmap.close()
+
+
+def parse_arrow_value(value) -> BasicValueType:
+    """Parse the python value of the Arrow cell"""
+    if value is None or isinstance(value, (str, bool, int, float, datetime)):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    if isinstance(value, time):
+        return datetime.combine(date.today(), value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    # nested values like the lists, structs and maps
+    return orjson.dumps(value, default=str).decode()
+
+
+def open_arrow_source(
+    file: FileItem, type: str
+) -> tuple[ArrowSource, Callable[[], None]]:
+    """Open the source of the file"""
+    if pa is None:
+        raise ImportError("pyarrow is required to parse the Parquet and Arrow files")
+    source = ArrowSource(file.file_path, type)
+    return source, source.close
+
+
+def get_arrow_source(
+    file: FileItem, type: str
+) -> tuple[ArrowSource, Callable[[], None]]:
+    """Get the source of the file from the pool
+
+    Returns:
+        (ArrowSource, Callable[[], None]): source and release function
+    """
+    # the file is memory-mapped and the row groups are read on demand
+    return workbookPool.get(
+        (file.md5, "arrow"), file.size, lambda: open_arrow_source(file, type)
+    )
+
+
+def validate_header(header: list[str]):
+    empty = [i + 1 for i, h in enumerate(header) if h == ""]
+    if empty:
+        raise InvalidHeader(f"Invalid header: empty column names at {empty}")
+    return True
+
+
+def iter_values_arrow(
+    file: FileItem,
+    type: str,
+    config: ReadArrowConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the (header, row values) iterator, the header row is the first row
+
+    Only the columns of the header in `columns` and the filtered columns are
+    read from the file.
+    """
+    source, release = get_arrow_source(file, type)
+    try:
+        header = source.fields
+        validate_header(header)
+        projection = get_projection(header, columns)
+        if not projection is None:
+            header = [header[i] for i in projection]
+        read_header = header
+        row_filter = get_row_filter(source.fields, (config or {}).get("filters"))
+        if not row_filter is None:
+            read_header = header + [
+                source.fields[i]
+                for i in row_filter.columns
+                if not source.fields[i] in header
+            ]
+            row_filter = get_row_filter(read_header, config["filters"])
+        yield header, header
+        for row in source.iter_rows(
+            0,
+            columns=None if projection is None and row_filter is None else read_header,
+        ):
+            if not row_filter is None:
+                if not row_filter.matches(row):
+                    continue
+                row = row[: len(header)]
+            yield header, row
+    finally:
+        release()
+
+
+def iter_row_arrow(
+    file: FileItem,
+    type: str,
+    config: ReadArrowConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the row iterator"""
+    for header, values in iter_values_arrow(file, type, config, columns):
+        yield dict(zip(header, values))
+
+
+def paginate_load_arrow(
+    data: FileItem,
+    type: str,
+    config: PaginationConfig[ReadArrowConfig] | None,
+    parse_data: bool = False,
+) -> CanPaginationData[ParsedData]:
+    """Preview the file, only the row groups of the page are read"""
+    if config is None:
+        config = DEFAULT_PAGINATE_CONFIG
+    page_size = config.get("page_size")
+    if not page_size is None:
+        page_size = int(page_size)
+    page_token = config.get("page_token")
+    if page_token is None:
+        page_token = DEFAULT_PAGE_TOKEN
+    if page_token < 0:
+        raise InvalidConfigValue("`page_token` should >= 0")
+    source, release = get_arrow_source(data, type)
+    try:
+        header = source.fields
+        total = source.total
+        # the row 0 of the range is the header row, like the parse-once cache
+        start, stop = get_page_range(page_token, page_size, total + 1)
+        _data = list(source.iter_rows(start - 1, stop - 1))
+    finally:
+        release()
+    errors = []
+    can_parse = True
+    try:
+        validate_header(header)
+    except Exception as e:
+        can_parse = False
+        errors.append(str(e))
+    res_data = parse_data_to_dict(_data, header) if parse_data and can_parse else _data
+    return {
+        "data": {
+            "data": res_data,
+            "meta": {
+                "fields": header,
+                # the header row is counted like the rows of a sheet
+                "total": total + 1,
+                "errors": errors,
+                "can_parse": can_parse,
+                "extra": {
+                    "data_range": {
+                        "min_row": 1,
+                        "max_row": total + 1,
+                        "min_col": 1,
+                        "max_col": len(header),
+                    },
+                    "header_index": 0,
+                },
+            },
+        },
+        "page_size": len(res_data),
+        "page_token": page_token,
+        "has_more": stop < total + 1,
+    }
+
+
+def load_metadata_arrow(file: FileItem, type: str) -> DataSourceMeta:
+    """Get the metadata of the file as a single sheet named by the file name
+
+    The row count is read from the file footer.
+    """
+    source, release = get_arrow_source(file, type)
+    try:
+        head = [source.fields, *source.iter_rows(0, METADATA_HEAD_ROWS - 1)]
+        total = source.total
+    finally:
+        release()
+    return {
+        "sheets": [
+            get_sheet_meta(
+                os.path.basename(file.file_path),
+                (1, 1, len(head[0]), total + 1),
+                head,
+            )
+        ]
+    }
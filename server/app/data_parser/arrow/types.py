@@ -0,0 +1,14 @@
+from typing import TypedDict, Optional
+from ..types import RowFilterConfig
+
+
+class ReadArrowConfig(TypedDict):
+    """Parquet and Arrow IPC data parser config."""
+
+    filters: Optional[list[RowFilterConfig]]
+    """Row filters on the raw cell values, only the rows matching all of them are parsed
+
+    Default: None
+
+    Example: [{"field": "status", "op": "eq", "value": "done"}]
+    """
@@ -0,0 +1,235 @@
+"""Columnar parse output
+
+Collect the parsed rows column by column instead of a dict per row. Integer,
+float, boolean and naive datetime columns become typed numpy arrays, string
+columns are dictionary-encoded, and every column has a null mask. Mixed
+columns keep the python values, so the values decode to the exact types.
+"""
+
+import itertools
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Generator, Literal, Sequence
+import numpy as np
+from .types import BasicValueType
+
+type ColumnType = Literal["bool", "int", "float", "datetime", "string", "object"]
+
+NULL_CODE = -1
+"""Code of the null cell in the dictionary-encoded column"""
+
+
+@dataclass(slots=True)
+class Column:
+    """Column of the parsed data"""
+
+    name: str
+    """Header of the column"""
+    type: ColumnType
+    """Type of the non-null values, `object` if mixed, like the ints and the floats"""
+    values: np.ndarray
+    """Values, the codes into `dictionary` if the column is `string`"""
+    mask: np.ndarray
+    """Null mask, True if the cell is empty"""
+    dictionary: list[str] | None = None
+    """Distinct strings of the `string` column"""
+
+    def __len__(self):
+        return len(self.mask)
+
+    def to_list(self) -> list[BasicValueType]:
+        """Decode the column to the python values"""
+        mask = self.mask.tolist()
+        if self.type == "string":
+            dictionary = self.dictionary
+            return [
+                None if m else dictionary[code]
+                for code, m in zip(self.values.tolist(), mask)
+            ]
+        return [None if m else v for v, m in zip(self.values.tolist(), mask)]
+
+    def slice(self, start: int, stop: int) -> "Column":
+        """Get the rows in [start, stop), the arrays are views"""
+        return Column(
+            self.name,
+            self.type,
+            self.values[start:stop],
+            self.mask[start:stop],
+            self.dictionary,
+        )
+
+
+def concat_columns(columns: list[Column]) -> Column:
+    """Concatenate the columns of the same header, the type is widened if needed"""
+    first = columns[0]
+    if len(columns) == 1:
+        return first
+    types = {c.type for c in columns}
+    if len(types) > 1 or first.type == "object":
+        return build_column(first.name, [v for c in columns for v in c.to_list()])
+    mask = np.concatenate([c.mask for c in columns])
+    if first.type != "string":
+        return Column(
+            first.name,
+            first.type,
+            np.concatenate([c.values for c in columns]),
+            mask,
+        )
+    lookup: dict[str, int] = {}
+    codes = []
+    for c in columns:
+        remap = np.fromiter(
+            (lookup.setdefault(v, len(lookup)) for v in c.dictionary),
+            dtype=np.int32,
+            count=len(c.dictionary),
+        )
+        codes.append(
+            np.where(c.mask, NULL_CODE, remap[c.values]) if len(remap) else c.values
+        )
+    return Column(first.name, "string", np.concatenate(codes), mask, list(lookup))
+
+
+def build_column(name: str, values: Sequence[BasicValueType]) -> Column:
+    """Build the column and infer its type from the non-null values"""
+    count = len(values)
+    mask = np.fromiter((v is None for v in values), dtype=np.bool_, count=count)
+    types = {type(v) for v in values if v is not None}
+    if types == {bool}:
+        return Column(
+            name,
+            "bool",
+            np.fromiter((v is True for v in values), dtype=np.bool_, count=count),
+            mask,
+        )
+    if types == {int}:
+        try:
+            return Column(
+                name,
+                "int",
+                np.fromiter(
+                    (0 if v is None else v for v in values), dtype=np.int64, count=count
+                ),
+                mask,
+            )
+        except OverflowError:
+            # out of int64, kept as the python ints of an `object` column
+            pass
+    if types == {float}:
+        return Column(
+            name,
+            "float",
+            np.fromiter(
+                (np.nan if v is None else v for v in values),
+                dtype=np.float64,
+                count=count,
+            ),
+            mask,
+        )
+    if types == {datetime} and all(v.tzinfo is None for v in values if v is not None):
+        return Column(name, "datetime", np.array(values, dtype="datetime64[us]"), mask)
+    if types == {str}:
+        lookup: dict[str, int] = {}
+        codes = np.fromiter(
+            (
+                NULL_CODE if v is None else lookup.setdefault(v, len(lookup))
+                for v in values
+            ),
+            dtype=np.int32,
+            count=count,
+        )
+        return Column(name, "string", codes, mask, list(lookup))
+    return Column(name, "object", np.fromiter(values, dtype=object, count=count), mask)
+
+
+@dataclass(slots=True)
+class ColumnarData:
+    """Parsed data stored by columns"""
+
+    fields: list[str]
+    """Header of the columns"""
+    columns: list[Column]
+    """Columns in the order of the header"""
+    length: int
+    """Number of rows"""
+
+    def __len__(self):
+        return self.length
+
+    def column(self, name: str) -> Column:
+        """Get the first column with the header"""
+        return self.columns[self.fields.index(name)]
+
+    def to_records(self) -> list[dict[str, BasicValueType]]:
+        """Convert to the row dicts like `DataParser.parse` yields"""
+        return [
+            dict(zip(self.fields, row))
+            for row in zip(*(c.to_list() for c in self.columns))
+        ]
+
+    def slice(self, start: int, stop: int) -> "ColumnarData":
+        """Get the rows in [start, stop), the arrays are views"""
+        start, stop, _ = slice(start, stop).indices(self.length)
+        return ColumnarData(
+            fields=self.fields,
+            columns=[c.slice(start, stop) for c in self.columns],
+            length=max(stop - start, 0),
+        )
+
+    @classmethod
+    def concat(cls, parts: list["ColumnarData"]) -> "ColumnarData":
+        """Concatenate the parts with the same fields"""
+        parts = [p for p in parts if p.length] or parts[:1]
+        if len(parts) == 1:
+            return parts[0]
+        return cls(
+            fields=parts[0].fields,
+            columns=[concat_columns(list(c)) for c in zip(*(p.columns for p in parts))],
+            length=sum(p.length for p in parts),
+        )
+
+    @classmethod
+    def from_rows(
+        cls, fields: list[str], rows: Sequence[Sequence[BasicValueType]]
+    ) -> "ColumnarData":
+        """Build from the row values, short rows are filled with None"""
+        width = len(fields)
+        rows = [
+            row if len(row) == width else (list(row) + [None] * width)[:width]
+            for row in rows
+        ]
+        columns = list(zip(*rows)) if rows else [()] * width
+        return cls(
+            fields=list(fields),
+            columns=[build_column(f, values) for f, values in zip(fields, columns)],
+            length=len(rows),
+        )
+
+
+def batch_columns(
+    rows: Iterable[tuple[list[str], list[BasicValueType]]], batch_size: int
+) -> Generator[ColumnarData, None, None]:
+    """Group the (header, row values) into columnar batches of `batch_size` rows"""
+    for batch in itertools.batched(rows, batch_size):
+        yield ColumnarData.from_rows(batch[0][0], [values for _, values in batch])
+
+
+def rebatch_columns(
+    parts: Iterable[ColumnarData], batch_size: int
+) -> Generator[ColumnarData, None, None]:
+    """Regroup the columnar parts into batches of `batch_size` rows"""
+    pending: list[ColumnarData] = []
+    pending_rows = 0
+    for part in parts:
+        pending.append(part)
+        pending_rows += part.length
+        if pending_rows < batch_size:
+            continue
+        merged = ColumnarData.concat(pending)
+        start = 0
+        while merged.length - start >= batch_size:
+            yield merged.slice(start, start + batch_size)
+            start += batch_size
+        pending = [merged.slice(start, merged.length)]
+        pending_rows = merged.length - start
+    if pending_rows:
+        yield ColumnarData.concat(pending)
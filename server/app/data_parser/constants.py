@@ -0,0 +1,64 @@
+import os
+
+DEFAULT_BATCH_SIZE = 500
+"""Default number of rows in each batch yielded by `DataParser.parse`"""
+
+PARSED_CACHE_DIR = "parsed"
+"""Directory of the parse-once cache under `FileItem.dir_path/cache`"""
+
+PARSED_CACHE_CHUNK_SIZE = 50000
+"""Number of rows in each chunk of the parse-once cache"""
+
+METADATA_HEAD_ROWS = 10
+"""Number of the first rows returned by the metadata"""
+
+DATA_CACHE_MAX_SIZE = int(os.getenv("DATA_CACHE_MAX_SIZE", 1024 * 1024 * 1024))
+"""Max bytes of the `data_cache` files and the parse-once cache on disk, the least recently used are evicted
+
+The indexes of the source files, like the CSV row index and the shared strings
+of the streamed xlsx, are not counted. They are bounded by the size of the
+source file and removed with it.
+"""
+
+DATA_CACHE_MEMORY_SIZE = int(os.getenv("DATA_CACHE_MEMORY_SIZE", 64 * 1024 * 1024))
+"""Max bytes of the `data_cache` entries kept in process memory"""
+
+WORKBOOK_POOL_MAX_SIZE = int(os.getenv("WORKBOOK_POOL_MAX_SIZE", 256 * 1024 * 1024))
+"""Max total estimated memory in bytes of the workbooks kept open in the pool
+
+A full openpyxl workbook takes several times its uncompressed XML in memory,
+the read-only and streamed ones mostly keep the shared strings or nothing.
+"""
+
+WORKBOOK_POOL_IDLE_TIME = int(os.getenv("WORKBOOK_POOL_IDLE_TIME", 10 * 60 * 1000))
+"""Time in ms after which an unused workbook in the pool is closed"""
+
+WARMUP_WORKERS = int(os.getenv("WARMUP_WORKERS", 1))
+"""Number of the threads warming up the uploaded files"""
+
+WARMUP_MAX_PENDING = int(os.getenv("WARMUP_MAX_PENDING", 16))
+"""Max number of the uploaded files waiting for the warm-up, the others are skipped"""
+
+WARMUP_PAGE_SIZE = int(os.getenv("WARMUP_PAGE_SIZE", 200))
+"""Page size of the first preview page warmed up, the one requested by the UI"""
+
+WARMUP_MAX_FILE_SIZE = int(os.getenv("WARMUP_MAX_FILE_SIZE", 8 * 1024 * 1024))
+"""Max size of the uploaded files warmed up, the larger ones are parsed on the first request"""
+
+PROCESS_START_METHOD = "forkserver"
+"""Start method of the parsing processes, a forked process may inherit the locks held by the server threads"""
+
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", 1))
+"""Number of the threads computing the next preview pages"""
+
+PROFILE_CACHE_DIR = "profile"
+"""Directory of the column profiles under `FileItem.dir_path/cache`"""
+
+PROFILE_SAMPLE_SIZE = 5
+"""Number of the sample values kept for each column by the profile"""
+
+PROFILE_HLL_PRECISION = 12
+"""Precision of the HyperLogLog counting the distinct values, 2 ** precision registers per column"""
+
+PARSE_SHEETS_WORKERS = int(os.getenv("PARSE_SHEETS_WORKERS", os.cpu_count() or 1))
+"""Default number of processes parsing the sheets of a workbook in parallel"""
@@ -1,9 +1,36 @@
 from __future__ import annotations
 import app.file
 from abc import abstractmethod
-from typing import List, Dict, IO, Set, Generator
-from .exceptions import NotSupportDataType
-from .types import CanPaginationData, BasicValueType, PaginationConfig, ParsedData
+from typing import List, Dict, IO, Set, Generator, Iterable
+from .columnar import ColumnarData, rebatch_columns
+from .constants import (
+    DEFAULT_BATCH_SIZE,
+    PARSED_CACHE_CHUNK_SIZE,
+    PARSE_SHEETS_WORKERS,
+)
+from .exceptions import NotSupportDataType, InvalidConfigValue
+from .prefetch import Prefetcher
+from .data_cache import dataCache
+from .profile import profile_rows, get_profile_cache_key
+from .multi_sheet import iter_parsed_sheets
+from .parsed_cache import (
+    ParsedCache,
+    get_parsed_cache_path,
+    get_preview_cache_path,
+    write_parsed_cache,
+    get_preview_meta,
+    save_preview_meta,
+    paginate_parsed_cache,
+)
+from .types import (
+    CanPaginationData,
+    BasicValueType,
+    PaginationConfig,
+    ParsedData,
+    DataSourceMeta,
+    DataProfile,
+    SheetBatch,
+)
 
 
 class DataParsePlugin[D: (IO, app.file.FileItem), RC: dict]:
@@ -19,8 +46,20 @@ class DataParsePlugin[D: (IO, app.file.FileItem), RC: dict]:
 
     @abstractmethod
     def parse(
-        self, data: D, config: RC, context: DataParser
-    ) -> Generator[list[dict[str, BasicValueType]]]: ...
+        self,
+        data: D,
+        config: RC,
+        context: DataParser,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        columnar: bool = False,
+        columns: Set[str] | None = None,
+    ) -> Generator[list[dict[str, BasicValueType]] | ColumnarData]:
+        """Parse data source, yield the rows in batches of `batch_size` rows
+
+        If `columnar` is True, every batch is a `ColumnarData` instead of row dicts.
+        If `columns` is set, only the columns of the header in it are parsed.
+        """
+        pass
 
     @abstractmethod
     def preview(
@@ -29,6 +68,11 @@ class DataParsePlugin[D: (IO, app.file.FileItem), RC: dict]:
         """Preview data source"""
         pass
 
+    @abstractmethod
+    def metadata(self, data: D) -> DataSourceMeta:
+        """Get the sheets, their dimensions and first rows without parsing the data"""
+        pass
+
 
 class DataParser[D: (IO, app.file.FileItem), RC: dict]:
     def __init__(
@@ -36,6 +80,7 @@ class DataParser[D: (IO, app.file.FileItem), RC: dict]:
     ) -> None:
         self.config = config
         self.plugins: Dict[str, DataParsePlugin] = {}
+        self.prefetcher = Prefetcher()
         for plugin in plugins:
             self.register_plugin(plugin)
 
@@ -43,15 +88,166 @@ class DataParser[D: (IO, app.file.FileItem), RC: dict]:
         for type in plugin.type:
             self.plugins[type] = plugin
 
-    def parse(self, type: str, data: D, config: RC = None):
+    def parse(
+        self,
+        type: str,
+        data: D,
+        config: RC = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        columnar: bool = False,
+        columns: Set[str] | None = None,
+    ):
+        """Parse data source, yield the rows in batches of `batch_size` rows
+
+        If `columns` is set, only the columns of the header in it are parsed.
+        The first full parse of a file writes the parse-once cache, the later
+        ones with the same config read it instead of parsing the file again.
+        """
+        if type not in self.plugins:
+            raise NotSupportDataType(f"Can't find parser for {type}")
+        if batch_size < 1:
+            raise InvalidConfigValue("`batch_size` should >= 1")
+        plugin = self.plugins[type]
+        if not isinstance(data, app.file.FileItem):
+            return plugin.parse(data, config, self, batch_size, columnar, columns)
+        cache = ParsedCache.open(get_parsed_cache_path(data, type, config))
+        if not cache is None:
+            return cache.iter_batches(batch_size, columnar, columns)
+        cache_path = get_parsed_cache_path(data, type, config, columns)
+        cache = None if columns is None else ParsedCache.open(cache_path)
+        if not cache is None:
+            return cache.iter_batches(batch_size, columnar)
+        batches = rebatch_columns(
+            write_parsed_cache(
+                cache_path,
+                plugin.parse(
+                    data, config, self, PARSED_CACHE_CHUNK_SIZE, True, columns
+                ),
+            ),
+            batch_size,
+        )
+        return batches if columnar else (batch.to_records() for batch in batches)
+
+    def parse_sheets(
+        self,
+        type: str,
+        data: app.file.FileItem,
+        sheet_names: Iterable[str] | None = None,
+        config: RC = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        columnar: bool = False,
+        workers: int = PARSE_SHEETS_WORKERS,
+    ) -> Generator[SheetBatch[list[dict] | ColumnarData], None, None]:
+        """Parse the sheets of the file in `workers` processes
+
+        The sheets are all the sheets of the metadata if `sheet_names` is None,
+        each one is read with `config` and its `sheet_name`. While a sheet is
+        parsed, a batch without data is yielded after each chunk with the rows
+        parsed so far. The batches of a sheet are yielded together once it is
+        parsed, with the progress of the sheet. The parsed sheets are kept in
+        the parse-once cache.
+        """
         if type not in self.plugins:
             raise NotSupportDataType(f"Can't find parser for {type}")
-        return self.plugins[type].parse(data, config, self)
+        if batch_size < 1:
+            raise InvalidConfigValue("`batch_size` should >= 1")
+        if workers < 1:
+            raise InvalidConfigValue("`workers` should >= 1")
+        if sheet_names is None:
+            sheet_names = [
+                sheet["name"] for sheet in self.metadata(type, data)["sheets"]
+            ]
+        return iter_parsed_sheets(
+            self.plugins[type],
+            type,
+            data,
+            sheet_names,
+            config,
+            batch_size,
+            columnar,
+            workers,
+        )
+
+    def build_cache(self, type: str, data: app.file.FileItem, config: RC = None):
+        """Parse the whole data source into the parse-once cache"""
+        for _ in self.parse(type, data, config, PARSED_CACHE_CHUNK_SIZE, True):
+            pass
+
+    def preview(
+        self,
+        type: str,
+        data: D,
+        config: PaginationConfig[RC] = None,
+        columnar: bool = False,
+        prefetch: bool = False,
+    ):
+        """Preview data source, the page data is a `ColumnarData` if `columnar` is True
+
+        The pages are served from the parse-once cache once it is written, the
+        previews are not filtered so only the parse without `filters` is used.
+        If `prefetch` is True, the next page is computed in the background.
+        """
+        if type not in self.plugins:
+            raise NotSupportDataType(f"Can't find parser for {type}")
+        cache_path = None
+        if isinstance(data, app.file.FileItem):
+            if prefetch:
+                self.prefetcher.discard(data, config)
+            cache_path = get_preview_cache_path(
+                data, type, (config or {}).get("config")
+            )
+            meta = get_preview_meta(cache_path)
+            cache = ParsedCache.open(cache_path)
+            if (
+                not meta is None
+                and not cache is None
+                and cache.fields == meta["fields"]
+            ):
+                return paginate_parsed_cache(cache, meta, config, columnar)
+        plugin = self.plugins[type]
+        res = plugin.preview(data, config)
+        parsed = res["data"] if "has_more" in res else res
+        if (
+            prefetch
+            and isinstance(data, app.file.FileItem)
+            and res.get("has_more")
+            and not (config or {}).get("page_size") is None
+        ):
+            next_config = {**config, "page_token": res["page_token"] + 1}
+            self.prefetcher.schedule(
+                data, next_config, lambda: plugin.preview(data, next_config)
+            )
+        if not cache_path is None and parsed["meta"]["can_parse"]:
+            save_preview_meta(cache_path, parsed["meta"])
+        if not columnar:
+            return res
+        fields = parsed["meta"]["fields"]
+        page = ColumnarData.from_rows(
+            fields,
+            [
+                [row.get(f) for f in fields] if isinstance(row, dict) else row
+                for row in parsed["data"]
+            ],
+        )
+        parsed = {**parsed, "data": page}
+        return {**res, "data": parsed} if "has_more" in res else parsed
+
+    def metadata(self, type: str, data: D) -> DataSourceMeta:
+        if type not in self.plugins:
+            raise NotSupportDataType(f"Can't find parser for {type}")
+        return self.plugins[type].metadata(data)
+
+    def profile(self, type: str, data: D, config: RC = None) -> DataProfile:
+        """Get the statistics of each column in one pass over the rows
 
-    def preview(self, type: str, data: D, config: PaginationConfig[RC] = None):
+        The profile of a file is cached per config.
+        """
         if type not in self.plugins:
             raise NotSupportDataType(f"Can't find parser for {type}")
-        return self.plugins[type].preview(data, config)
+        load = lambda: profile_rows(self.parse(type, data, config), skip_header=True)
+        if not isinstance(data, app.file.FileItem):
+            return load()
+        return dataCache.load(get_profile_cache_key(data, type, config), load)
 
     @property
     def support_types(self) -> Set[str]:
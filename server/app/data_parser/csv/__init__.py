@@ -1,5 +1,7 @@
 from app.file import FileItem
 from app.data_parser.core import DataParsePlugin
+from app.data_parser.constants import DEFAULT_BATCH_SIZE
+from app.data_parser.utils import batch_rows
 from .types import ReadCSVConfig
 from .read_csv import *
 from .constants import SUPPORTED_TYPES
@@ -9,8 +11,21 @@ class CSVParser(DataParsePlugin[FileItem, ReadCSVConfig]):
     type = SUPPORTED_TYPES
     name = "CSV Parser"
 
-    def parse(self, data, config, context):
-        return iter_row_csv(data, config)
+    def parse(
+        self,
+        data,
+        config,
+        context,
+        batch_size=DEFAULT_BATCH_SIZE,
+        columnar=False,
+        columns=None,
+    ):
+        if columnar:
+            return iter_columns_csv(data, config, batch_size, columns)
+        return batch_rows(iter_row_csv(data, config, columns), batch_size)
 
     def preview(self, data, config):
         return paginate_load_csv(data, config, parse_data=True)
+
+    def metadata(self, data):
+        return load_metadata_csv(data)
@@ -1,3 +1,13 @@
 SUPPORTED_TYPES = {".csv"}
 DEFAULT_ENCODING = "utf-8-sig"
 DEFAULT_READ_MODE = "r"
+ROW_INDEX_STEP = 1000
+"""Record the byte offset of every `ROW_INDEX_STEP` rows"""
+ROW_INDEX_CACHE_NAME = "csv_row_index.json"
+DEFAULT_ENGINE = "python"
+SUPPORTED_ENGINES = {"python", "pandas"}
+PANDAS_CHUNK_SIZE = 10000
+"""Number of rows read by each `pandas.read_csv` chunk"""
+DEFAULT_WORKERS = 1
+PARALLEL_RANGE_ROWS = 50000
+"""Number of rows parsed by each task of the parallel mode"""
@@ -0,0 +1,112 @@
+"""Parallel CSV parsing
+
+The row index records the byte offsets of the record boundaries, so the file is
+split into byte ranges of whole rows. The ranges are parsed from a memory map
+of the file in a process pool, and the results are merged back in order. The
+workers are started by a fork server, not forked from the threads of the server.
+"""
+
+import io
+import csv
+import mmap
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Generator
+from app.file import FileItem
+from .constants import DEFAULT_ENCODING, PARALLEL_RANGE_ROWS
+from .row_index import get_row_index, select_row
+from ..columnar import ColumnarData
+from ..constants import PROCESS_START_METHOD
+from ..row_filter import RowFilter
+
+
+def parse_row_range(
+    file_path: str,
+    begin: int,
+    end: int | None,
+    first_row: int,
+    start: int,
+    stop: int | None,
+    columns: slice | list[int],
+    header: list[str] | None = None,
+    row_filter: RowFilter | None = None,
+) -> list[list[str]] | ColumnarData:
+    """Parse the rows in [start, stop) of the byte range [begin, end)
+
+    Runs in the worker process. The newlines are translated like the text mode
+    file read by `iter_csv_rows`, so the rows are the same.
+
+    Args:
+        first_row (int): row number of the row at `begin`
+        columns (slice | list[int]): the column slice or the column indexes to return
+        header (list[str] | None, optional): return a `ColumnarData` with the header if set. Defaults to None.
+        row_filter (RowFilter | None, optional): skip the rows after `start` not matching it. Defaults to None.
+    """
+    with open(file_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        text = mm[begin:end].decode(DEFAULT_ENCODING)
+    rows = []
+    for i, row in enumerate(csv.reader(io.StringIO(text, newline=None)), first_row):
+        if not stop is None and i >= stop:
+            break
+        if i > start and not row_filter is None and not row_filter.matches(row):
+            continue
+        if i >= start:
+            rows.append(select_row(row, columns))
+    if header is None:
+        return rows
+    return ColumnarData.from_rows(header, rows)
+
+
+def iter_row_ranges(
+    file: FileItem,
+    start: int,
+    stop: int | None,
+    columns: slice | list[int],
+    workers: int,
+    header: list[str] | None = None,
+    row_filter: RowFilter | None = None,
+) -> Generator[list[list[str]] | ColumnarData, None, None]:
+    """Parse the rows in [start, stop) in `workers` processes, yield the ranges in order
+
+    At most 2 ranges per worker are parsed ahead of the consumer.
+    """
+    index = get_row_index(file)
+    step = index["step"]
+    offsets = index["offsets"]
+    if not offsets:
+        return
+    end_row = index["total"] if stop is None else min(stop, index["total"])
+    entries = max(PARALLEL_RANGE_ROWS // step, 1)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(PROCESS_START_METHOD),
+    )
+    pending: deque[Future] = deque()
+    try:
+        for entry in range(start // step, len(offsets), entries):
+            if entry * step >= end_row:
+                break
+            next_entry = entry + entries
+            pending.append(
+                executor.submit(
+                    parse_row_range,
+                    file.file_path,
+                    offsets[entry],
+                    offsets[next_entry] if next_entry < len(offsets) else None,
+                    entry * step,
+                    start,
+                    stop,
+                    columns,
+                    header,
+                    row_filter,
+                )
+            )
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,13 +1,35 @@
-import csv
+import os
+import itertools
+import numpy as np
+import pandas as pd
+from typing import Generator, Iterable
 from openpyxl.utils import get_column_letter
 from app.file import FileItem
 from .types import ReadCSVConfig
-from .constants import DEFAULT_ENCODING, DEFAULT_READ_MODE
-from ..utils import data_cache, parse_data_to_dict
+from .constants import (
+    DEFAULT_ENCODING,
+    DEFAULT_ENGINE,
+    SUPPORTED_ENGINES,
+    PANDAS_CHUNK_SIZE,
+    DEFAULT_WORKERS,
+)
+from .row_index import get_row_index, iter_csv_rows, select_row
+from .parallel import iter_row_ranges
+from ..columnar import Column, ColumnarData, batch_columns, rebatch_columns
+from ..constants import METADATA_HEAD_ROWS
+from ..utils import data_cache, parse_data_to_dict, get_projection, get_sheet_meta
 from ..exceptions import InvalidConfigValue, InvalidHeader
-from ..types import PaginationConfig, BasicValueType, CanPaginationData, ParsedData
+from ..row_filter import RowFilter, get_row_filter
+from ..types import (
+    PaginationConfig,
+    BasicValueType,
+    CanPaginationData,
+    ParsedData,
+    DataSourceMeta,
+)
 from ..xlsx import (
     get_paginate_cache_key,
+    get_metadata_cache_key,
     DEFAULT_PAGINATE_CONFIG,
     DEFAULT_PAGE_TOKEN,
     validate_read_config,
@@ -15,14 +37,13 @@ from ..xlsx import (
 
 
 def get_total_num(file: FileItem, header_index: int):
-    with open(file.file_path, mode=DEFAULT_READ_MODE, encoding=DEFAULT_ENCODING) as f:
-        reader = csv.reader(f)
-        total = 0
-        for i, _ in enumerate(reader):
-            if i < header_index:
-                continue
-            total += 1
-    return total
+    """Get the number of rows from the header row, read from the row index"""
+    return max(get_row_index(file)["total"] - header_index, 0)
+
+
+def slice_row(row: list[str], min_col: int, max_col: int | None):
+    """Slice the columns of the row in data range"""
+    return row[min_col : max_col + 1] if not max_col is None else row[min_col:]
 
 
 def validate_header(header: list[str]):
@@ -34,32 +55,256 @@ def validate_header(header: list[str]):
     return True
 
 
-def iter_row_csv(file: FileItem, config: ReadCSVConfig):
-    _config = config.get("config")
-    _, data_range, header_index, _ = validate_read_config(_config)
+def validate_engine(config: ReadCSVConfig | None):
+    """Get the CSV reader engine of the config"""
+    engine = (config or {}).get("engine")
+    if engine is None:
+        return DEFAULT_ENGINE
+    if not engine in SUPPORTED_ENGINES:
+        raise InvalidConfigValue(
+            f"`engine` should be one of {sorted(SUPPORTED_ENGINES)}, got {engine}"
+        )
+    return engine
+
+
+def validate_workers(config: ReadCSVConfig | None):
+    """Get the number of the parsing processes of the config"""
+    workers = (config or {}).get("workers")
+    if workers is None:
+        return DEFAULT_WORKERS
+    if workers < 1:
+        raise InvalidConfigValue("`workers` should >= 1")
+    if workers > 1 and validate_engine(config) != "python":
+        raise InvalidConfigValue("`workers` is only supported by the python engine")
+    return workers
+
+
+def get_read_range(config: ReadCSVConfig | None):
+    """Get the 0-based header row, min column, max column and max row to read"""
+    _, data_range, header_index, _ = validate_read_config(config)
     _min_row = data_range[1] - 1 if not data_range[1] is None else 0
     _min_col = data_range[0] - 1 if not data_range[0] is None else 0
     _max_row = data_range[3] - 1 if not data_range[3] is None else None
     _max_col = data_range[2] - 1 if not data_range[2] is None else None
-    header_index = header_index - 1 + _min_row
-    f = open(file.file_path, mode=DEFAULT_READ_MODE, encoding=DEFAULT_ENCODING)
-    f.seek(header_index)
-    reader = csv.reader(f)
-    header = []
-    for i, row in enumerate(reader):
-        if i == header_index:
-            header = (
-                row[_min_col : _max_col + 1] if not _max_col is None else row[_min_col:]
+    return header_index - 1 + _min_row, _min_col, _max_col, _max_row
+
+
+def get_csv_row_filter(
+    header: list[str],
+    min_col: int,
+    max_col: int | None,
+    config: ReadCSVConfig | None,
+):
+    """Get the row filter on the whole rows of the `filters` on the header of the data range"""
+    row_filter = get_row_filter(
+        slice_row(header, min_col, max_col), (config or {}).get("filters")
+    )
+    return None if row_filter is None else row_filter.shift(min_col)
+
+
+def read_csv_header(file: FileItem, header_index: int, engine: str):
+    """Read the whole header row, None if the file has not so many rows"""
+    if engine == "pandas":
+        try:
+            rows = pd.read_csv(
+                file.file_path,
+                header=None,
+                dtype=str,
+                na_filter=False,
+                skip_blank_lines=False,
+                skiprows=header_index,
+                nrows=1,
+                encoding=DEFAULT_ENCODING,
             )
-        if i < header_index:
-            continue
+        except pd.errors.EmptyDataError:
+            return None
+        return rows.iloc[0].tolist() if len(rows) else None
+    for _, row in iter_csv_rows(file, header_index):
+        return row
+    return None
+
+
+def get_read_columns(
+    header: list[str],
+    min_col: int,
+    max_col: int | None,
+    columns: Iterable[str] | None,
+) -> slice | list[int]:
+    """Get the column slice of the data range, or the indexes of the header in `columns`"""
+    cols = slice(min_col, None if max_col is None else max_col + 1)
+    projection = get_projection(header[cols], columns)
+    if projection is None:
+        return cols
+    return [min_col + i for i in projection]
+
+
+def filter_chunk(chunk: pd.DataFrame, row_filter: RowFilter, has_header: bool):
+    """Get the mask of the rows of the chunk matching the filter, the header row is kept"""
+    values = {
+        i: chunk[i].tolist() if i in chunk.columns else None for i in row_filter.columns
+    }
+    mask = np.fromiter(
+        (
+            row_filter.match(lambda i: None if values[i] is None else values[i][n])
+            for n in range(len(chunk))
+        ),
+        dtype=np.bool_,
+        count=len(chunk),
+    )
+    if has_header and len(mask):
+        mask[0] = True
+    return mask
+
+
+def read_csv_chunks(
+    file: FileItem,
+    header_index: int,
+    max_row: int | None,
+    columns: slice | list[int],
+    row_filter: RowFilter | None = None,
+) -> Generator[pd.DataFrame, None, None]:
+    """Read the rows from the header row in chunks with the C parser of pandas
+
+    The cells are read as strings. The C parser only accepts the rows as wide
+    as the first one, so the columns are named up to the widest row of the
+    row index, the missing cells of the short rows are empty strings. The
+    columns are selected from the chunks, `usecols` fails on the chunks of
+    only short rows. The rows not matching `row_filter` are dropped.
+    """
+    if not max_row is None and max_row < header_index:
+        return
+    width = get_row_index(file)["width"]
+    try:
+        reader = pd.read_csv(
+            file.file_path,
+            header=None,
+            names=range(width),
+            dtype=str,
+            na_filter=False,
+            keep_default_na=False,
+            skip_blank_lines=False,
+            skiprows=header_index,
+            nrows=None if max_row is None else max_row - header_index + 1,
+            chunksize=PANDAS_CHUNK_SIZE,
+            encoding=DEFAULT_ENCODING,
+        )
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        for i, chunk in enumerate(reader):
+            if not row_filter is None:
+                chunk = chunk[filter_chunk(chunk, row_filter, i == 0)]
+            if isinstance(columns, slice):
+                yield chunk.iloc[:, columns]
+            else:
+                yield chunk[columns] if columns else chunk.iloc[:, []]
+
+
+def iter_values_csv(
+    file: FileItem,
+    config: ReadCSVConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the (header, row values) iterator, the header list is shared by all rows
+
+    If `columns` is set, only the cells of the header in it are returned.
+    """
+    header_index, _min_col, _max_col, _max_row = get_read_range(config)
+    engine = validate_engine(config)
+    workers = validate_workers(config)
+    header = read_csv_header(file, header_index, engine)
+    if header is None:
+        return
+    row_filter = get_csv_row_filter(header, _min_col, _max_col, config)
+    cols = get_read_columns(header, _min_col, _max_col, columns)
+    header = select_row(header, cols)
+    if engine == "pandas":
+        for chunk in read_csv_chunks(file, header_index, _max_row, cols, row_filter):
+            for row in chunk.to_numpy(dtype=object).tolist():
+                yield header, row
+        return
+    if workers > 1:
+        stop = None if _max_row is None else _max_row + 1
+        for rows in iter_row_ranges(
+            file, header_index, stop, cols, workers, row_filter=row_filter
+        ):
+            for row in rows:
+                yield header, row
+        return
+    for i, row in iter_csv_rows(file, header_index):
         if not _max_row is None and i > _max_row:
             break
-        yield parse_data_to_dict(
-            [row[_min_col : _max_col + 1] if not _max_col is None else row[_min_col:]],
-            header,
+        if i > header_index and not row_filter is None and not row_filter.matches(row):
+            continue
+        yield header, select_row(row, cols)
+
+
+def iter_columns_csv(
+    file: FileItem,
+    config: ReadCSVConfig | None,
+    batch_size: int,
+    columns: Iterable[str] | None = None,
+) -> Generator[ColumnarData, None, None]:
+    """Get the columnar batches
+
+    The `pandas` engine encodes each chunk in C, the parallel mode builds the
+    columns of each byte range in the worker processes.
+    """
+    header_index, _min_col, _max_col, _max_row = get_read_range(config)
+    engine = validate_engine(config)
+    workers = validate_workers(config)
+    if engine != "pandas" and workers == 1:
+        yield from batch_columns(iter_values_csv(file, config, columns), batch_size)
+        return
+    header = read_csv_header(file, header_index, engine)
+    if header is None:
+        return
+    row_filter = get_csv_row_filter(header, _min_col, _max_col, config)
+    cols = get_read_columns(header, _min_col, _max_col, columns)
+    header = select_row(header, cols)
+    if workers > 1:
+        stop = None if _max_row is None else _max_row + 1
+        yield from rebatch_columns(
+            iter_row_ranges(
+                file, header_index, stop, cols, workers, header, row_filter
+            ),
+            batch_size,
         )
-    f.close()
+        return
+
+    def to_columnar(chunk: pd.DataFrame):
+        columns = []
+        for name, (_, series) in zip(header, chunk.items()):
+            codes, uniques = pd.factorize(series)
+            columns.append(
+                Column(
+                    name,
+                    "string",
+                    codes.astype(np.int32),
+                    np.zeros(len(codes), dtype=np.bool_),
+                    uniques.tolist(),
+                )
+            )
+        return ColumnarData(header, columns, len(chunk))
+
+    yield from rebatch_columns(
+        (
+            to_columnar(chunk)
+            for chunk in read_csv_chunks(file, header_index, _max_row, cols, row_filter)
+            if len(chunk)
+        ),
+        batch_size,
+    )
+
+
+def iter_row_csv(
+    file: FileItem,
+    config: ReadCSVConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the row iterator"""
+    for header, values in iter_values_csv(file, config, columns):
+        yield dict(zip(header, values))
 
 
 @data_cache(get_paginate_cache_key)
@@ -93,27 +338,20 @@ def paginate_load_csv(
         + (1 if page_token == 0 else 0)
     )
     header_index = header_index - 1 + _min_row
-    f = open(data.file_path, mode=DEFAULT_READ_MODE, encoding=DEFAULT_ENCODING)
-    f.seek(header_index)
-    reader = csv.reader(f)
+    total_rows = get_row_index(data)["total"]
+    last_row = total_rows - 1 if _max_row is None else min(_max_row, total_rows - 1)
     header = []
+    for _, row in iter_csv_rows(data, header_index):
+        header = slice_row(row, _min_col, _max_col)
+        break
     _data: list[list[BasicValueType]] = []
-    has_more = True
-    for i, row in enumerate(reader):
-        if i == header_index:
-            header = (
-                row[_min_col : _max_col + 1] if not _max_col is None else row[_min_col:]
-            )
-        if i < min_row:
-            continue
-        if not _max_row is None and i > _max_row:
+    for i, row in iter_csv_rows(data, min_row):
+        if i > last_row:
             break
-        _data.append(
-            row[_min_col : _max_col + 1] if not _max_col is None else row[_min_col:]
-        )
+        _data.append(slice_row(row, _min_col, _max_col))
         if not page_size is None and len(_data) >= page_size:
             break
-    f.close()
+    has_more = min_row + len(_data) <= last_row
     errors = []
     can_parse = True
     try:
@@ -125,7 +363,7 @@ def paginate_load_csv(
     res_data = (
         _data if not parse_data or not can_parse or parsed_data is None else parsed_data
     )
-    total = get_total_num(data, header_index)
+    total = max(total_rows - header_index, 0)
     res: CanPaginationData[ParsedData] = {
         "data": {
             "data": res_data,
@@ -137,9 +375,13 @@ def paginate_load_csv(
                 "extra": {
                     "data_range": {
                         "min_row": _min_row + 1,
-                        "max_row": _max_row + 1,
+                        "max_row": last_row + 1,
                         "min_col": _min_col + 1,
-                        "max_col": _max_col + 1,
+                        "max_col": (
+                            _max_col + 1
+                            if not _max_col is None
+                            else _min_col + len(header)
+                        ),
                     },
                     "header_index": header_index,
                 },
@@ -150,3 +392,20 @@ def paginate_load_csv(
         "has_more": has_more,
     }
     return res
+
+
+@data_cache(get_cache_key=get_metadata_cache_key)
+def load_metadata_csv(file: FileItem) -> DataSourceMeta:
+    """Get the metadata of the CSV file as a single sheet named by the file name
+
+    The row count is read from the row index, the column count is the widest
+    of the first rows.
+    """
+    head = [row for _, row in itertools.islice(iter_csv_rows(file), METADATA_HEAD_ROWS)]
+    total = get_row_index(file)["total"]
+    width = max((len(row) for row in head), default=0)
+    return {
+        "sheets": [
+            get_sheet_meta(os.path.basename(file.file_path), (1, 1, width, total), head)
+        ]
+    }
@@ -0,0 +1,143 @@
+"""Row offset index of the CSV file
+
+Build the index in one pass over the raw bytes, then any row can be reached by
+seeking to the nearest recorded offset instead of reading from the beginning.
+"""
+
+import os
+import csv
+from typing import Generator
+import orjson
+from app.file import FileItem, replace_file, read_json_file
+from .types import CSVRowIndex
+from .constants import (
+    DEFAULT_ENCODING,
+    DEFAULT_READ_MODE,
+    ROW_INDEX_STEP,
+    ROW_INDEX_CACHE_NAME,
+)
+
+_QUOTE = ord('"')
+_DELIMITER = ord(",")
+_START_FIELD, _IN_FIELD, _IN_QUOTED_FIELD, _QUOTE_IN_QUOTED_FIELD = range(4)
+
+
+def scan_line(line: bytes, in_quoted_field: bool) -> tuple[bool, int]:
+    """Get if the line ends inside a quoted field and the number of its delimiters
+
+    The states follow `csv.reader`, the delimiters inside the quoted fields
+    are not counted. A quote only opens a quoted field at the start of the
+    field, the quotes inside an unquoted field are kept as they are.
+
+    Args:
+        line (bytes): physical line
+        in_quoted_field (bool): if the line starts inside a quoted field
+    """
+    if not in_quoted_field and not b'"' in line:
+        return False, line.count(b",")
+    state = _IN_QUOTED_FIELD if in_quoted_field else _START_FIELD
+    delimiters = 0
+    for c in line:
+        if state == _IN_QUOTED_FIELD:
+            if c == _QUOTE:
+                state = _QUOTE_IN_QUOTED_FIELD
+        elif state == _QUOTE_IN_QUOTED_FIELD:
+            # a doubled quote is an escaped one, any other char closes the field
+            if c == _QUOTE:
+                state = _IN_QUOTED_FIELD
+            elif c == _DELIMITER:
+                state = _START_FIELD
+                delimiters += 1
+            else:
+                state = _IN_FIELD
+        elif c == _DELIMITER:
+            state = _START_FIELD
+            delimiters += 1
+        elif state == _START_FIELD and c == _QUOTE:
+            state = _IN_QUOTED_FIELD
+        else:
+            state = _IN_FIELD
+    return state == _IN_QUOTED_FIELD, delimiters
+
+
+def build_row_index(file_path: str, step: int = ROW_INDEX_STEP) -> CSVRowIndex:
+    """Build the row offset index of the CSV file
+
+    A physical line ends a row only when it does not end inside a quoted
+    field, so the newlines inside the quoted fields are handled like
+    `csv.reader`.
+
+    Args:
+        file_path (str): CSV file path
+        step (int, optional): record the offset of every `step` rows. Defaults to ROW_INDEX_STEP.
+
+    Returns:
+        CSVRowIndex: row index
+    """
+    offsets: list[int] = []
+    total = 0
+    width = 0
+    offset = 0
+    in_quotes = False
+    delimiters = 0
+    with open(file_path, "rb") as f:
+        for line in f:
+            if not in_quotes and total % step == 0:
+                offsets.append(offset)
+            in_quotes, n = scan_line(line, in_quotes)
+            delimiters += n
+            offset += len(line)
+            if not in_quotes:
+                total += 1
+                width = max(width, delimiters + 1)
+                delimiters = 0
+    if in_quotes:
+        # The last row has an unclosed quote, csv.reader still returns it
+        total += 1
+        width = max(width, delimiters + 1)
+    return {"step": step, "total": total, "width": width, "offsets": offsets}
+
+
+def get_row_index_path(file: FileItem):
+    return os.path.join(file.dir_path, "cache", ROW_INDEX_CACHE_NAME)
+
+
+def get_row_index(file: FileItem) -> CSVRowIndex:
+    """Get the row index of the CSV file, build and persist it on first use"""
+    index_path = get_row_index_path(file)
+    if os.path.exists(index_path):
+        return read_json_file(index_path)
+    index = build_row_index(file.file_path)
+    # written at once, the index may be read by the other threads meanwhile
+    replace_file(index_path, orjson.dumps(index))
+    return index
+
+
+def iter_csv_rows(
+    file: FileItem, start: int = 0
+) -> Generator[tuple[int, list[str]], None, None]:
+    """Iterate the CSV rows from the `start` row (start from 0) with their row index
+
+    Args:
+        file (FileItem): CSV file
+        start (int, optional): the first row to return. Defaults to 0.
+    """
+    index = get_row_index(file)
+    step = index["step"]
+    offsets = index["offsets"]
+    block = min(start // step, len(offsets) - 1) if offsets else 0
+    with open(file.file_path, mode=DEFAULT_READ_MODE, encoding=DEFAULT_ENCODING) as f:
+        if block > 0:
+            f.seek(offsets[block])
+        reader = csv.reader(f)
+        for i, row in enumerate(reader, block * step):
+            if i < start:
+                continue
+            yield i, row
+
+
+def select_row(row: list[str], columns: slice | list[int]) -> list[str]:
+    """Select the cells of the column slice or the column indexes, the missing ones are skipped"""
+    if isinstance(columns, slice):
+        return row[columns]
+    return [row[i] for i in columns if i < len(row)]
@@ -1,7 +1,7 @@
 from typing import TypedDict, Optional, Literal
 from pydantic import BaseModel, Field
 from app.schemes import DataSourceModel
-from ..types import DataRange
+from ..types import DataRange, RowFilterConfig
 
 
 
@@ -23,8 +23,41 @@ class ReadCSVConfig(TypedDict):
     Default: 1
     """
 
+    engine: Optional[Literal["python", "pandas"]]
+    """CSV reader engine, `pandas` reads the file in chunks with the C parser of pandas
+
+    Default: python
+    """
+
+    workers: Optional[int]
+    """Number of processes parsing the byte ranges of the file in parallel, only for the `python` engine
+
+    Default: 1
+    """
+
+    filters: Optional[list[RowFilterConfig]]
+    """Row filters on the raw cell values, only the rows matching all of them are parsed
+
+    Default: None
+
+    Example: [{"field": "status", "op": "eq", "value": "done"}, {"field": "date", "op": "range", "min": "2024-01-01"}]
+    """
+
     # performance_mode: Optional[bool]
     # """Performance mode
 
     # Default: False
-    # """
\ No newline at end of file
+    # """
+
+
+class CSVRowIndex(TypedDict):
+    """Byte offsets of the CSV rows"""
+
+    step: int
+    """The offset of every `step` rows is recorded"""
+    total: int
+    """Total number of rows, including the header"""
+    width: int
+    """Max number of the cells of the rows"""
+    offsets: list[int]
+    """Byte offset of the row `i * step`"""
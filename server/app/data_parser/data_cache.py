@@ -0,0 +1,398 @@
+"""Two-tier cache of `data_cache`
+
+The entries are the orjson bytes of the cached results, stored as files at the
+cache keys. The recently used entries are also kept in process memory. Both
+tiers are bounded by a byte budget and evict the least recently used entries,
+and the entries older than `FILE_EXPIRED_TIME` are dropped when accessed. The
+directories of the parse-once cache are tracked in the disk budget too.
+
+The concurrent loads of the same key are computed once. The files are written
+by a background thread to a temporary file and renamed, so a reader never sees
+a partial entry.
+"""
+
+import os
+import uuid
+import shutil
+import orjson
+import threading
+from time import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, TypedDict
+from app.file import FILE_CACHE_DIR, FILE_EXPIRED_TIME, create_file
+from app.log import logger
+from .constants import PARSED_CACHE_DIR, DATA_CACHE_MAX_SIZE, DATA_CACHE_MEMORY_SIZE
+
+CACHE_DIR_NAME = "cache"
+
+
+def get_dir_size(path: str) -> int:
+    """Get the bytes of the files right under the directory"""
+    size = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    size += entry.stat().st_size
+    except OSError:
+        pass
+    return size
+
+
+class DataCacheStats(TypedDict):
+    hits: int
+    """Hits of both tiers"""
+    memory_hits: int
+    """Hits of the memory tier"""
+    misses: int
+    evictions: int
+    """Entries removed from disk to keep the budget"""
+    expired: int
+    """Entries removed from disk for `FILE_EXPIRED_TIME`"""
+
+
+class _Flight:
+    """Computation of a key shared by the concurrent loads"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data: bytes | None = None
+        self.error: BaseException | None = None
+
+
+class DataCache:
+    def __init__(
+        self,
+        root: str,
+        max_size: int | None = DATA_CACHE_MAX_SIZE,
+        memory_size: int = DATA_CACHE_MEMORY_SIZE,
+        expired_time: int | None = FILE_EXPIRED_TIME,
+    ):
+        """
+        Args:
+            root (str): root directory of the files, scanned for the existing entries on first use
+            max_size (int | None, optional): max bytes on disk, None for no limit. Defaults to DATA_CACHE_MAX_SIZE.
+            memory_size (int, optional): max bytes in memory. Defaults to DATA_CACHE_MEMORY_SIZE.
+            expired_time (int | None, optional): lifetime of the entries in ms, None for no limit. Defaults to FILE_EXPIRED_TIME.
+        """
+        self.root = root
+        self.max_size = max_size
+        self.memory_size = memory_size
+        self.expired_time = expired_time
+        self._lock = threading.RLock()
+        self._memory: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._memory_used = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_used = 0
+        self._scanned = False
+        self._flights: dict[str, _Flight] = {}
+        self._pending: dict[str, Future] = {}
+        self._deferred: dict[str, bytes] | None = None
+        self._pinned: dict[str, int] = {}
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="data-cache-writer"
+        )
+        self._stats: DataCacheStats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """Reset the locks and the writer thread in the forked process
+
+        The pending writes and loads belong to the threads of the parent.
+        """
+        self._lock = threading.RLock()
+        self._flights = {}
+        self._pending = {}
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="data-cache-writer"
+        )
+
+    @property
+    def stats(self) -> DataCacheStats:
+        return {**self._stats}
+
+    @property
+    def size(self) -> int:
+        """Bytes of the known entries on disk"""
+        return self._disk_used
+
+    def _is_expired(self, created_time: float) -> bool:
+        return (
+            not self.expired_time is None
+            and (time() - created_time) * 1000 > self.expired_time
+        )
+
+    def _scan(self):
+        """Index the entries written by the previous processes, oldest first
+
+        The entries are the json files right under the directories of `cache`,
+        and the directories of the parse-once cache.
+        """
+        self._scanned = True
+        entries = []
+        for dir_path, dir_names, file_names in os.walk(self.root):
+            if os.path.basename(dir_path) == CACHE_DIR_NAME:
+                continue
+            if os.path.basename(os.path.dirname(dir_path)) != CACHE_DIR_NAME:
+                continue
+            if os.path.basename(dir_path) == PARSED_CACHE_DIR:
+                # the directories being written end with `.tmp`
+                paths = [
+                    os.path.join(dir_path, name)
+                    for name in dir_names
+                    if not name.endswith(".tmp")
+                ]
+            else:
+                paths = [
+                    os.path.join(dir_path, name)
+                    for name in file_names
+                    if name.endswith(".json")
+                ]
+            dir_names.clear()
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                size = get_dir_size(path) if os.path.isdir(path) else stat.st_size
+                entries.append((stat.st_mtime, path, size))
+        for _, path, size in sorted(entries, reverse=True):
+            if not path in self._disk:
+                self._disk[path] = size
+                self._disk_used += size
+                self._disk.move_to_end(path, last=False)
+
+    def _remove(self, key: str):
+        size = self._disk.pop(key, None)
+        if not size is None:
+            self._disk_used -= size
+        data = self._memory.pop(key, None)
+        if not data is None:
+            self._memory_used -= len(data[0])
+        if os.path.isdir(key):
+            shutil.rmtree(key, ignore_errors=True)
+            return
+        try:
+            os.remove(key)
+        except OSError:
+            pass
+
+    def _remember(self, key: str, data: bytes, created_time: float):
+        """Put the entry to the memory tier, evict the least recently used"""
+        old = self._memory.pop(key, None)
+        if not old is None:
+            self._memory_used -= len(old[0])
+        if len(data) > self.memory_size:
+            return
+        self._memory[key] = (data, created_time)
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_size:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _touch(self, key: str, size: int):
+        """Mark the entry on disk as the most recently used"""
+        old = self._disk.pop(key, None)
+        if not old is None:
+            self._disk_used -= old
+        self._disk[key] = size
+        self._disk_used += size
+
+    def _evict(self):
+        """Remove the least recently used entries on disk until in the budget"""
+        if self.max_size is None:
+            return
+        for key in list(self._disk):
+            if self._disk_used <= self.max_size or len(self._disk) <= 1:
+                break
+            if key in self._pinned:
+                continue
+            self._remove(key)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str) -> bytes | None:
+        """Get the cached bytes, None if missed"""
+        with self._lock:
+            if not self._scanned:
+                self._scan()
+            entry = self._memory.get(key)
+            if not entry is None:
+                # the file may be removed with the data source or by another process
+                if not self._is_expired(entry[1]) and (
+                    key in self._pending
+                    or (not self._deferred is None and key in self._deferred)
+                    or os.path.exists(key)
+                ):
+                    self._memory.move_to_end(key)
+                    self._touch(key, len(entry[0]))
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return entry[0]
+                self._remove(key)
+                self._stats["expired"] += 1
+            try:
+                stat = os.stat(key)
+            except OSError:
+                self._stats["misses"] += 1
+                return None
+            if self._is_expired(stat.st_mtime):
+                self._remove(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            with open(key, "rb") as f:
+                data = f.read()
+            self._touch(key, len(data))
+            self._remember(key, data, stat.st_mtime)
+            self._stats["hits"] += 1
+            return data
+
+    def _write(self, key: str, data: bytes):
+        """Write the file of the entry and rename it to the key"""
+        tmp_path = f"{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            create_file(tmp_path, data, "wb")
+            os.replace(tmp_path, key)
+        except Exception as e:
+            logger.error(f"Write data cache {key} error: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            with self._lock:
+                self._pending.pop(key, None)
+                entry = self._memory.pop(key, None)
+                if not entry is None:
+                    self._memory_used -= len(entry[0])
+            return
+        with self._lock:
+            self._pending.pop(key, None)
+            self._touch(key, len(data))
+            self._evict()
+
+    def set(self, key: str, data: bytes):
+        """Put the entry to memory, the file is written in the background"""
+        with self._lock:
+            if not self._scanned:
+                self._scan()
+            self._remember(key, data, time())
+            if not self._deferred is None:
+                self._deferred[key] = data
+                return
+            self._pending[key] = self._writer.submit(self._write, key, data)
+
+    def track(self, path: str):
+        """Mark the directory of the parse-once cache as the most recently used
+
+        The directory is written by the parse, it is counted in the disk budget
+        and removed like the files. Nothing is tracked by the worker processes.
+        """
+        with self._lock:
+            if not self._deferred is None:
+                return
+            if not self._scanned:
+                self._scan()
+            size = self._disk.get(path)
+            self._touch(path, get_dir_size(path) if size is None else size)
+            self._evict()
+
+    def pin(self, path: str):
+        """Keep the directory of the parse-once cache from the eviction until `unpin`
+
+        Its chunks are read lazily while the rows are iterated.
+        """
+        with self._lock:
+            self._pinned[path] = self._pinned.get(path, 0) + 1
+
+    def unpin(self, path: str):
+        """Release the directory pinned by `pin`, it is evicted when over the budget"""
+        with self._lock:
+            count = self._pinned.pop(path, 1) - 1
+            if count > 0:
+                self._pinned[path] = count
+                return
+            self._evict()
+
+    def defer_writes(self):
+        """Keep the new entries in memory instead of writing the files
+
+        Used by the worker processes, the entries got by `take_deferred` are
+        set by the parent process, which keeps the files in its budget.
+        """
+        with self._lock:
+            if self._deferred is None:
+                self._deferred = {}
+
+    def take_deferred(self) -> dict[str, bytes]:
+        """Get the entries kept by `defer_writes` and forget them"""
+        with self._lock:
+            deferred = self._deferred or {}
+            if not self._deferred is None:
+                self._deferred = {}
+            for key in deferred:
+                entry = self._memory.pop(key, None)
+                if not entry is None:
+                    self._memory_used -= len(entry[0])
+            return deferred
+
+    def flush(self):
+        """Wait until the pending files are written"""
+        with self._lock:
+            pending = list(self._pending.values())
+        wait(pending)
+
+    def load[T](self, key: str, compute: Callable[[], T]) -> T | Any:
+        """Get the cached result, or compute and cache it
+
+        The concurrent loads of the same key wait for the first one, and get
+        the result decoded from its cached bytes.
+        """
+        cached = self.get(key)
+        if not cached is None:
+            return orjson.loads(cached)
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[key] = _Flight()
+        if not is_leader:
+            flight.done.wait()
+            if not flight.error is None:
+                raise flight.error
+            return orjson.loads(flight.data)
+        try:
+            # cached by a load which finished after the first check
+            cached = self.get(key)
+            if not cached is None:
+                flight.data = cached
+                return orjson.loads(cached)
+            result = compute()
+            flight.data = orjson.dumps(result)
+            self.set(key, flight.data)
+            return result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def clear(self):
+        """Forget the entries in memory, the files are kept"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+            self._disk.clear()
+            self._disk_used = 0
+            self._scanned = False
+
+
+dataCache = DataCache(FILE_CACHE_DIR)
@@ -12,3 +12,7 @@ class InvalidDataNumber(Exception):
 
 class NotSupportDataType(Exception):
     """Not support data type exception."""
+
+
+class InvalidData(Exception):
+    """Invalid data exception."""
@@ -0,0 +1,160 @@
+"""Parallel parsing of the sheets of a workbook
+
+Each sheet is parsed into the parse-once cache by a worker process, which
+opens the file by its path. The workers are started by a fork server, and the
+`dataCache` entries they compute are written by this process. The batches of a sheet are read back from the
+cache once its worker is done, so the sheets are yielded in the order they
+finish and the rows are not sent between the processes. Only the number of the
+rows parsed is sent after each chunk, through a queue of a manager process.
+"""
+
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from queue import Queue
+from typing import Generator, Iterable
+from app.file import FileItem
+from .columnar import ColumnarData
+from .constants import PARSED_CACHE_CHUNK_SIZE, PROCESS_START_METHOD
+from .data_cache import dataCache
+from .parsed_cache import ParsedCache, get_parsed_cache_path, write_parsed_cache
+from .types import SheetBatch
+
+
+def get_sheet_config(config: dict | None, sheet_name: str) -> dict:
+    return {**(config or {}), "sheet_name": sheet_name}
+
+
+def parse_sheet(
+    plugin, type: str, file: FileItem, config: dict
+) -> Generator[int, None, None]:
+    """Parse the sheet into the parse-once cache at `get_parsed_cache_path`
+
+    Yield the number of the rows parsed after each chunk written, nothing if
+    the sheet is already parsed.
+    """
+    cache_path = get_parsed_cache_path(file, type, config)
+    if not ParsedCache.open(cache_path) is None:
+        return
+    rows = 0
+    for chunk in write_parsed_cache(
+        cache_path, plugin.parse(file, config, None, PARSED_CACHE_CHUNK_SIZE, True)
+    ):
+        rows += chunk.length
+        yield rows
+
+
+def parse_sheet_in_worker(
+    plugin, type: str, file: FileItem, sheet_name: str, config: dict, progress: Queue
+) -> tuple[str, dict[str, bytes]]:
+    """Parse the sheet into the parse-once cache in the worker process
+
+    The number of the rows parsed is put to `progress` with the sheet name
+    after each chunk.
+
+    Returns:
+        tuple[str, dict[str, bytes]]: path of the cache and the `dataCache` entries to set
+    """
+    dataCache.defer_writes()
+    for rows in parse_sheet(plugin, type, file, config):
+        progress.put((sheet_name, rows))
+    return get_parsed_cache_path(file, type, config), dataCache.take_deferred()
+
+
+def get_progress_batch(
+    sheet_name: str, rows: int, columnar: bool
+) -> SheetBatch[list[dict] | ColumnarData]:
+    """Get the batch without data telling the rows of the sheet parsed so far"""
+    return {
+        "sheet_name": sheet_name,
+        "data": ColumnarData([], [], 0) if columnar else [],
+        "rows": 0,
+        "parsed": rows,
+        "total": None,
+        "done": False,
+    }
+
+
+def iter_sheet_batches(
+    sheet_name: str, cache_path: str, batch_size: int, columnar: bool
+) -> Generator[SheetBatch[list[dict] | ColumnarData], None, None]:
+    """Yield the batches of the parsed sheet, an empty sheet yields one empty batch"""
+    cache = ParsedCache(cache_path)
+    dataCache.pin(cache_path)
+    try:
+        for start in range(0, max(cache.total, 1), batch_size):
+            batch = cache.slice(start, start + batch_size)
+            rows = min(start + batch_size, cache.total)
+            yield {
+                "sheet_name": sheet_name,
+                "data": batch if columnar else batch.to_records(),
+                "rows": rows,
+                "parsed": cache.total,
+                "total": cache.total,
+                "done": rows == cache.total,
+            }
+    finally:
+        dataCache.unpin(cache_path)
+
+
+def iter_parsed_sheets(
+    plugin,
+    type: str,
+    file: FileItem,
+    sheet_names: Iterable[str],
+    config: dict | None,
+    batch_size: int,
+    columnar: bool,
+    workers: int,
+) -> Generator[SheetBatch[list[dict] | ColumnarData], None, None]:
+    """Parse the sheets in `workers` processes, yield the batches of each sheet once it is parsed
+
+    While the sheets are parsed, a batch without data is yielded after each
+    chunk parsed, with the rows parsed so far. The sheets are parsed one after
+    another in this process if `workers` is 1.
+    """
+    sheet_names = list(sheet_names)
+    if workers == 1 or len(sheet_names) <= 1:
+        for sheet_name in sheet_names:
+            sheet_config = get_sheet_config(config, sheet_name)
+            for rows in parse_sheet(plugin, type, file, sheet_config):
+                yield get_progress_batch(sheet_name, rows, columnar)
+            cache_path = get_parsed_cache_path(file, type, sheet_config)
+            yield from iter_sheet_batches(sheet_name, cache_path, batch_size, columnar)
+        return
+    context = multiprocessing.get_context(PROCESS_START_METHOD)
+    with context.Manager() as manager:
+        # the progress of the workers, and None once a sheet is done
+        progress = manager.Queue()
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(sheet_names)), mp_context=context
+        )
+        try:
+            futures: dict[Future, str] = {}
+            for sheet_name in sheet_names:
+                future = executor.submit(
+                    parse_sheet_in_worker,
+                    plugin,
+                    type,
+                    file,
+                    sheet_name,
+                    get_sheet_config(config, sheet_name),
+                    progress,
+                )
+                future.add_done_callback(lambda _: progress.put(None))
+                futures[future] = sheet_name
+            while futures:
+                message = progress.get()
+                if not message is None:
+                    yield get_progress_batch(*message, columnar)
+                    continue
+                for future in [f for f in futures if f.done()]:
+                    sheet_name = futures.pop(future)
+                    cache_path, entries = future.result()
+                    for key, data in entries.items():
+                        dataCache.set(key, data)
+                    dataCache.track(cache_path)
+                    yield from iter_sheet_batches(
+                        sheet_name, cache_path, batch_size, columnar
+                    )
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
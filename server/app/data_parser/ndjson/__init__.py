@@ -0,0 +1,32 @@
+from app.file import FileItem
+from app.data_parser.core import DataParsePlugin
+from app.data_parser.columnar import batch_columns
+from app.data_parser.constants import DEFAULT_BATCH_SIZE
+from app.data_parser.utils import batch_rows
+from .types import ReadNDJSONConfig
+from .read_ndjson import *
+from .constants import SUPPORTED_TYPES
+
+
+class NDJSONParser(DataParsePlugin[FileItem, ReadNDJSONConfig]):
+    type = SUPPORTED_TYPES
+    name = "NDJSON Parser"
+
+    def parse(
+        self,
+        data,
+        config,
+        context,
+        batch_size=DEFAULT_BATCH_SIZE,
+        columnar=False,
+        columns=None,
+    ):
+        if columnar:
+            return batch_columns(iter_values_ndjson(data, config, columns), batch_size)
+        return batch_rows(iter_row_ndjson(data, config, columns), batch_size)
+
+    def preview(self, data, config):
+        return paginate_load_ndjson(data, config, parse_data=True)
+
+    def metadata(self, data):
+        return load_metadata_ndjson(data)
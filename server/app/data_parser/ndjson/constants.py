@@ -0,0 +1,10 @@
+SUPPORTED_TYPES = {".jsonl", ".ndjson"}
+LINE_INDEX_STEP = 1000
+"""Record the byte offset of every `LINE_INDEX_STEP` records"""
+LINE_INDEX_CACHE_NAME = "ndjson_line_index.json"
+DEFAULT_FLATTEN_DEPTH = None
+"""Flatten the nested objects at any depth"""
+DEFAULT_SEPARATOR = "."
+"""Separator of the keys of the flattened nested objects"""
+VALUE_FIELD = "value"
+"""Field of the records which are not objects"""
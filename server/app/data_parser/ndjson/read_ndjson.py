@@ -0,0 +1,272 @@
+"""NDJSON (JSON Lines) parse plugin
+
+The records are read line by line with orjson. The byte offsets of the records
+are indexed in one pass and persisted, so a page is read by seeking to the
+nearest recorded offset. The nested objects are flattened into the header
+columns, whose keys are collected over the whole file once per config.
+"""
+
+import os
+import itertools
+from typing import Generator, Iterable
+import orjson
+from app.file import FileItem, replace_file, read_json_file, get_md5_from_bytes
+from .types import ReadNDJSONConfig, NDJSONLineIndex
+from .constants import (
+    LINE_INDEX_STEP,
+    LINE_INDEX_CACHE_NAME,
+    DEFAULT_FLATTEN_DEPTH,
+    DEFAULT_SEPARATOR,
+    VALUE_FIELD,
+)
+from ..constants import METADATA_HEAD_ROWS
+from ..exceptions import InvalidConfigValue, InvalidData
+from ..row_filter import get_row_filter
+from ..types import (
+    BasicValueType,
+    CanPaginationData,
+    DataSourceMeta,
+    PaginationConfig,
+    ParsedData,
+)
+from ..utils import (
+    data_cache,
+    get_page_range,
+    get_projection,
+    get_sheet_meta,
+    parse_data_to_dict,
+)
+from ..xlsx import DEFAULT_PAGINATE_CONFIG, DEFAULT_PAGE_TOKEN
+
+
+def build_line_index(file_path: str, step: int = LINE_INDEX_STEP) -> NDJSONLineIndex:
+    """Build the record offset index of the NDJSON file, the blank lines are skipped
+
+    Args:
+        file_path (str): NDJSON file path
+        step (int, optional): record the offset of every `step` records. Defaults to LINE_INDEX_STEP.
+
+    Returns:
+        NDJSONLineIndex: line index
+    """
+    offsets: list[int] = []
+    total = 0
+    offset = 0
+    with open(file_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                if total % step == 0:
+                    offsets.append(offset)
+                total += 1
+            offset += len(line)
+    return {"step": step, "total": total, "offsets": offsets}
+
+
+def get_line_index_path(file: FileItem):
+    return os.path.join(file.dir_path, "cache", LINE_INDEX_CACHE_NAME)
+
+
+def get_line_index(file: FileItem) -> NDJSONLineIndex:
+    """Get the line index of the NDJSON file, build and persist it on first use"""
+    index_path = get_line_index_path(file)
+    if os.path.exists(index_path):
+        return read_json_file(index_path)
+    index = build_line_index(file.file_path)
+    # written at once, the index may be read by the other threads meanwhile
+    replace_file(index_path, orjson.dumps(index))
+    return index
+
+
+def iter_records(
+    file: FileItem, start: int = 0
+) -> Generator[tuple[int, object], None, None]:
+    """Iterate the decoded records from the `start` record (start from 0) with their index"""
+    index = get_line_index(file)
+    step = index["step"]
+    offsets = index["offsets"]
+    block = min(start // step, len(offsets) - 1) if offsets else 0
+    with open(file.file_path, "rb") as f:
+        if block > 0:
+            f.seek(offsets[block])
+        lines = (line for line in f if line.strip())
+        for i, line in enumerate(lines, block * step):
+            if i < start:
+                continue
+            try:
+                yield i, orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                raise InvalidData(f"Invalid JSON of record {i + 1}: {e}") from e
+
+
+def validate_read_config(config: ReadNDJSONConfig | None):
+    """Get the flatten depth and the separator of the config"""
+    depth = (config or {}).get("flatten_depth", DEFAULT_FLATTEN_DEPTH)
+    if not depth is None and depth < 0:
+        raise InvalidConfigValue("`flatten_depth` should >= 0")
+    separator = (config or {}).get("separator")
+    if separator is None:
+        separator = DEFAULT_SEPARATOR
+    if separator == "":
+        raise InvalidConfigValue("`separator` should not be empty")
+    return depth, separator
+
+
+def flatten_record(
+    record: object,
+    depth: int | None,
+    separator: str,
+) -> dict[str, BasicValueType]:
+    """Flatten the nested objects of the record into the keys joined by `separator`
+
+    The arrays and the objects deeper than `depth` are JSON strings, the
+    record which is not an object is the value of `VALUE_FIELD`.
+    """
+    if not isinstance(record, dict):
+        record = {VALUE_FIELD: record}
+    flat: dict[str, BasicValueType] = {}
+
+    def flatten(obj: dict, prefix: str, depth: int | None):
+        for key, value in obj.items():
+            name = f"{prefix}{separator}{key}" if prefix else str(key)
+            if isinstance(value, dict) and value and (depth is None or depth > 0):
+                flatten(value, name, None if depth is None else depth - 1)
+            elif isinstance(value, (dict, list)):
+                flat[name] = orjson.dumps(value).decode()
+            else:
+                flat[name] = value
+
+    flatten(record, "", depth)
+    return flat
+
+
+def get_header_cache_key(file: FileItem, config: ReadNDJSONConfig | None):
+    key = get_md5_from_bytes(orjson.dumps(validate_read_config(config)))
+    return os.path.join(file.dir_path, "cache", "ndjson_header", f"{key}.json")
+
+
+@data_cache(get_cache_key=get_header_cache_key)
+def load_header(file: FileItem, config: ReadNDJSONConfig | None) -> list[str]:
+    """Get the flattened keys of all the records in the order they first appear"""
+    depth, separator = validate_read_config(config)
+    header: dict[str, None] = {}
+    for _, record in iter_records(file):
+        for key in flatten_record(record, depth, separator):
+            header[key] = None
+    return list(header)
+
+
+def iter_rows_ndjson(
+    file: FileItem,
+    config: ReadNDJSONConfig | None,
+    header: list[str],
+    start: int = 0,
+    stop: int | None = None,
+) -> Generator[list[BasicValueType], None, None]:
+    """Yield the values of the header of the records in [start, stop)"""
+    depth, separator = validate_read_config(config)
+    for i, record in iter_records(file, start):
+        if not stop is None and i >= stop:
+            break
+        flat = flatten_record(record, depth, separator)
+        yield [flat.get(h) for h in header]
+
+
+def iter_values_ndjson(
+    file: FileItem,
+    config: ReadNDJSONConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the (header, row values) iterator, the header row is the first row
+
+    If `columns` is set, only the cells of the header in it are returned.
+    """
+    header = load_header(file, config)
+    row_filter = get_row_filter(header, (config or {}).get("filters"))
+    projection = get_projection(header, columns)
+    fields = header if projection is None else [header[i] for i in projection]
+    yield fields, fields
+    for row in iter_rows_ndjson(file, config, header):
+        if not row_filter is None and not row_filter.matches(row):
+            continue
+        yield fields, row if projection is None else [row[i] for i in projection]
+
+
+def iter_row_ndjson(
+    file: FileItem,
+    config: ReadNDJSONConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the row iterator"""
+    for header, values in iter_values_ndjson(file, config, columns):
+        yield dict(zip(header, values))
+
+
+def paginate_load_ndjson(
+    data: FileItem,
+    config: PaginationConfig[ReadNDJSONConfig] | None,
+    parse_data: bool = False,
+) -> CanPaginationData[ParsedData]:
+    """Preview the file, the page is read from the nearest indexed offset"""
+    if config is None:
+        config = DEFAULT_PAGINATE_CONFIG
+    page_size = config.get("page_size")
+    if not page_size is None:
+        page_size = int(page_size)
+    page_token = config.get("page_token")
+    if page_token is None:
+        page_token = DEFAULT_PAGE_TOKEN
+    if page_token < 0:
+        raise InvalidConfigValue("`page_token` should >= 0")
+    _config = config.get("config")
+    header = load_header(data, _config)
+    total = get_line_index(data)["total"]
+    # the row 0 of the range is the header row, like the parse-once cache
+    start, stop = get_page_range(page_token, page_size, total + 1)
+    _data = list(iter_rows_ndjson(data, _config, header, start - 1, stop - 1))
+    res_data = parse_data_to_dict(_data, header) if parse_data else _data
+    return {
+        "data": {
+            "data": res_data,
+            "meta": {
+                "fields": header,
+                # the header row is counted like the rows of a sheet
+                "total": total + 1,
+                "errors": [],
+                "can_parse": True,
+                "extra": {
+                    "data_range": {
+                        "min_row": 1,
+                        "max_row": total + 1,
+                        "min_col": 1,
+                        "max_col": len(header),
+                    },
+                    "header_index": 0,
+                },
+            },
+        },
+        "page_size": len(res_data),
+        "page_token": page_token,
+        "has_more": stop < total + 1,
+    }
+
+
+def load_metadata_ndjson(file: FileItem) -> DataSourceMeta:
+    """Get the metadata of the file as a single sheet named by the file name
+
+    The header is the flattened keys of the default config.
+    """
+    header = load_header(file, None)
+    head = [
+        header,
+        *itertools.islice(iter_rows_ndjson(file, None, header), METADATA_HEAD_ROWS - 1),
+    ]
+    total = get_line_index(file)["total"]
+    return {
+        "sheets": [
+            get_sheet_meta(
+                os.path.basename(file.file_path),
+                (1, 1, len(header), total + 1),
+                head,
+            )
+        ]
+    }
@@ -0,0 +1,39 @@
+from typing import TypedDict, Optional
+from ..types import RowFilterConfig
+
+
+class ReadNDJSONConfig(TypedDict):
+    """NDJSON data parser config."""
+
+    flatten_depth: Optional[int]
+    """Depth of the nested objects flattened into the header columns, 0 keeps the top-level keys only
+
+    The objects deeper than it and the arrays are JSON strings.
+
+    Default: None, flatten all the nested objects
+    """
+
+    separator: Optional[str]
+    """Separator joining the keys of the flattened nested objects
+
+    Default: .
+    """
+
+    filters: Optional[list[RowFilterConfig]]
+    """Row filters on the raw cell values, only the rows matching all of them are parsed
+
+    Default: None
+
+    Example: [{"field": "status", "op": "eq", "value": "done"}]
+    """
+
+
+class NDJSONLineIndex(TypedDict):
+    """Byte offsets of the NDJSON records, the blank lines are skipped"""
+
+    step: int
+    """The offset of every `step` records is recorded"""
+    total: int
+    """Total number of records"""
+    offsets: list[int]
+    """Byte offset of the record `i * step`"""
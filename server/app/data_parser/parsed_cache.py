@@ -0,0 +1,245 @@
+"""Parse-once cache
+
+The first full parse of a data source with a read config writes every column of
+every chunk as `.npy` files under `FileItem.dir_path/cache/parsed`. Later
+previews, totals and imports of the same config are served from the cache,
+the typed columns are memory-mapped instead of parsing the file again. The
+directories are counted in the disk budget of `dataCache`.
+"""
+
+import os
+import uuid
+import shutil
+import bisect
+import orjson
+import numpy as np
+from typing import Iterable, Generator
+from app.file import FileItem, create_file, read_json_file, get_md5_from_bytes
+from .columnar import Column, ColumnarData
+from .constants import PARSED_CACHE_DIR
+from .data_cache import dataCache
+from .exceptions import InvalidConfigValue
+from .utils import get_projection, get_page_range
+from .types import DataMeta, PaginationConfig, PaginationData, ParsedData
+
+META_FILE_NAME = "meta.json"
+PREVIEW_META_SUFFIX = "_preview.json"
+
+
+def get_parsed_cache_path(
+    file: FileItem,
+    type: str,
+    config: dict | None,
+    columns: Iterable[str] | None = None,
+) -> str:
+    """Get the cache directory of the data source type, read config and projected columns"""
+    config = {k: v for k, v in (config or {}).items() if v is not None}
+    key = {"type": type, "config": config}
+    if not columns is None:
+        key["columns"] = sorted(columns)
+    key = get_md5_from_bytes(orjson.dumps(key, option=orjson.OPT_SORT_KEYS))
+    return os.path.join(file.dir_path, "cache", PARSED_CACHE_DIR, key)
+
+
+def get_preview_cache_path(file: FileItem, type: str, config: dict | None) -> str:
+    """Get the cache directory serving the previews of the read config
+
+    The previews are not filtered, so they are only served from the parse
+    without the `filters` of the config.
+    """
+    config = {k: v for k, v in (config or {}).items() if k != "filters"}
+    return get_parsed_cache_path(file, type, config)
+
+
+def get_column_file(path: str, chunk: int, column: int, name: str):
+    return os.path.join(path, f"{chunk}_{column}_{name}.npy")
+
+
+class ParsedCache:
+    """Parsed data of a data source read from the cache directory"""
+
+    def __init__(self, path: str) -> None:
+        meta = read_json_file(os.path.join(path, META_FILE_NAME))
+        self.path = path
+        self.fields: list[str] = meta["fields"]
+        self.chunks: list[dict] = meta["chunks"]
+        self.offsets: list[int] = [0]
+        for chunk in self.chunks:
+            self.offsets.append(self.offsets[-1] + chunk["length"])
+        self._loaded: dict[tuple[int, int], Column] = {}
+
+    @property
+    def total(self) -> int:
+        """Number of the parsed rows"""
+        return self.offsets[-1]
+
+    @staticmethod
+    def open(path: str) -> "ParsedCache | None":
+        """Open the cache, None if it is not written yet"""
+        if not os.path.exists(os.path.join(path, META_FILE_NAME)):
+            return None
+        cache = ParsedCache(path)
+        dataCache.track(path)
+        return cache
+
+    def read_column(self, index: int, column: int) -> Column:
+        """Read the column of the chunk, memory-mapped except the `object` one"""
+        key = (index, column)
+        if key in self._loaded:
+            return self._loaded[key]
+        meta = self.chunks[index]["columns"][column]
+        is_object = meta["type"] == "object"
+        data = Column(
+            self.fields[column],
+            meta["type"],
+            np.load(
+                get_column_file(self.path, index, column, "values"),
+                mmap_mode=None if is_object else "r",
+                allow_pickle=is_object,
+            ),
+            np.load(get_column_file(self.path, index, column, "mask"), mmap_mode="r"),
+            meta["dictionary"],
+        )
+        self._loaded[key] = data
+        return data
+
+    def read_chunk(
+        self, index: int, columns: Iterable[str] | None = None
+    ) -> ColumnarData:
+        """Read the chunk, only the columns of the header in `columns` if it is set"""
+        projection = get_projection(self.fields, columns)
+        if projection is None:
+            projection = range(len(self.fields))
+        return ColumnarData(
+            [self.fields[i] for i in projection],
+            [self.read_column(index, i) for i in projection],
+            self.chunks[index]["length"],
+        )
+
+    def slice(
+        self, start: int, stop: int, columns: Iterable[str] | None = None
+    ) -> ColumnarData:
+        """Read the rows in [start, stop)"""
+        stop = min(stop, self.total)
+        if start >= stop or not self.chunks:
+            projection = get_projection(self.fields, columns)
+            if not projection is None:
+                return ColumnarData.from_rows([self.fields[i] for i in projection], [])
+            return ColumnarData.from_rows(self.fields, [])
+        first = bisect.bisect_right(self.offsets, start) - 1
+        last = bisect.bisect_left(self.offsets, stop) - 1
+        return ColumnarData.concat(
+            [
+                self.read_chunk(i, columns).slice(
+                    max(start - self.offsets[i], 0),
+                    min(stop, self.offsets[i + 1]) - self.offsets[i],
+                )
+                for i in range(first, last + 1)
+            ]
+        )
+
+    def iter_batches(
+        self,
+        batch_size: int,
+        columnar: bool = False,
+        columns: Iterable[str] | None = None,
+    ) -> Generator[list[dict] | ColumnarData, None, None]:
+        """Yield the rows in batches like `DataParser.parse`
+
+        The directory is pinned in `dataCache` until the iteration stops.
+        """
+        dataCache.pin(self.path)
+        try:
+            for start in range(0, self.total, batch_size):
+                batch = self.slice(start, start + batch_size, columns)
+                yield batch if columnar else batch.to_records()
+        finally:
+            dataCache.unpin(self.path)
+
+
+def write_parsed_cache(
+    path: str, chunks: Iterable[ColumnarData]
+) -> Generator[ColumnarData, None, None]:
+    """Write the chunks to the cache while passing them through
+
+    The cache is only visible after the last chunk is written, it is dropped
+    if the iteration stops before.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    fields: list[str] | None = None
+    meta_chunks = []
+    try:
+        for index, chunk in enumerate(chunks):
+            fields = chunk.fields
+            for i, column in enumerate(chunk.columns):
+                np.save(
+                    get_column_file(tmp_path, index, i, "values"),
+                    column.values,
+                    allow_pickle=column.type == "object",
+                )
+                np.save(get_column_file(tmp_path, index, i, "mask"), column.mask)
+            meta_chunks.append(
+                {
+                    "length": chunk.length,
+                    "columns": [
+                        {"type": c.type, "dictionary": c.dictionary}
+                        for c in chunk.columns
+                    ],
+                }
+            )
+            yield chunk
+        create_file(
+            os.path.join(tmp_path, META_FILE_NAME),
+            orjson.dumps({"fields": fields or [], "chunks": meta_chunks}),
+        )
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Written by another parse at the same time
+            pass
+        dataCache.track(path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def get_preview_meta(path: str) -> DataMeta | None:
+    """Get the preview meta saved for the cache, None if not saved"""
+    meta_path = path + PREVIEW_META_SUFFIX
+    return read_json_file(meta_path) if os.path.exists(meta_path) else None
+
+
+def save_preview_meta(path: str, meta: DataMeta):
+    """Save the preview meta, so the later pages can be served from the cache"""
+    create_file(path + PREVIEW_META_SUFFIX, orjson.dumps(meta))
+
+
+def paginate_parsed_cache(
+    cache: ParsedCache,
+    meta: DataMeta,
+    config: PaginationConfig | None,
+    columnar: bool = False,
+) -> PaginationData[ParsedData]:
+    """Get the preview page from the cache
+
+    The first parsed row is the header row, so the pages are sliced the same
+    way as the plugins do.
+    """
+    config = config or {}
+    page_size = config.get("page_size")
+    if not page_size is None:
+        page_size = int(page_size)
+    page_token = config.get("page_token") or 0
+    if page_token < 0:
+        raise InvalidConfigValue("`page_token` should >= 0")
+    start, stop = get_page_range(page_token, page_size, cache.total)
+    page = cache.slice(start, stop)
+    return {
+        "data": {
+            "data": page if columnar else page.to_records(),
+            "meta": meta,
+        },
+        "page_size": page.length,
+        "page_token": page_token,
+        "has_more": stop < cache.total,
+    }
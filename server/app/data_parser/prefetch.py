@@ -0,0 +1,76 @@
+"""Prefetch of the next preview page
+
+After a preview page is served, the next page of the same file and config is
+computed in the background and stored in the `data_cache`, so paging through a
+sheet is served from the cache. Each file has at most one prefetch, which is
+cancelled when the file is deleted or a page of another config is requested.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+import orjson
+from app.file import FileItem
+from app.log import logger
+from .constants import PREFETCH_WORKERS
+from .types import PaginationConfig
+
+
+def get_prefetch_key(config: PaginationConfig):
+    return orjson.dumps(config, option=orjson.OPT_SORT_KEYS)
+
+
+class Prefetcher:
+    def __init__(self, workers: int = PREFETCH_WORKERS):
+        self._lock = threading.Lock()
+        self._tasks: dict[str, tuple[bytes, Future]] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="data-prefetch"
+        )
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def discard(self, file: FileItem, config: PaginationConfig | None = None):
+        """Cancel the prefetch of the file, unless it is the page of `config`"""
+        key = None if config is None else get_prefetch_key(config)
+        with self._lock:
+            task = self._tasks.get(file.token)
+            if task is None or task[0] == key:
+                return
+            del self._tasks[file.token]
+        task[1].cancel()
+
+    def cancel(self, file: FileItem):
+        """Cancel the prefetch of the file"""
+        self.discard(file)
+
+    def _run(self, file: FileItem, load: Callable[[], Any]):
+        if not os.path.exists(file.file_path):
+            return
+        try:
+            load()
+        except Exception as e:
+            logger.error(f"Error when prefetch {file.token}: {e}")
+
+    def schedule(
+        self, file: FileItem, config: PaginationConfig, load: Callable[[], Any]
+    ) -> Future:
+        """Compute the page of `config` in the background, replacing the prefetch of the file"""
+        key = get_prefetch_key(config)
+        self.discard(file, config)
+        with self._lock:
+            task = self._tasks.get(file.token)
+            if not task is None:
+                return task[1]
+            future = self._executor.submit(self._run, file, load)
+            self._tasks[file.token] = (key, future)
+
+        def done(_: Future):
+            with self._lock:
+                if self._tasks.get(file.token, (None, None))[1] is future:
+                    del self._tasks[file.token]
+
+        future.add_done_callback(done)
+        return future
@@ -0,0 +1,166 @@
+"""Column profile of the data
+
+The rows are streamed once. Each column counts the types and the empty values,
+estimates the distinct values with a HyperLogLog and keeps a reservoir sample,
+so the memory does not grow with the rows.
+"""
+
+import os
+import math
+import random
+import hashlib
+from datetime import date, time, datetime
+from typing import Iterable
+import orjson
+from app.file import FileItem
+from .constants import PROFILE_CACHE_DIR, PROFILE_SAMPLE_SIZE, PROFILE_HLL_PRECISION
+from .parsed_cache import get_parsed_cache_path
+from .types import BasicValueType, ValueType, ColumnProfile, DataProfile
+
+
+class HyperLogLog:
+    """Approximate distinct counter"""
+
+    def __init__(self, precision: int = PROFILE_HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, data: bytes):
+        x = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = x >> bits
+        rank = bits - (x & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = (
+            0.7213 / (1 + 1.079 / m) * m * m / sum(2.0**-r for r in self.registers)
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # linear counting is more accurate for the small cardinalities
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class Reservoir:
+    """Uniform sample of at most `size` items"""
+
+    def __init__(self, size: int = PROFILE_SAMPLE_SIZE, seed: int = 0):
+        self.size = size
+        self.items: list = []
+        self.seen = 0
+        self._random = random.Random(seed)
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        i = self._random.randrange(self.seen)
+        if i < self.size:
+            self.items[i] = item
+
+
+def get_value_type(value: BasicValueType) -> ValueType:
+    """Get the type of the cell value, the strings of numbers and ISO dates are inferred"""
+    if value is None or value == "":
+        return "empty"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, (datetime, date, time)):
+        return "datetime"
+    if isinstance(value, dict):
+        return "url"
+    if isinstance(value, list):
+        return "file"
+    try:
+        float(value)
+        return "number"
+    except ValueError:
+        pass
+    try:
+        datetime.fromisoformat(value)
+        return "datetime"
+    except ValueError:
+        return "string"
+
+
+class ColumnProfiler:
+    def __init__(
+        self,
+        name: str,
+        sample_size: int = PROFILE_SAMPLE_SIZE,
+        precision: int = PROFILE_HLL_PRECISION,
+    ):
+        self.name = name
+        self.types: dict[ValueType, int] = {}
+        self.count = 0
+        self.distinct = HyperLogLog(precision)
+        self.samples = Reservoir(sample_size)
+
+    def add(self, value: BasicValueType):
+        type = get_value_type(value)
+        self.count += 1
+        self.types[type] = self.types.get(type, 0) + 1
+        if type == "empty":
+            return
+        self.distinct.add(orjson.dumps(value))
+        self.samples.add(value)
+
+    def result(self) -> ColumnProfile:
+        nulls = self.types.get("empty", 0)
+        types = [(n, t) for t, n in self.types.items() if t != "empty"]
+        return {
+            "name": self.name,
+            "type": max(types)[1] if types else "empty",
+            "types": self.types,
+            "count": self.count,
+            "nulls": nulls,
+            "null_ratio": nulls / self.count if self.count else 0,
+            "distinct": self.distinct.count() if nulls < self.count else 0,
+            # the dates are serialized like the cached profile
+            "samples": orjson.loads(orjson.dumps(self.samples.items)),
+        }
+
+
+def profile_rows(
+    batches: Iterable[list[dict[str, BasicValueType]]],
+    sample_size: int = PROFILE_SAMPLE_SIZE,
+    precision: int = PROFILE_HLL_PRECISION,
+    skip_header: bool = False,
+) -> DataProfile:
+    """Get the column statistics of the row batches
+
+    Args:
+        skip_header (bool, optional): skip the first row, the header row yielded by `DataParser.parse`. Defaults to False.
+    """
+    columns: dict[str, ColumnProfiler] = {}
+    total = 0
+    for rows in batches:
+        for row in rows:
+            if skip_header:
+                skip_header = False
+                continue
+            total += 1
+            for name, value in row.items():
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = ColumnProfiler(
+                        name, sample_size, precision
+                    )
+                column.add(value)
+    return {
+        "fields": list(columns.keys()),
+        "total": total,
+        "columns": [column.result() for column in columns.values()],
+    }
+
+
+def get_profile_cache_key(file: FileItem, type: str, config: dict | None):
+    key = os.path.basename(get_parsed_cache_path(file, type, config))
+    return os.path.join(file.dir_path, "cache", PROFILE_CACHE_DIR, f"{key}.json")
@@ -0,0 +1,129 @@
+"""Row filters of the read config
+
+The filters are evaluated on the raw cell values of the rows before the cells
+are parsed and the row dicts are built, so the rows filtered out cost only the
+reading of the filtered columns. The header row is never filtered.
+
+The values are compared loosely: the numbers and the strings of numbers are
+compared as floats, the dates and the ISO date strings as timestamps in ms.
+"""
+
+from datetime import date, datetime, time
+from typing import Any, Callable, Sequence
+from app.utils import datetime_to_timestamp_ms
+from .exceptions import InvalidConfigValue
+from .types import RowFilterConfig
+
+ROW_FILTER_OPS = {"eq", "in", "range", "not_empty"}
+
+
+def to_comparable(value) -> float | str | bool | None:
+    """Get the value used to compare the cell with the filter"""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, time):
+        value = datetime.combine(date.today(), value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    if isinstance(value, datetime):
+        return float(datetime_to_timestamp_ms(value))
+    if not isinstance(value, str):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return float(datetime_to_timestamp_ms(datetime.fromisoformat(value)))
+    except ValueError:
+        return value
+
+
+def _is_comparable(a, b) -> bool:
+    return isinstance(a, float) == isinstance(b, float) and not a is None
+
+
+class RowFilter:
+    """All the filters of the config on a header, picklable to be sent to the worker processes"""
+
+    def __init__(self, header: list[str], filters: list[RowFilterConfig]):
+        self.predicates: list[tuple[int, str, Any]] = []
+        for f in filters:
+            field = f.get("field")
+            if not field in header:
+                raise InvalidConfigValue(f"`filters` field {field} not in header")
+            op = f.get("op")
+            if not op in ROW_FILTER_OPS:
+                raise InvalidConfigValue(
+                    f"`filters` op should be one of {sorted(ROW_FILTER_OPS)}, got {op}"
+                )
+            match op:
+                case "eq":
+                    target = to_comparable(f.get("value"))
+                case "in":
+                    values = f.get("values")
+                    if values is None:
+                        raise InvalidConfigValue("`filters` op `in` needs `values`")
+                    target = frozenset(to_comparable(v) for v in values)
+                case "range":
+                    if f.get("min") is None and f.get("max") is None:
+                        raise InvalidConfigValue(
+                            "`filters` op `range` needs `min` or `max`"
+                        )
+                    target = (to_comparable(f.get("min")), to_comparable(f.get("max")))
+                case _:
+                    target = None
+            self.predicates.append((header.index(field), op, target))
+
+    @property
+    def columns(self) -> list[int]:
+        """Indexes of the filtered columns in the header"""
+        return sorted({i for i, _, _ in self.predicates})
+
+    def shift(self, offset: int) -> "RowFilter":
+        """Get the filter on the rows which start `offset` columns before the header"""
+        row_filter = RowFilter([], [])
+        row_filter.predicates = [(i + offset, op, t) for i, op, t in self.predicates]
+        return row_filter
+
+    def match(self, get: Callable[[int], Any]) -> bool:
+        """If the row matches, `get` returns the raw value of the column index in the header"""
+        for i, op, target in self.predicates:
+            value = get(i)
+            if op == "not_empty":
+                if value is None or value == "":
+                    return False
+                continue
+            value = to_comparable(value)
+            if op == "eq":
+                if value != target:
+                    return False
+            elif op == "in":
+                if not value in target:
+                    return False
+            else:
+                min_value, max_value = target
+                if not min_value is None and (
+                    not _is_comparable(value, min_value) or value < min_value
+                ):
+                    return False
+                if not max_value is None and (
+                    not _is_comparable(value, max_value) or value > max_value
+                ):
+                    return False
+        return True
+
+    def matches(self, row: Sequence) -> bool:
+        """If the row of the raw values matches, the missing cells are None"""
+        return self.match(lambda i: row[i] if i < len(row) else None)
+
+
+def get_row_filter(
+    header: list[str], filters: list[RowFilterConfig] | None
+) -> RowFilter | None:
+    """Get the row filter of the `filters` of the config, None if it is empty"""
+    if not filters:
+        return None
+    return RowFilter(header, filters)
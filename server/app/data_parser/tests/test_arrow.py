@@ -0,0 +1,72 @@
+import os
+import pytest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+TABLE = {
+    "id": list(range(1, 101)),
+    "name": [f"name{i}" for i in range(1, 101)],
+    "status": ["done" if i % 3 == 0 else None for i in range(1, 101)],
+    "created": [datetime(2024, 1, 1 + i % 28) for i in range(1, 101)],
+}
+
+
+def save_file(cache_path: str, filename: str):
+    table = pa.table(TABLE)
+    path = os.path.join(cache_path, filename)
+    if filename.endswith(".parquet"):
+        pq.write_table(table, path, row_group_size=30)
+    else:
+        feather.write_feather(table, path, chunksize=30)
+    fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+    with open(path, "rb") as f:
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", filename, f.read()
+        )
+    return fileManager.get_file_from_token(token)
+
+
+def test_arrow():
+    rows = [dict(zip(TABLE, values)) for values in zip(*TABLE.values())]
+    for filename in ["data.parquet", "data.feather"]:
+        with TemporaryDirectory(dir="") as cache_path:
+            file_item = save_file(cache_path, filename)
+            file_type = os.path.splitext(filename)[1]
+            plugin = dataParser.plugins[file_type]
+            parsed = [r for b in plugin.parse(file_item, None, None) for r in b]
+            assert parsed[0] == {k: k for k in TABLE}
+            assert parsed[1:] == rows
+            projected = [
+                r
+                for b in plugin.parse(
+                    file_item,
+                    {"filters": [{"field": "status", "op": "eq", "value": "done"}]},
+                    None,
+                    columns={"id"},
+                )
+                for r in b
+            ]
+            assert projected[1:] == [{"id": r["id"]} for r in rows if r["status"]]
+            page = dataParser.preview(
+                file_type, file_item, {"page_size": 40, "page_token": 1}
+            )
+            # the pages start at `page_token * page_size` counting the header row
+            assert page["data"]["data"] == rows[39:79]
+            assert page["has_more"]
+            # the pages of the parse-once cache are the same
+            for _ in dataParser.parse(file_type, file_item):
+                pass
+            assert (
+                dataParser.preview(
+                    file_type, file_item, {"page_size": 40, "page_token": 1}
+                )
+                == page
+            )
+            meta = dataParser.metadata(file_type, file_item)
+            assert meta["sheets"][0]["rows"] == page["data"]["meta"]["total"]
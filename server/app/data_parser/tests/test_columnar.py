@@ -0,0 +1,131 @@
+import os
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from openpyxl import Workbook
+from app.utils import get_file_type
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser, core
+from app.data_parser.columnar import ColumnarData, build_column
+
+TEST_DIR = os.path.dirname(__file__)
+XLSX_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xlsx")
+XLS_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xls")
+CSV_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.csv")
+
+
+def test_build_column():
+    cases = [
+        ([1, None, 3], "int"),
+        ([1.0, 2.5, None], "float"),
+        ([1, 2.5, None], "object"),
+        ([True, None, False], "bool"),
+        ([datetime(2024, 1, 1), None], "datetime"),
+        (["a", None, "b", "a"], "string"),
+        (["a", 1, None], "object"),
+        ([2**70, 1], "object"),
+        ([None, None], "object"),
+    ]
+    for values, column_type in cases:
+        column = build_column("field", values)
+        assert column.type == column_type
+        assert column.mask.tolist() == [v is None for v in values]
+        decoded = column.to_list()
+        assert decoded == values
+        assert [type(v) for v in decoded] == [type(v) for v in values]
+    assert build_column("field", ["a", None, "b", "a"]).dictionary == ["a", "b"]
+
+
+def test_columnar_parse():
+    for path, config in [
+        (XLSX_FILE_PATH, {"performance_mode": True}),
+        (CSV_FILE_PATH, None),
+    ]:
+        with TemporaryDirectory(dir="") as cache_path, open(path, "rb") as f:
+            fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", os.path.basename(path), f.read()
+            )
+            file_item = fileManager.get_file_from_token(token)
+            file_type = get_file_type(file_item.file_path)
+            rows = [
+                row
+                for batch in dataParser.parse(file_type, file_item, config)
+                for row in batch
+            ]
+            columnar_rows = []
+            for batch in dataParser.parse(file_type, file_item, config, columnar=True):
+                assert isinstance(batch, ColumnarData)
+                columnar_rows.extend(batch.to_records())
+            assert columnar_rows == rows
+            page_config = {"page_size": 20, "config": config}
+            page = dataParser.preview(file_type, file_item, page_config)
+            columnar_page = dataParser.preview(
+                file_type, file_item, page_config, columnar=True
+            )
+            assert len(columnar_page["data"]["data"]) == len(page["data"]["data"])
+
+
+def test_column_projection():
+    columns = {"name", "score"}
+    for path, config in [
+        (XLSX_FILE_PATH, {"performance_mode": True}),
+        (XLS_FILE_PATH, None),
+        (CSV_FILE_PATH, None),
+        (CSV_FILE_PATH, {"engine": "pandas"}),
+    ]:
+        with TemporaryDirectory(dir="") as cache_path, open(path, "rb") as f:
+            fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", os.path.basename(path), f.read()
+            )
+            file_item = fileManager.get_file_from_token(token)
+            plugin = dataParser.plugins[get_file_type(file_item.file_path)]
+            rows = [
+                {k: v for k, v in row.items() if k in columns}
+                for batch in plugin.parse(file_item, config, dataParser)
+                for row in batch
+            ]
+            projected_rows = [
+                row
+                for batch in plugin.parse(
+                    file_item, config, dataParser, columns=columns
+                )
+                for row in batch
+            ]
+            assert projected_rows == rows
+
+
+def test_parse_keeps_types(monkeypatch):
+    # the header row is in the first chunk only, so the chunks have different types
+    monkeypatch.setattr(core, "PARSED_CACHE_CHUNK_SIZE", 10)
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "score"])
+    for i in range(1, 31):
+        sheet.append([i, i + 0.5 if i % 2 else i])
+    with TemporaryDirectory(dir="") as cache_path:
+        path = os.path.join(cache_path, "data.xlsx")
+        workbook.save(path)
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        with open(path, "rb") as f:
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", "data.xlsx", f.read()
+            )
+        file_item = fileManager.get_file_from_token(token)
+        config = {"performance_mode": True}
+        rows = [
+            row
+            for batch in dataParser.plugins[".xlsx"].parse(file_item, config, None)
+            for row in batch
+        ]
+        # the first parse writes the parse-once cache, the second reads it
+        for _ in range(2):
+            parsed = [
+                row
+                for batch in dataParser.parse(".xlsx", file_item, config, batch_size=7)
+                for row in batch
+            ]
+            assert parsed == rows
+            assert [type(r["score"]) for r in parsed] == [
+                type(r["score"]) for r in rows
+            ]
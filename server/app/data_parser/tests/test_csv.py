@@ -1,7 +1,11 @@
 import os
 import csv
+from tempfile import TemporaryDirectory
 from openpyxl.utils import range_boundaries
-
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.csv import CSVParser, read_csv
+from app.data_parser.csv.row_index import get_row_index, iter_csv_rows
 
 TEST_DIR = os.path.dirname(__file__)
 CSV_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.csv")
@@ -9,4 +13,110 @@ f = open(CSV_FILE_PATH, "r", encoding="utf-8-sig")
 reader = csv.reader(f)
 # for row in reader:
 #     print(row)
-print(range_boundaries("1:12"))
\ No newline at end of file
+print(range_boundaries("1:12"))
+
+
+def test_row_index():
+    rows = [["id", "text"]] + [
+        [str(i), "multi\nline" if i % 3 else 'with "quote"'] for i in range(2500)
+    ]
+    with TemporaryDirectory(dir="") as cache_path:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        data = "".join(
+            ",".join(f'"{c.replace('"', '""')}"' for c in row) + "\n" for row in rows
+        )
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "test.csv", data.encode()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        assert get_row_index(file_item)["total"] == len(rows)
+        for start in [0, 999, 1000, 2001]:
+            assert [r for _, r in iter_csv_rows(file_item, start)] == rows[start:]
+        # a quote inside an unquoted field does not open a quoted field
+        data = 'id,size\n1,12" long\n2,"a ""b"" c"\n3,"x\ny"\n4,5"\n5,6\n6,7\n'
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "quote.csv", data.encode()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        rows = list(csv.reader(data.splitlines(keepends=True)))
+        assert get_row_index(file_item)["total"] == len(rows) == 7
+        assert [r for _, r in iter_csv_rows(file_item)] == rows
+
+
+def test_pandas_engine():
+    with TemporaryDirectory(dir="") as cache_path, open(CSV_FILE_PATH, "rb") as f:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "test.csv", f.read()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        parser = CSVParser()
+        for config in [None, {"header": 2}, {"data_range": "B3:C8"}]:
+            pandas_config = {**(config or {}), "engine": "pandas"}
+            rows = list(parser.parse(file_item, config, dataParser))
+            assert list(parser.parse(file_item, pandas_config, dataParser)) == rows
+            assert [
+                batch.to_records()
+                for batch in parser.parse(
+                    file_item, pandas_config, dataParser, columnar=True
+                )
+            ] == rows
+
+
+def test_pandas_engine_ragged_rows(monkeypatch):
+    # the chunk of only short rows is read too
+    monkeypatch.setattr(read_csv, "PANDAS_CHUNK_SIZE", 2)
+    data = 'a,b,c\n1,2,3\n4,"5,5",6,7,8\n9\n10,11\n12,13,14\n'
+    with TemporaryDirectory(dir="") as cache_path:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "ragged.csv", data.encode()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        assert get_row_index(file_item)["width"] == 5
+        parser = CSVParser()
+        for config in [
+            None,
+            {"data_range": "B1:C6"},
+            {"filters": [{"field": "a", "op": "not_empty"}]},
+        ]:
+            pandas_config = {**(config or {}), "engine": "pandas"}
+            # the missing cells of the short rows are empty strings
+            rows = [
+                [{**dict.fromkeys(batch[0], ""), **row} for row in batch]
+                for batch in parser.parse(file_item, config, dataParser)
+            ]
+            assert list(parser.parse(file_item, pandas_config, dataParser)) == rows
+        assert [
+            row
+            for batch in parser.parse(
+                file_item, {"engine": "pandas"}, dataParser, columns={"c"}
+            )
+            for row in batch
+        ] == [{"c": "c"}, {"c": "3"}, {"c": "6"}, {"c": ""}, {"c": ""}, {"c": "14"}]
+
+
+def test_parallel():
+    rows = [["id", "text"]] + [
+        [str(i), "multi\r\nline" if i % 3 else 'with "quote"'] for i in range(60000)
+    ]
+    with TemporaryDirectory(dir="") as cache_path:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        data = "".join(
+            ",".join(f'"{c.replace('"', '""')}"' for c in row) + "\n" for row in rows
+        )
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "test.csv", data.encode()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        parser = CSVParser()
+        for config in [None, {"header": 2}, {"data_range": "B49000:B51000"}]:
+            parallel_config = {**(config or {}), "workers": 2}
+            rows = list(parser.parse(file_item, config, dataParser))
+            assert list(parser.parse(file_item, parallel_config, dataParser)) == rows
+            assert [
+                batch.to_records()
+                for batch in parser.parse(
+                    file_item, parallel_config, dataParser, columnar=True
+                )
+            ] == rows
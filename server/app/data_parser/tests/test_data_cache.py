@@ -0,0 +1,89 @@
+import os
+import threading
+from time import sleep
+from tempfile import TemporaryDirectory
+from app.data_parser.data_cache import DataCache
+
+
+def get_key(root: str, name: str):
+    return os.path.join(root, "file", "cache", "paginate_data", f"{name}.json")
+
+
+def test_data_cache():
+    with TemporaryDirectory(dir="") as root:
+        cache = DataCache(root, max_size=250, memory_size=150, expired_time=None)
+        for name in "abc":
+            cache.set(get_key(root, name), name.encode() * 100)
+            cache.flush()
+        assert cache.size == 200
+        assert not os.path.exists(get_key(root, "a"))
+        assert cache.get(get_key(root, "a")) is None
+        assert cache.get(get_key(root, "c")) == b"c" * 100
+        assert cache.get(get_key(root, "b")) == b"b" * 100
+        assert cache.stats == {
+            "hits": 2,
+            "memory_hits": 1,
+            "misses": 1,
+            "evictions": 1,
+            "expired": 0,
+        }
+        # the existing entries are indexed by a new process
+        cache = DataCache(root, max_size=250, memory_size=150, expired_time=None)
+        cache.set(get_key(root, "d"), b"d" * 100)
+        cache.flush()
+        assert cache.size == 200
+        assert not os.path.exists(get_key(root, "b"))
+        cache = DataCache(root, max_size=None, memory_size=150, expired_time=10)
+        sleep(0.02)
+        assert cache.get(get_key(root, "c")) is None
+        assert not os.path.exists(get_key(root, "c"))
+        assert cache.stats["expired"] == 1
+
+
+def test_single_flight():
+    with TemporaryDirectory(dir="") as root:
+        cache = DataCache(root, expired_time=None)
+        key = get_key(root, "page")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            sleep(0.2)
+            return {"data": [1, 2, 3]}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.load(key, compute)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cache.flush()
+        assert len(calls) == 1
+        assert results == [{"data": [1, 2, 3]}] * 4
+        assert os.listdir(os.path.dirname(key)) == ["page.json"]
+
+
+def test_parsed_cache_budget():
+    with TemporaryDirectory(dir="") as root:
+        parsed_dir = os.path.join(root, "file", "cache", "parsed")
+        for name in "ab":
+            os.makedirs(os.path.join(parsed_dir, name))
+            with open(os.path.join(parsed_dir, name, "0_0_values.npy"), "wb") as f:
+                f.write(b"0" * 100)
+            sleep(0.01)
+        # the directories of the parse-once cache are indexed by a new process
+        cache = DataCache(root, max_size=250, memory_size=150, expired_time=None)
+        cache.set(get_key(root, "c"), b"c" * 100)
+        cache.flush()
+        assert cache.size == 200
+        assert not os.path.exists(os.path.join(parsed_dir, "a"))
+        os.makedirs(os.path.join(parsed_dir, "d"))
+        with open(os.path.join(parsed_dir, "d", "0_0_values.npy"), "wb") as f:
+            f.write(b"0" * 100)
+        cache.track(os.path.join(parsed_dir, "d"))
+        assert cache.size == 200
+        assert not os.path.exists(os.path.join(parsed_dir, "b"))
+        assert os.path.exists(get_key(root, "c"))
@@ -0,0 +1,33 @@
+import os
+import orjson
+from tempfile import TemporaryDirectory
+from app.utils import get_file_type
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.data_cache import dataCache
+
+TEST_DIR = os.path.dirname(__file__)
+XLSX_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xlsx")
+XLS_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xls")
+CSV_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.csv")
+
+
+def test_metadata():
+    for path in [XLSX_FILE_PATH, XLS_FILE_PATH, CSV_FILE_PATH]:
+        with TemporaryDirectory(dir="") as cache_path, open(path, "rb") as f:
+            fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", os.path.basename(path), f.read()
+            )
+            file_item = fileManager.get_file_from_token(token)
+            file_type = get_file_type(file_item.file_path)
+            meta = dataParser.metadata(file_type, file_item)
+            assert orjson.loads(orjson.dumps(meta)) == dataParser.metadata(
+                file_type, file_item
+            )
+            sheet = meta["sheets"][0]
+            preview = dataParser.preview(file_type, file_item, {"page_size": 10})
+            assert sheet["head"][0] == preview["data"]["meta"]["fields"]
+            assert sheet["rows"] == preview["data"]["meta"]["total"]
+            # wait for the files written in the background before removing the directory
+            dataCache.flush()
@@ -0,0 +1,112 @@
+import os
+import pytest
+from tempfile import TemporaryDirectory
+from openpyxl import Workbook
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser, multi_sheet
+from app.data_parser.data_cache import dataCache
+from app.data_parser.exceptions import InvalidHeader
+
+TEST_DIR = os.path.dirname(__file__)
+XLS_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xls")
+XLSX_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xlsx")
+
+
+def save_file(cache_path: str, path: str):
+    fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+    with open(path, "rb") as f:
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", os.path.basename(path), f.read()
+        )
+    return fileManager.get_file_from_token(token)
+
+
+def test_parse_sheets():
+    with TemporaryDirectory(dir="") as cache_path:
+        file_item = save_file(cache_path, XLS_FILE_PATH)
+        sheet_names = ["Sheet1", "Sheet2"]
+        expected = {
+            name: [
+                row
+                for rows in dataParser.plugins[".xls"].parse(
+                    file_item, {"sheet_name": name}, None
+                )
+                for row in rows
+            ]
+            for name in sheet_names
+        }
+        for workers in [2, 1]:
+            batches = list(
+                dataParser.parse_sheets(
+                    ".xls", file_item, sheet_names, batch_size=4000, workers=workers
+                )
+            )
+            for name in sheet_names:
+                sheet_batches = [b for b in batches if b["sheet_name"] == name]
+                assert [row for b in sheet_batches for row in b["data"]] == expected[
+                    name
+                ]
+                assert [b["done"] for b in sheet_batches][-1]
+                assert sheet_batches[-1]["rows"] == sheet_batches[-1]["total"]
+                assert sheet_batches[-1]["total"] == len(expected[name])
+
+
+def test_parse_sheets_progress(monkeypatch):
+    monkeypatch.setattr(multi_sheet, "PARSED_CACHE_CHUNK_SIZE", 4000)
+    for workers, progress in [(1, [4000, 8000, 10001]), (2, [10001])]:
+        with TemporaryDirectory(dir="") as cache_path:
+            file_item = save_file(cache_path, XLS_FILE_PATH)
+            batches = [
+                b
+                for b in dataParser.parse_sheets(
+                    ".xls", file_item, ["Sheet1", "Sheet2"], workers=workers
+                )
+                if b["sheet_name"] == "Sheet1"
+            ]
+            # the rows parsed are yielded before the sheet is done
+            assert [b["parsed"] for b in batches if b["total"] is None] == progress
+            assert all(
+                b["data"] == [] and not b["done"] for b in batches[: len(progress)]
+            )
+            assert batches[-1]["parsed"] == batches[-1]["total"] == 10001
+
+
+def test_parse_sheets_error():
+    with TemporaryDirectory(dir="") as cache_path:
+        file_item = save_file(cache_path, XLSX_FILE_PATH)
+        with pytest.raises(InvalidHeader):
+            list(
+                dataParser.parse_sheets(
+                    ".xlsx",
+                    file_item,
+                    ["Sheet1", "Sheet2"],
+                    {"performance_mode": True},
+                    workers=2,
+                )
+            )
+
+
+def test_parse_sheets_data_cache():
+    workbook = Workbook()
+    workbook.active.title = "Sheet1"
+    workbook.create_sheet("Sheet2")
+    for sheet in workbook.worksheets:
+        sheet.append(["id"])
+        sheet.append([1])
+    with TemporaryDirectory(dir="") as cache_path:
+        path = os.path.join(cache_path, "data.xlsx")
+        workbook.save(path)
+        file_item = save_file(cache_path, path)
+        list(
+            dataParser.parse_sheets(".xlsx", file_item, ["Sheet1", "Sheet2"], workers=2)
+        )
+        dataCache.flush()
+        # the entries computed by the workers are set by this process
+        memory_hits = dataCache.stats["memory_hits"]
+        for name in ["Sheet1", "Sheet2"]:
+            key = os.path.join(
+                file_item.dir_path, "cache", "images_map", f"{name}.json"
+            )
+            assert os.path.exists(key)
+            assert not dataCache.get(key) is None
+        assert dataCache.stats["memory_hits"] == memory_hits + 2
@@ -0,0 +1,81 @@
+import os
+import orjson
+from tempfile import TemporaryDirectory
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.ndjson import build_line_index
+
+RECORDS = [
+    {
+        "id": i,
+        "user": {"name": f"name{i}", "address": {"city": f"city{i % 5}"}},
+        "tags": ["a", "b"] if i % 2 else [],
+        **({"status": "done"} if i % 3 == 0 else {}),
+    }
+    for i in range(1, 2501)
+]
+
+
+def save_file(cache_path: str, filename: str):
+    # blank lines are skipped
+    content = b"\n".join(orjson.dumps(r) for r in RECORDS[:10]) + b"\n\n"
+    content += b"\n".join(orjson.dumps(r) for r in RECORDS[10:]) + b"\n"
+    fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+    token = fileManager.save_file("tenant_key", "base_id", "user_id", filename, content)
+    return fileManager.get_file_from_token(token)
+
+
+def test_ndjson():
+    with TemporaryDirectory(dir="") as cache_path:
+        file_item = save_file(cache_path, "data.jsonl")
+        index = build_line_index(file_item.file_path)
+        assert index["total"] == len(RECORDS)
+        assert len(index["offsets"]) == 3
+        plugin = dataParser.plugins[".jsonl"]
+        parsed = [r for b in plugin.parse(file_item, None, None) for r in b]
+        header = ["id", "user.name", "user.address.city", "tags", "status"]
+        assert list(parsed[0]) == header
+        assert parsed[3] == {
+            "id": 3,
+            "user.name": "name3",
+            "user.address.city": "city3",
+            "tags": '["a","b"]',
+            "status": "done",
+        }
+        assert parsed[1]["status"] is None
+        flat = [
+            r for b in plugin.parse(file_item, {"flatten_depth": 0}, None) for r in b
+        ]
+        assert list(flat[0]) == ["id", "user", "tags", "status"]
+        assert orjson.loads(flat[1]["user"]) == RECORDS[0]["user"]
+        filtered = [
+            r
+            for b in plugin.parse(
+                file_item,
+                {"filters": [{"field": "status", "op": "eq", "value": "done"}]},
+                None,
+                columns={"id"},
+            )
+            for r in b
+        ]
+        assert filtered[1:] == [{"id": r["id"]} for r in RECORDS if "status" in r]
+        page = dataParser.preview(
+            ".jsonl", file_item, {"page_size": 1000, "page_token": 2}
+        )
+        # the pages start at `page_token * page_size` counting the header row
+        assert [r["id"] for r in page["data"]["data"]] == list(range(2000, 2501))
+        assert not page["has_more"]
+        pages = [
+            dataParser.preview(".jsonl", file_item, {"page_size": 3, "page_token": t})
+            for t in range(3)
+        ]
+        assert [r["id"] for r in pages[1]["data"]["data"]] == [3, 4, 5]
+        # the pages of the parse-once cache are the same
+        for _ in dataParser.parse(".jsonl", file_item):
+            pass
+        assert [
+            dataParser.preview(".jsonl", file_item, {"page_size": 3, "page_token": t})
+            for t in range(3)
+        ] == pages
+        meta = dataParser.metadata(".jsonl", file_item)
+        assert meta["sheets"][0]["rows"] == page["data"]["meta"]["total"]
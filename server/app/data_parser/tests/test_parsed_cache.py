@@ -0,0 +1,116 @@
+import os
+import orjson
+from tempfile import TemporaryDirectory
+from app.utils import get_file_type
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser import parsed_cache
+from app.data_parser.columnar import ColumnarData
+from app.data_parser.data_cache import DataCache
+from app.data_parser.parsed_cache import (
+    ParsedCache,
+    get_parsed_cache_path,
+    write_parsed_cache,
+)
+
+TEST_DIR = os.path.dirname(__file__)
+XLSX_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xlsx")
+XLS_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xls")
+
+
+def test_parsed_cache():
+    for path, config in [
+        (XLSX_FILE_PATH, {"performance_mode": True}),
+        (XLS_FILE_PATH, None),
+    ]:
+        with TemporaryDirectory(dir="") as cache_path, open(path, "rb") as f:
+            fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", os.path.basename(path), f.read()
+            )
+            file_item = fileManager.get_file_from_token(token)
+            file_type = get_file_type(file_item.file_path)
+            pages = [
+                dataParser.preview(
+                    file_type,
+                    file_item,
+                    {"page_size": 200, "page_token": page_token, "config": config},
+                )
+                for page_token in range(3)
+            ]
+            rows = [
+                row
+                for batch in dataParser.parse(file_type, file_item, config)
+                for row in batch
+            ]
+            cache = ParsedCache.open(
+                get_parsed_cache_path(file_item, file_type, config)
+            )
+            assert not cache is None and cache.total == len(rows)
+            cached_rows = [
+                row
+                for batch in dataParser.parse(file_type, file_item, config, 300)
+                for row in batch
+            ]
+            assert cached_rows == rows
+            for page_token, page in enumerate(pages):
+                cached_page = dataParser.preview(
+                    file_type,
+                    file_item,
+                    {"page_size": 200, "page_token": page_token, "config": config},
+                )
+                assert orjson.loads(orjson.dumps(cached_page)) == orjson.loads(
+                    orjson.dumps(page)
+                )
+
+
+def test_filtered_parse_preview():
+    data = "id,status\n" + "".join(
+        f"{i},{'done' if i % 2 else 'todo'}\n" for i in range(1, 21)
+    )
+    with TemporaryDirectory(dir="") as cache_path:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "data.csv", data.encode()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        read_config = {"filters": [{"field": "status", "op": "eq", "value": "done"}]}
+        config = {"page_size": 5, "page_token": 1, "config": read_config}
+        page = dataParser.preview(".csv", file_item, config)
+        rows = [
+            row
+            for batch in dataParser.parse(".csv", file_item, read_config)
+            for row in batch
+        ]
+        assert len(rows) == 11
+        # the previews are not filtered, before and after the filtered parse
+        cached_page = dataParser.preview(".csv", file_item, config)
+        assert [r["id"] for r in cached_page["data"]["data"]] == [
+            r["id"] for r in page["data"]["data"]
+        ]
+        assert cached_page["data"]["meta"]["total"] == page["data"]["meta"]["total"]
+
+
+def test_pinned_cache(monkeypatch):
+    with TemporaryDirectory(dir="") as root:
+        cache = DataCache(root, max_size=20000, expired_time=None)
+        monkeypatch.setattr(parsed_cache, "dataCache", cache)
+        path = os.path.join(root, "file", "cache", "parsed", "x")
+        chunks = [
+            ColumnarData.from_rows(["id"], [[i] for i in range(n, n + 1000)])
+            for n in range(0, 3000, 1000)
+        ]
+        for _ in write_parsed_cache(path, chunks):
+            pass
+        batches = ParsedCache.open(path).iter_batches(1000)
+        rows = []
+        for i, batch in enumerate(batches):
+            rows.extend(batch)
+            # the directory being read is the least recently used
+            cache.set(os.path.join(root, "file", "cache", "data", f"{i}.json"), b"0")
+            cache.flush()
+            assert os.path.exists(path)
+        assert [r["id"] for r in rows] == list(range(3000))
+        cache.set(os.path.join(root, "file", "cache", "data", "big.json"), b"0" * 20000)
+        cache.flush()
+        assert not os.path.exists(path)
@@ -0,0 +1,60 @@
+import os
+import threading
+from tempfile import TemporaryDirectory
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.prefetch import Prefetcher
+from app.data_parser.data_cache import dataCache
+from app.data_parser.xlsx import get_paginate_cache_key
+
+TEST_DIR = os.path.dirname(__file__)
+CSV_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.csv")
+
+
+def test_prefetch_next_page():
+    with TemporaryDirectory(dir="") as cache_path, open(CSV_FILE_PATH, "rb") as f:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "data.csv", f.read()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        config = {"page_size": 2, "page_token": 0, "config": None}
+        res = dataParser.preview(".csv", file_item, config, prefetch=True)
+        assert res["has_more"]
+        next_config = {**config, "page_token": 1}
+        task = dataParser.prefetcher._tasks.get(token)
+        if not task is None:
+            task[1].result()
+        dataCache.flush()
+        assert os.path.exists(get_paginate_cache_key(file_item, next_config, True))
+        assert len(dataParser.prefetcher) == 0
+
+
+def test_prefetch_cancel():
+    prefetcher = Prefetcher()
+    started, blocked = threading.Event(), threading.Event()
+    with TemporaryDirectory(dir="") as cache_path, open(CSV_FILE_PATH, "rb") as f:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "data.csv", f.read()
+        )
+        file_item = fileManager.get_file_from_token(token)
+        other = fileManager.get_file_from_token(
+            fileManager.save_file(
+                "tenant_key", "base_id", "user_id", "other.csv", b"a\n1\n"
+            )
+        )
+        config = {"page_size": 2, "page_token": 1, "config": None}
+        running = prefetcher.schedule(
+            other, config, lambda: started.set() or blocked.wait()
+        )
+        started.wait()
+        future = prefetcher.schedule(file_item, config, lambda: None)
+        assert prefetcher.schedule(file_item, config, lambda: None) is future
+        prefetcher.discard(file_item, {**config, "config": {"sheet_name": "a"}})
+        assert future.cancelled()
+        future = prefetcher.schedule(file_item, config, lambda: None)
+        prefetcher.cancel(file_item)
+        assert future.cancelled()
+        blocked.set()
+        running.result()
@@ -0,0 +1,53 @@
+import os
+from tempfile import TemporaryDirectory
+from app.utils import get_file_type
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.profile import HyperLogLog, get_value_type, profile_rows
+
+TEST_DIR = os.path.dirname(__file__)
+XLSX_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xlsx")
+CSV_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.csv")
+
+
+def test_hyperloglog():
+    for n in [0, 10, 1000, 100000]:
+        hll = HyperLogLog()
+        for i in range(n):
+            hll.add(str(i).encode())
+            hll.add(str(i).encode())
+        assert abs(hll.count() - n) <= n * 0.05
+
+
+def test_profile_rows():
+    rows = [
+        {"a": "1", "b": None, "c": True},
+        {"a": "2.5", "b": "", "c": "x"},
+        {"a": "3", "b": "2024-01-01", "c": "y"},
+        {"a": "x", "b": None, "c": "y"},
+    ]
+    profile = profile_rows([rows[:2], rows[2:]], sample_size=2)
+    assert profile["fields"] == ["a", "b", "c"]
+    assert profile["total"] == 4
+    a, b, c = profile["columns"]
+    assert a["type"] == "number" and a["types"] == {"number": 3, "string": 1}
+    assert a["distinct"] == 4 and len(a["samples"]) == 2
+    assert b["type"] == "datetime" and b["nulls"] == 3 and b["null_ratio"] == 0.75
+    assert c["type"] == "string" and c["distinct"] == 3
+    assert get_value_type([]) == "file" and get_value_type({"url": ""}) == "url"
+
+
+def test_profile():
+    for path in [XLSX_FILE_PATH, CSV_FILE_PATH]:
+        with TemporaryDirectory(dir="") as cache_path, open(path, "rb") as f:
+            fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", os.path.basename(path), f.read()
+            )
+            file_item = fileManager.get_file_from_token(token)
+            file_type = get_file_type(file_item.file_path)
+            profile = dataParser.profile(file_type, file_item)
+            preview = dataParser.preview(file_type, file_item)
+            assert profile["fields"] == preview["data"]["meta"]["fields"]
+            assert profile["total"] == len(preview["data"]["data"])
+            assert dataParser.profile(file_type, file_item) == profile
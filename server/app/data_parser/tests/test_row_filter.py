@@ -0,0 +1,84 @@
+import os
+import pytest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from app.utils import get_file_type
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.exceptions import InvalidConfigValue
+from app.data_parser.row_filter import RowFilter
+
+TEST_DIR = os.path.dirname(__file__)
+XLSX_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xlsx")
+XLS_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.xls")
+CSV_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.csv")
+
+FILTERS = [
+    {"field": "age", "op": "range", "min": 20},
+    {"field": "sex", "op": "in", "values": ["女"]},
+    {"field": "name", "op": "not_empty"},
+]
+
+
+def match(row: dict):
+    try:
+        return float(row["age"]) >= 20 and row["sex"] == "女" and row["name"]
+    except ValueError:
+        return False
+
+
+def test_row_filter():
+    row_filter = RowFilter(
+        ["a", "b", "c"],
+        [
+            {"field": "a", "op": "eq", "value": 1},
+            {"field": "c", "op": "range", "min": "2024-01-01", "max": "2024-12-31"},
+        ],
+    )
+    assert row_filter.columns == [0, 2]
+    assert row_filter.matches(["1", None, datetime(2024, 5, 1)])
+    assert row_filter.matches([1.0, None, "2024-05-01"])
+    assert not row_filter.matches([1, None, "2025-01-01"])
+    assert not row_filter.matches([1, None, "x"])
+    assert not row_filter.matches([1])
+    assert row_filter.shift(2).matches([None, None, 1, None, "2024-05-01"])
+    with pytest.raises(InvalidConfigValue):
+        RowFilter(["a"], [{"field": "b", "op": "eq", "value": 1}])
+    with pytest.raises(InvalidConfigValue):
+        RowFilter(["a"], [{"field": "a", "op": "range"}])
+
+
+def test_parse_filters():
+    for path, configs in [
+        (XLSX_FILE_PATH, [{}, {"performance_mode": True}]),
+        (XLS_FILE_PATH, [{}]),
+        (CSV_FILE_PATH, [{}, {"engine": "pandas"}, {"workers": 2}]),
+    ]:
+        with TemporaryDirectory(dir="") as cache_path, open(path, "rb") as f:
+            fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", os.path.basename(path), f.read()
+            )
+            file_item = fileManager.get_file_from_token(token)
+            file_type = get_file_type(file_item.file_path)
+            plugin = dataParser.plugins[file_type]
+            for config in configs:
+                rows = [r for b in plugin.parse(file_item, config, None) for r in b]
+                expected = [rows[0]] + [row for row in rows[1:] if match(row)]
+                filtered = [
+                    r
+                    for b in plugin.parse(
+                        file_item, {**config, "filters": FILTERS}, None
+                    )
+                    for r in b
+                ]
+                assert len(filtered) < len(rows)
+                assert filtered == expected
+                projected = [
+                    r
+                    for b in plugin.parse(
+                        file_item, {**config, "filters": FILTERS}, None, columns={"id"}
+                    )
+                    for r in b
+                ]
+                assert projected == [{"id": row["id"]} for row in expected]
@@ -0,0 +1,38 @@
+import os
+from tempfile import TemporaryDirectory
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.warmup import Warmup
+from app.data_parser.data_cache import dataCache
+from app.data_parser.xlsx import get_paginate_cache_key
+
+TEST_DIR = os.path.dirname(__file__)
+CSV_FILE_PATH = os.path.join(TEST_DIR, "./assets/data.csv")
+
+
+def test_warmup():
+    with TemporaryDirectory(dir="") as cache_path, open(CSV_FILE_PATH, "rb") as f:
+        warmup = Warmup(dataParser, page_size=5)
+        futures = []
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        fileManager.add_save_hook(lambda file: futures.append(warmup.submit(file)))
+        token = fileManager.save_file(
+            "tenant_key", "base_id", "user_id", "data.csv", f.read()
+        )
+        assert len(futures) == 1
+        futures[0].result()
+        dataCache.flush()
+        file_item = fileManager.get_file_from_token(token)
+        # only the first page of the UI is warmed up
+        config = {"page_size": 5, "page_token": 0, "config": None}
+        assert os.path.exists(get_paginate_cache_key(file_item, config, True))
+        page = dataParser.preview(".csv", file_item, config)
+        assert page["page_size"] == 5 and page["has_more"]
+        # the large files are skipped
+        assert (
+            Warmup(dataParser, max_file_size=file_item.size - 1).submit(file_item)
+            is None
+        )
+        # the files saved after the shutdown are skipped
+        warmup.shutdown()
+        assert warmup.submit(file_item) is None
@@ -0,0 +1,85 @@
+import os
+import pytest
+from time import sleep
+from tempfile import TemporaryDirectory
+from app.file import FileManager, fileTokenManager
+from app.data_parser import dataParser
+from app.data_parser.workbook_pool import WorkbookPool, workbookPool
+from app.data_parser.xlsx.read_xlsx import estimate_workbook_memory
+
+
+def test_workbook_pool():
+    pool = WorkbookPool(max_size=100, idle_time=50)
+    opened = []
+    closed = []
+
+    def open_workbook(name: str):
+        opened.append(name)
+        return name, lambda: closed.append(name)
+
+    wb, release = pool.get(("a", "xls"), 60, lambda: open_workbook("a"))
+    # in use, so a private workbook is opened
+    private_wb, close_private = pool.get(("a", "xls"), 60, lambda: open_workbook("a"))
+    close_private()
+    assert opened == ["a", "a"] and closed == ["a"]
+    release()
+    pooled_wb, release = pool.get(("a", "xls"), 60, lambda: open_workbook("a"))
+    release()
+    assert pooled_wb == wb and len(opened) == 2
+    # over the budget, the least recently used is closed
+    _, release = pool.get(("b", "xls"), 60, lambda: open_workbook("b"))
+    release()
+    assert len(pool) == 1 and closed == ["a", "a"]
+    sleep(0.1)
+    pool.sweep()
+    assert len(pool) == 0 and closed == ["a", "a", "b"]
+    # the size is only estimated when the workbook is opened
+    _, close = pool.get(("c", "xlsx"), lambda: 200, lambda: open_workbook("c"))
+    assert len(pool) == 0
+    close()
+    assert closed[-1] == "c"
+
+
+def test_estimate_workbook_memory():
+    assets = os.path.join(os.path.dirname(__file__), "assets")
+    with TemporaryDirectory(dir="") as cache_path:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        with open(os.path.join(assets, "data.xlsx"), "rb") as f:
+            token = fileManager.save_file(
+                "tenant_key", "base_id", "user_id", "data.xlsx", f.read()
+            )
+        file_item = fileManager.get_file_from_token(token)
+        # the full workbook takes many times the compressed file in memory
+        assert estimate_workbook_memory(file_item) > 10 * file_item.size
+        assert (
+            file_item.size
+            < estimate_workbook_memory(file_item, read_only=True)
+            < estimate_workbook_memory(file_item)
+        )
+
+
+def test_release_on_error():
+    assets = os.path.join(os.path.dirname(__file__), "assets")
+    with TemporaryDirectory(dir="") as cache_path:
+        fileManager = FileManager(cache_path, fileTokenManager, user_limit=None)
+        for filename, modes in [("data.xlsx", [False, True]), ("data.xls", [False])]:
+            with open(os.path.join(assets, filename), "rb") as f:
+                token = fileManager.save_file(
+                    "tenant_key", "base_id", "user_id", filename, f.read()
+                )
+            file_item = fileManager.get_file_from_token(token)
+            for performance_mode in modes:
+                config = {
+                    "page_size": 10,
+                    "config": {
+                        "sheet_name": "missing",
+                        "performance_mode": performance_mode,
+                    },
+                }
+                with pytest.raises(Exception):
+                    dataParser.preview(os.path.splitext(filename)[1], file_item, config)
+        # the workbooks opened by the failed previews are given back to the pool
+        assert len(workbookPool) > 0
+        assert not any(h.lock.locked() for h in workbookPool._handles.values())
+        workbookPool.clear()
+        assert len(workbookPool) == 0
@@ -4,6 +4,7 @@ from app.utils import get_file_type
 from app.file import FileManager, FileItem, fileTokenManager
 from app.file.constants import BASE_DIR
 from app.data_parser import dataParser
+from app.data_parser.constants import DEFAULT_BATCH_SIZE
 from app.data_parser.xls import ReadXLSConfig
 from app.data_parser.types import PaginationData, ParsedData
 from app.data_parser.tests.utils import TestCase
@@ -131,6 +132,7 @@ def test_preview():
         xls_file_item = fileManager.get_file_from_token(xls_token)
     for test_case in TEST_CASES:
         run_xls_test_case(xls_file_item, test_case)
-    for row in dataParser.parse(get_file_type(xls_file_item.file_path), xls_file_item):
-        assert isinstance(row, dict)
+    for rows in dataParser.parse(get_file_type(xls_file_item.file_path), xls_file_item):
+        assert 0 < len(rows) <= DEFAULT_BATCH_SIZE
+        assert all(isinstance(row, dict) for row in rows)
     shutil.rmtree(cache_path)
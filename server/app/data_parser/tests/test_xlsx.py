@@ -4,7 +4,9 @@ from tempfile import TemporaryDirectory
 from app.utils import get_file_type
 from app.file import FileManager, FileItem, fileTokenManager
 from app.data_parser import dataParser
+from app.data_parser.constants import DEFAULT_BATCH_SIZE
 from app.data_parser.xlsx import ReadXLSXConfig
+from app.data_parser.xlsx.stream_xlsx import StreamWorkbook, DiskSharedStrings
 from app.data_parser.types import PaginationData, ParsedData
 from app.data_parser.tests.utils import TestCase
 
@@ -123,6 +125,62 @@ TEST_CASES: list[TestCase[ReadXLSXConfig, PaginationData[ParsedData]]] = [
             )
         ],
     },
+    {
+        "description": "Test preview xlsx in performance mode",
+        "config": {
+            "page_size": 200,
+            "page_token": 1,
+            "config": {
+                "sheet_name": DEFAULT_SHEET_NAME,
+                "performance_mode": True,
+            },
+        },
+        "judge": [
+            (
+                lambda data: len(data["data"]["data"]) == 200,
+                "The length of data is not 200.",
+            ),
+            (
+                lambda data: data["data"]["data"][0]["id"] == 200,
+                "The first row of page 1 is wrong.",
+            ),
+        ],
+    },
+    {
+        "description": "Test preview xlsx with efficiently data in performance mode",
+        "config": {
+            "page_size": 200,
+            "page_token": None,
+            "config": {
+                "sheet_name": "Sheet2",
+                "performance_mode": True,
+            },
+        },
+        "judge": [
+            (
+                lambda data: data["data"]["data"][0][0] == 1,
+                "The first row is wrong.",
+            ),
+        ],
+    },
+    {
+        "description": "Test preview xlsx with hyperlinks in performance mode",
+        "config": {
+            "page_size": 200,
+            "page_token": None,
+            "config": {
+                "sheet_name": "Sheet3",
+                "performance_mode": True,
+            },
+        },
+        "judge": [
+            (
+                lambda data: data["data"]["data"][0][8]["type"] == "url"
+                and data["data"]["data"][1][8]["text"] == "www.baidu.com",
+                "The I2 and I3 cells are not urls.",
+            ),
+        ],
+    },
     {
         "description": "Test preview xlsx with images",
         "config": {
@@ -162,10 +220,11 @@ def test_xlsx():
         xlsx_file_item = fileManager.get_file_from_token(xlsx_token)
         for test_case in TEST_CASES:
             run_xlsx_test_case(xlsx_file_item, test_case)
-        for row in dataParser.parse(
+        for rows in dataParser.parse(
             get_file_type(xlsx_file_item.file_path), xlsx_file_item
         ):
-            assert isinstance(row, dict)
+            assert 0 < len(rows) <= DEFAULT_BATCH_SIZE
+            assert all(isinstance(row, dict) for row in rows)
 
 
 def test_xlsm():
@@ -177,10 +236,11 @@ def test_xlsm():
         xlsx_file_item = fileManager.get_file_from_token(xlsx_token)
         for test_case in TEST_CASES:
             run_xlsx_test_case(xlsx_file_item, test_case)
-        for row in dataParser.parse(
+        for rows in dataParser.parse(
             get_file_type(xlsx_file_item.file_path), xlsx_file_item
         ):
-            assert isinstance(row, dict)
+            assert 0 < len(rows) <= DEFAULT_BATCH_SIZE
+            assert all(isinstance(row, dict) for row in rows)
 
 
 def test_xltm():
@@ -193,10 +253,11 @@ def test_xltm():
         xlsx_file_item = fileManager.get_file_from_token(xlsx_token)
         for test_case in TEST_CASES:
             run_xlsx_test_case(xlsx_file_item, test_case)
-        for row in dataParser.parse(
+        for rows in dataParser.parse(
             get_file_type(xlsx_file_item.file_path), xlsx_file_item
         ):
-            assert isinstance(row, dict)
+            assert 0 < len(rows) <= DEFAULT_BATCH_SIZE
+            assert all(isinstance(row, dict) for row in rows)
 
 
 def test_xltx():
@@ -208,7 +269,25 @@ def test_xltx():
         xlsx_file_item = fileManager.get_file_from_token(xlsx_token)
         for test_case in TEST_CASES:
             run_xlsx_test_case(xlsx_file_item, test_case)
-        for row in dataParser.parse(
+        for rows in dataParser.parse(
             get_file_type(xlsx_file_item.file_path), xlsx_file_item
         ):
-            assert isinstance(row, dict)
+            assert 0 < len(rows) <= DEFAULT_BATCH_SIZE
+            assert all(isinstance(row, dict) for row in rows)
+
+
+def test_disk_shared_strings():
+    with TemporaryDirectory(dir="") as cache_path:
+        shared_strings_path = os.path.join(cache_path, "shared_strings")
+        wb = StreamWorkbook(XLSX_FILE_PATH)
+        disk_wb = StreamWorkbook(XLSX_FILE_PATH, shared_strings_path, 0)
+        try:
+            assert isinstance(disk_wb.shared_strings, DiskSharedStrings)
+            assert list(disk_wb.shared_strings) == list(wb.shared_strings)
+            for sheet_name in wb.sheetnames:
+                assert list(disk_wb[sheet_name].iter_rows()) == list(
+                    wb[sheet_name].iter_rows()
+                )
+        finally:
+            wb.close()
+            disk_wb.close()
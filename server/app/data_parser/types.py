@@ -53,7 +53,26 @@ class FileValue(TypedDict):
 
 
 type CanPaginationData[D] = PaginationData[D] | D
-type BasicValueType = str | int | float | bool | None | UrlValue | list[FileValue] | datetime
+type BasicValueType = str | int | float | bool | None | UrlValue | list[
+    FileValue
+] | datetime
+
+
+class RowFilterConfig(TypedDict):
+    """Row filter on the raw values of a column"""
+
+    field: Required[str]
+    """Field name in the header"""
+    op: Required[Literal["eq", "in", "range", "not_empty"]]
+    """Operator"""
+    value: Optional[Any]
+    """Value of `eq`"""
+    values: Optional[list[Any]]
+    """Values of `in`"""
+    min: Optional[Any]
+    """Inclusive min value of `range`"""
+    max: Optional[Any]
+    """Inclusive max value of `range`"""
 
 
 class DataMeta(TypedDict):
@@ -62,7 +81,7 @@ class DataMeta(TypedDict):
     fields: list[str]
     """Fields"""
     total: int
-    """Total count""" 
+    """Total count"""
     can_parse: bool
     """Can parse"""
     errors: list[str]
@@ -90,4 +109,82 @@ class DataRange(TypedDict):
     min_col: Required[int]
     """Min column"""
     max_col: Required[int]
-    """Max column"""
\ No newline at end of file
+    """Max column"""
+
+
+class SheetMeta(TypedDict):
+    """Sheet metadata"""
+
+    name: str
+    """Sheet name"""
+    data_range: DataRange
+    """Range of the cells with data, start from 1"""
+    rows: int
+    """Row count"""
+    cols: int
+    """Column count"""
+    head: list[list[BasicValueType]]
+    """The first rows"""
+    header_candidates: list[int]
+    """Header row indexes in the data range which can be used as `header`, start from 1"""
+
+
+class DataSourceMeta(TypedDict):
+    """Data source metadata"""
+
+    sheets: list[SheetMeta]
+    """Sheets"""
+
+
+type ValueType = Literal[
+    "empty", "string", "number", "boolean", "datetime", "url", "file"
+]
+
+
+class ColumnProfile(TypedDict):
+    """Column statistics"""
+
+    name: str
+    """Field name"""
+    type: ValueType
+    """Most common type of the non-empty values, `empty` if all values are empty"""
+    types: dict[ValueType, int]
+    """Count of the values of each type"""
+    count: int
+    """Value count"""
+    nulls: int
+    """Count of the empty values"""
+    null_ratio: float
+    """Ratio of the empty values"""
+    distinct: int
+    """Approximate count of the distinct non-empty values"""
+    samples: list[BasicValueType]
+    """Sample of the non-empty values"""
+
+
+class DataProfile(TypedDict):
+    """Data statistics"""
+
+    fields: list[str]
+    """Fields"""
+    total: int
+    """Row count"""
+    columns: list[ColumnProfile]
+    """Column statistics in the order of the fields"""
+
+
+class SheetBatch[D](TypedDict):
+    """Batch of the rows of a sheet parsed by `DataParser.parse_sheets`"""
+
+    sheet_name: str
+    """Sheet name"""
+    data: D
+    """Rows of the batch"""
+    rows: int
+    """Number of the rows of the sheet yielded with this batch"""
+    parsed: int
+    """Number of the rows of the sheet parsed"""
+    total: int | None
+    """Number of the rows of the sheet, None while it is parsed"""
+    done: bool
+    """If it is the last batch of the sheet"""
@@ -1,11 +1,9 @@
-import os
-import orjson
-import asyncio
 import functools
-from typing import Callable
-from app.file import create_file, async_create_file
-from .types import BasicValueType
-
+import itertools
+from typing import Callable, Iterable, Generator
+from .types import BasicValueType, SheetMeta
+from .exceptions import InvalidConfigValue
+from .data_cache import dataCache
 
 CACHE_DIR = "preview"
 
@@ -13,7 +11,7 @@ CACHE_DIR = "preview"
 def data_cache[C: dict, F: Callable](
     get_cache_key: Callable[[C], str],
 ):
-    """Decorator for cache preview data"""
+    """Decorator for cache preview data, the results are kept in `dataCache`"""
 
     def decorator(
         func: F,
@@ -21,19 +19,9 @@ def data_cache[C: dict, F: Callable](
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             """Wrapper for cache preview data"""
-            key = get_cache_key(*args, **kwargs)
-            # cache_path = os.path.join(f.dir_path, "cache", cache_dir, f"{key}.json")
-            if not os.path.exists(key):
-                data = func(*args, **kwargs)
-                # create_file(key, orjson.dumps(data), "wb")
-                asyncio.run(async_create_file(
-                    key,
-                    orjson.dumps(data),
-                    "wb",
-                ))
-                return data
-            with open(key, "rb") as file:
-                return orjson.loads(file.read())
+            return dataCache.load(
+                get_cache_key(*args, **kwargs), lambda: func(*args, **kwargs)
+            )
 
         return wrapper
 
@@ -43,3 +31,79 @@ def data_cache[C: dict, F: Callable](
 def parse_data_to_dict(data: list[list[BasicValueType]], fields: list[str]):
     """Parse the data"""
     return [dict(zip(fields, row)) for row in data]
+
+
+def batch_rows[T](rows: Iterable[T], batch_size: int) -> Generator[list[T], None, None]:
+    """Group the rows into lists of `batch_size` rows, the last one may be shorter"""
+    for batch in itertools.batched(rows, batch_size):
+        yield list(batch)
+
+
+def get_projection(
+    header: list[str], columns: Iterable[str] | None
+) -> list[int] | None:
+    """Get the indexes of the header in `columns`, None if all columns are needed"""
+    if columns is None:
+        return None
+    columns = set(columns)
+    return [i for i, h in enumerate(header) if h in columns]
+
+
+def get_page_range(
+    page_token: int, page_size: int | None, total: int
+) -> tuple[int, int]:
+    """Get the rows [start, stop) of the page, the row 0 is the header row
+
+    The pages are sliced like the sheet previews: the first page starts after
+    the header row, the others start at `page_token * page_size`.
+
+    Args:
+        total (int): number of the rows, the header row included
+    """
+    start = (page_token * page_size if not page_size is None else 0) + (
+        1 if page_token == 0 else 0
+    )
+    stop = total if page_size is None else min(total, start + page_size)
+    if start >= stop:
+        raise InvalidConfigValue("Page token is out of range.")
+    return start, stop
+
+
+def get_sheet_meta(
+    name: str,
+    data_range: tuple[int, int, int, int],
+    head: list[list[BasicValueType]],
+) -> SheetMeta:
+    """Get the sheet metadata from the data range (start from 1) and the first rows
+
+    The empty columns at the end of the head rows are dropped.
+    """
+    min_col, min_row, max_col, max_row = data_range
+    width = max(
+        (
+            i + 1
+            for row in head
+            for i, cell in enumerate(row)
+            if not cell is None and cell != ""
+        ),
+        default=0,
+    )
+    head = [row[:width] for row in head]
+    return {
+        "name": name,
+        "data_range": {
+            "min_row": min_row,
+            "max_row": max_row,
+            "min_col": min_col,
+            "max_col": max_col,
+        },
+        "rows": max(max_row - min_row + 1, 0),
+        "cols": max(max_col - min_col + 1, 0),
+        "head": head,
+        "header_candidates": [
+            i + 1
+            for i, row in enumerate(head)
+            if row
+            and all(isinstance(cell, (str, int, float)) and cell != "" for cell in row)
+        ],
+    }
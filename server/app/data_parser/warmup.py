@@ -0,0 +1,92 @@
+"""Warm-up of the uploaded files
+
+Once a file is saved, its metadata and the first preview page of the default
+config are computed in the background, so the first preview request of the
+file is served from the `data_cache`. The page has the size requested by the
+UI, not the whole sheet, and the files larger than `max_file_size` are skipped
+as loading a whole workbook takes many times its size in memory.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from app.file import FileItem
+from app.log import logger
+from app.utils import get_file_type
+from .core import DataParser
+from .constants import (
+    WARMUP_WORKERS,
+    WARMUP_MAX_PENDING,
+    WARMUP_PAGE_SIZE,
+    WARMUP_MAX_FILE_SIZE,
+)
+from .xlsx import DEFAULT_PAGINATE_CONFIG
+
+
+class Warmup:
+    def __init__(
+        self,
+        parser: DataParser,
+        workers: int = WARMUP_WORKERS,
+        max_pending: int = WARMUP_MAX_PENDING,
+        page_size: int = WARMUP_PAGE_SIZE,
+        max_file_size: int = WARMUP_MAX_FILE_SIZE,
+    ):
+        """
+        Args:
+            parser (DataParser): the parser computing the metadata and the preview
+            workers (int, optional): number of the warm-up threads. Defaults to WARMUP_WORKERS.
+            max_pending (int, optional): max number of the files waiting. Defaults to WARMUP_MAX_PENDING.
+            page_size (int, optional): page size of the first preview page. Defaults to WARMUP_PAGE_SIZE.
+            max_file_size (int, optional): max size of the files warmed up. Defaults to WARMUP_MAX_FILE_SIZE.
+        """
+        self.parser = parser
+        self.max_pending = max_pending
+        self.page_size = page_size
+        self.max_file_size = max_file_size
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="data-warmup"
+        )
+
+    @property
+    def paginate_config(self):
+        """Config of the first preview page"""
+        return {**DEFAULT_PAGINATE_CONFIG, "page_size": self.page_size}
+
+    def warm(self, file: FileItem):
+        """Cache the metadata and the first preview page of the default config"""
+        type = get_file_type(file.file_path)
+        if not type in self.parser.support_types:
+            return
+        self.parser.metadata(type, file)
+        if not self._closed:
+            self.parser.preview(type, file, self.paginate_config)
+
+    def _run(self, file: FileItem):
+        try:
+            self.warm(file)
+        except Exception as e:
+            # no new thread can be started by the warm-up running at exit
+            if not self._closed:
+                logger.error(f"Error when warm up {file.token}: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def submit(self, file: FileItem) -> Future | None:
+        """Schedule the warm-up of the file, None if it is too large or too many files are waiting"""
+        if file.size > self.max_file_size:
+            return None
+        with self._lock:
+            if self._closed or self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+            return self._executor.submit(self._run, file)
+
+    def shutdown(self, wait: bool = True):
+        """Cancel the files waiting and skip the later ones, wait for the running one if `wait`"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,148 @@
+"""Pool of open workbooks
+
+Opening a workbook unzips and parses the whole package, so the workbooks are
+kept open between the preview pages of a file. The pool is keyed by the file
+md5 and the read mode, bounded by the estimated memory of the open workbooks
+and closes the least recently used and the idle workbooks.
+"""
+
+import os
+import threading
+from time import time, sleep
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+from .constants import WORKBOOK_POOL_MAX_SIZE, WORKBOOK_POOL_IDLE_TIME
+
+
+@dataclass
+class _Handle:
+    workbook: Any
+    close: Callable[[], None]
+    size: int
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    last_used: float = field(default_factory=time)
+
+
+class WorkbookPool:
+    def __init__(
+        self,
+        max_size: int = WORKBOOK_POOL_MAX_SIZE,
+        idle_time: int = WORKBOOK_POOL_IDLE_TIME,
+    ):
+        """
+        Args:
+            max_size (int, optional): max total estimated memory of the workbooks in bytes. Defaults to WORKBOOK_POOL_MAX_SIZE.
+            idle_time (int, optional): time in ms to close an unused workbook. Defaults to WORKBOOK_POOL_IDLE_TIME.
+        """
+        self.max_size = max_size
+        self.idle_time = idle_time
+        self._lock = threading.Lock()
+        self._handles: OrderedDict[tuple[str, str], _Handle] = OrderedDict()
+        self._used = 0
+        self._sweeper: threading.Thread | None = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """Forget the workbooks of the parent in the forked process, they may be in use by its threads"""
+        self._lock = threading.Lock()
+        self._handles = OrderedDict()
+        self._used = 0
+        self._sweeper = None
+
+    def __len__(self):
+        return len(self._handles)
+
+    def _release(self, handle: _Handle) -> Callable[[], None]:
+        """Get the function to give the workbook back to the pool, only the first call counts"""
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            handle.last_used = time()
+            handle.lock.release()
+
+        return release
+
+    def _close(self, key: tuple[str, str]):
+        handle = self._handles.pop(key)
+        self._used -= handle.size
+        handle.close()
+
+    def _close_unused(self, should_close: Callable[[_Handle], bool]):
+        """Close the unused workbooks matched, from the least recently used"""
+        for key, handle in list(self._handles.items()):
+            if not should_close(handle) or not handle.lock.acquire(blocking=False):
+                continue
+            try:
+                self._close(key)
+            finally:
+                handle.lock.release()
+
+    def sweep(self):
+        """Close the idle workbooks"""
+        with self._lock:
+            self._close_unused(
+                lambda handle: (time() - handle.last_used) * 1000 >= self.idle_time
+            )
+
+    def _run_sweeper(self):
+        while True:
+            sleep(self.idle_time / 1000)
+            self.sweep()
+
+    def _start_sweeper(self):
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(
+                target=self._run_sweeper, name="workbook-pool-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def get[W](
+        self,
+        key: tuple[str, str],
+        size: int | Callable[[], int],
+        open_workbook: Callable[[], tuple[W, Callable[[], None]]],
+    ) -> tuple[W, Callable[[], None]]:
+        """Get the workbook and the function to release it
+
+        The workbook is only used by one caller at a time. If the pooled one
+        is in use, or the workbook is larger than the pool, a private workbook
+        is opened and closed on release.
+
+        Args:
+            key (tuple[str, str]): file md5 and read mode
+            size (int | Callable[[], int]): estimated memory of the workbook in bytes, or the function to estimate it, only called when the workbook is opened
+            open_workbook (Callable[[], tuple[W, Callable[[], None]]]): function to open the workbook
+        """
+        with self._lock:
+            self._start_sweeper()
+            handle = self._handles.get(key)
+            if not handle is None and handle.lock.acquire(blocking=False):
+                self._handles.move_to_end(key)
+                return handle.workbook, self._release(handle)
+        wb, close = open_workbook()
+        if callable(size):
+            size = size()
+        if size > self.max_size:
+            return wb, close
+        with self._lock:
+            if key in self._handles:
+                return wb, close
+            handle = _Handle(wb, close, size)
+            handle.lock.acquire()
+            self._handles[key] = handle
+            self._used += size
+            self._close_unused(lambda _: self._used > self.max_size)
+            return wb, self._release(handle)
+
+    def clear(self):
+        """Close all the unused workbooks"""
+        with self._lock:
+            self._close_unused(lambda _: True)
+
+
+workbookPool = WorkbookPool()
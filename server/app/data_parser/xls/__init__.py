@@ -1,5 +1,8 @@
 from app.file import FileItem
 from app.data_parser.core import DataParsePlugin
+from app.data_parser.columnar import batch_columns
+from app.data_parser.constants import DEFAULT_BATCH_SIZE
+from app.data_parser.utils import batch_rows
 from .types import ReadXLSConfig
 from .read_xls import *
 from .constants import SUPPORTED_TYPES
@@ -9,8 +12,21 @@ class XLSParser(DataParsePlugin[FileItem, ReadXLSConfig]):
     type = SUPPORTED_TYPES
     name = "XLS Parser"
 
-    def parse(self, data, config, context):
-        return iter_row_xls(data, config)
+    def parse(
+        self,
+        data,
+        config,
+        context,
+        batch_size=DEFAULT_BATCH_SIZE,
+        columnar=False,
+        columns=None,
+    ):
+        if columnar:
+            return batch_columns(iter_values_xls(data, config, columns), batch_size)
+        return batch_rows(iter_row_xls(data, config, columns), batch_size)
 
     def preview(self, data, config):
         return paginate_load_xls(data, config, parse_data=True)
+
+    def metadata(self, data):
+        return load_metadata_xls(data)
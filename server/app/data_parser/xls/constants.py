@@ -1 +1,3 @@
 SUPPORTED_TYPES = {".xls"}
+# Bytes of memory of the xlrd workbook per byte of the file, the sheets are loaded on demand
+WORKBOOK_MEMORY_FACTOR = 3
@@ -1,25 +1,38 @@
-from typing import Callable
-from xlrd import open_workbook, Book, xldate_as_datetime
-from xlrd.sheet import Sheet
+from typing import Callable, DefaultDict, Generator, Iterable
+from collections import defaultdict
+from xlrd import open_workbook, Book, xldate_as_datetime, XL_CELL_TEXT, XL_CELL_NUMBER
+from xlrd.sheet import Sheet, Hyperlink
 from app.file import FileItem
 from app.utils import datetime_to_timestamp_ms
 from .types import ReadXLSConfig
+from .constants import WORKBOOK_MEMORY_FACTOR
 from ..xlsx import (
     get_paginate_cache_key,
     DEFAULT_PAGINATE_CONFIG,
     DEFAULT_PAGE_TOKEN,
     validate_read_config,
     validate_header,
+    get_metadata_cache_key,
 )
-from ..types import CanPaginationData, ParsedData, PaginationConfig, BasicValueType
+from ..types import (
+    CanPaginationData,
+    ParsedData,
+    PaginationConfig,
+    BasicValueType,
+    DataSourceMeta,
+    SheetMeta,
+)
+from ..constants import METADATA_HEAD_ROWS
 from ..exceptions import InvalidConfigValue
-from ..utils import data_cache, parse_data_to_dict
+from ..utils import data_cache, parse_data_to_dict, get_projection, get_sheet_meta
+from ..workbook_pool import workbookPool
+from ..row_filter import RowFilter, get_row_filter
 
 
-def get_workbook(
+def open_xls_workbook(
     file: FileItem,
 ) -> tuple[Book, Callable[[], None]]:
-    """Get the workbook object from the file
+    """Open the workbook object from the file
 
     Args:
         file (FileItem): file
@@ -36,21 +49,25 @@ def get_workbook(
     return wb, wb.release_resources
 
 
-def _parse_cell(
-    ws: Sheet,
-    rowx: int,
-    colx: int,
-) -> BasicValueType:
-    hyperlink = ws.hyperlink_map.get((rowx, colx))
-    value = ws.cell_value(rowx, colx)
-    if not hyperlink is None:
-        link = hyperlink.url_or_path
-        return {
-            "type": "url",
-            "value": str(value),
-            "link": str(link),
-        }
-    cell_type = ws.cell_type(rowx, colx)
+def get_workbook(
+    file: FileItem,
+) -> tuple[Book, Callable[[], None]]:
+    """Get the workbook object of the file from the pool
+
+    Args:
+        file (FileItem): file
+
+    Returns:
+        (Workbook, Callable[[], None]): workbook object and release function
+    """
+    return workbookPool.get(
+        (file.md5, "xls"),
+        WORKBOOK_MEMORY_FACTOR * file.size,
+        lambda: open_xls_workbook(file),
+    )
+
+
+def _parse_value(cell_type: int, value) -> BasicValueType:
     match cell_type:
         case 1:
             return str(value)
@@ -64,59 +81,167 @@ def _parse_cell(
             return None
 
 
+def _parse_hyperlink(hyperlink: Hyperlink, value) -> BasicValueType:
+    return {
+        "type": "url",
+        "value": str(value),
+        "link": str(hyperlink.url_or_path),
+    }
+
+
+def _parse_cell(
+    ws: Sheet,
+    rowx: int,
+    colx: int,
+) -> BasicValueType:
+    hyperlink = ws.hyperlink_map.get((rowx, colx))
+    value = ws.cell_value(rowx, colx)
+    if not hyperlink is None:
+        return _parse_hyperlink(hyperlink, value)
+    return _parse_value(ws.cell_type(rowx, colx), value)
+
+
+def get_hyperlink_rows(ws: Sheet) -> DefaultDict[int, dict[int, Hyperlink]]:
+    """Group the hyperlinks of the sheet by row and column index"""
+    rows: DefaultDict[int, dict[int, Hyperlink]] = defaultdict(dict)
+    for (rowx, colx), hyperlink in ws.hyperlink_map.items():
+        rows[rowx][colx] = hyperlink
+    return rows
+
+
+def iter_parsed_rows(
+    ws: Sheet,
+    min_row: int,
+    max_row: int,
+    min_col: int,
+    max_col: int,
+    cols: list[int] | None = None,
+    row_filter: RowFilter | None = None,
+) -> Generator[list[BasicValueType], None, None]:
+    """Parse the rows in [min_row, max_row] and [min_col, max_col], start from 0
+
+    The values and types of a row are read as whole slices, the text and
+    number cells are kept as they are and only the other cells are converted.
+    The hyperlinks are only looked up for the rows which have them. If `cols`
+    is set, only the cells of these column indexes are returned in the order.
+    The rows after `min_row` not matching `row_filter` are skipped before the
+    cells are converted, its column indexes start from `min_col`.
+    """
+    links = get_hyperlink_rows(ws)
+    for rowx in range(min_row, max_row + 1):
+        types = ws.row_types(rowx, min_col, max_col + 1)
+        values = ws.row_values(rowx, min_col, max_col + 1)
+        if (
+            rowx > min_row
+            and not row_filter is None
+            and not row_filter.match(
+                lambda i: _parse_value(types[i], values[i]) if i < len(values) else None
+            )
+        ):
+            continue
+        if not cols is None:
+            types = [types[colx - min_col] for colx in cols]
+            values = [values[colx - min_col] for colx in cols]
+        row = [
+            v if t == XL_CELL_TEXT or t == XL_CELL_NUMBER else _parse_value(t, v)
+            for t, v in zip(types, values)
+        ]
+        if rowx in links:
+            row_links = links[rowx]
+            for i, colx in enumerate(
+                range(min_col, max_col + 1) if cols is None else cols
+            ):
+                if colx in row_links:
+                    row[i] = _parse_hyperlink(row_links[colx], values[i])
+        yield row
+
+
 def get_default_data_range(
     ws: Sheet,
 ):
+    """Get the 0-based (min_col, min_row, max_col, max_row) of the cells with data
+
+    The first non-empty cell of every row is found in one sweep over the row
+    types, stopped early once the first column has data.
+    """
     max_row = ws.nrows - 1
-    min_row = 0
-    min_col = 0
     max_col = ws.ncols - 1
-    # find the first and last row that has data use one loop
+    min_row = None
+    min_col = max_col + 1
     for i in range(max_row + 1):
-        if any([c != 0 for c in ws.row_types(i)]):
+        types = ws.row_types(i).tobytes()
+        first = len(types) - len(types.lstrip(b"\x00"))
+        if first == len(types):
+            continue
+        if min_row is None:
             min_row = i
+        min_col = min(min_col, first)
+        if min_col == 0:
             break
-    for i in range(max_col + 1):
-        if any([c != 0 for c in ws.col_types(i)]):
-            min_col = i
-            break
+    if min_row is None:
+        return (0, 0, max_col, max_row)
     return (min_col, min_row, max_col, max_row)
 
 
-def iter_row_xls(
+def iter_values_xls(
     file: FileItem,
     config: ReadXLSConfig | None = None,
+    columns: Iterable[str] | None = None,
 ):
-    """Get the row iterator"""
+    """Get the (header, row values) iterator, the header list is shared by all rows
+
+    If `columns` is set, only the cells of the header in it are parsed.
+    """
     sheet_name, data_range, header_index, _ = validate_read_config(config)
 
     wb, close = get_workbook(file)
-    if sheet_name is None:
-        sheet_name = wb.sheet_names()[0]
-    ws = wb.sheet_by_name(sheet_name)
-    _min_col, _min_row, _max_col, _max_row = get_default_data_range(ws)
-    _min_row = max(data_range[1] - 1 if not data_range[1] is None else 0, _min_row)
-    _min_col = max(data_range[0] - 1 if not data_range[0] is None else 0, _min_col)
-    _max_row = min(
-        data_range[3] - 1 if not data_range[3] is None else _max_row, _max_row
-    )
-    _max_col = min(
-        data_range[2] - 1 if not data_range[2] is None else _max_col, _max_col
-    )
+    try:
+        if sheet_name is None:
+            sheet_name = wb.sheet_names()[0]
+        ws = wb.sheet_by_name(sheet_name)
+        _min_col, _min_row, _max_col, _max_row = get_default_data_range(ws)
+        _min_row = max(data_range[1] - 1 if not data_range[1] is None else 0, _min_row)
+        _min_col = max(data_range[0] - 1 if not data_range[0] is None else 0, _min_col)
+        _max_row = min(
+            data_range[3] - 1 if not data_range[3] is None else _max_row, _max_row
+        )
+        _max_col = min(
+            data_range[2] - 1 if not data_range[2] is None else _max_col, _max_col
+        )
 
-    header = ws.row_values(
-        header_index + _min_row - 1, start_colx=_min_col, end_colx=_max_col
-    )
-    validate_header(header)
-    header = [str(cell) for cell in header]
-    for rowx in range(_min_row + header_index - 1, _max_row + 1):
-        yield dict(
-            zip(
-                header,
-                [_parse_cell(ws, rowx, colx) for colx in range(_min_col, _max_col + 1)],
-            )
+        header = ws.row_values(
+            header_index + _min_row - 1, start_colx=_min_col, end_colx=_max_col + 1
         )
-    close()
+        validate_header(header)
+        header = [str(cell) for cell in header]
+        row_filter = get_row_filter(header, (config or {}).get("filters"))
+        projection = get_projection(header, columns)
+        cols = None
+        if not projection is None:
+            header = [header[i] for i in projection]
+            cols = [_min_col + i for i in projection]
+        for row in iter_parsed_rows(
+            ws,
+            _min_row + header_index - 1,
+            _max_row,
+            _min_col,
+            _max_col,
+            cols,
+            row_filter,
+        ):
+            yield header, row
+    finally:
+        close()
+
+
+def iter_row_xls(
+    file: FileItem,
+    config: ReadXLSConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the row iterator"""
+    for header, values in iter_values_xls(file, config, columns):
+        yield dict(zip(header, values))
 
 
 @data_cache(get_cache_key=get_paginate_cache_key)
@@ -141,42 +266,39 @@ def paginate_load_xls(
     sheet_name, data_range, header_index, _ = validate_read_config(_config)
 
     wb, close = get_workbook(data)
-    sheet_names = wb.sheet_names()
-    if sheet_name is None:
-        sheet_name = sheet_names[0]
-    ws = wb.sheet_by_name(sheet_name)
-    _min_col, _min_row, _max_col, _max_row = get_default_data_range(ws)
-    _min_row = max(data_range[1] - 1 if not data_range[1] is None else 0, _min_row)
-    _min_col = max(data_range[0] - 1 if not data_range[0] is None else 0, _min_col)
-    _max_row = min(
-        data_range[3] - 1 if not data_range[3] is None else _max_row, _max_row
-    )
-    _max_col = min(
-        data_range[2] - 1 if not data_range[2] is None else _max_col, _max_col
-    )
-    has_more = True
-    min_row = (
-        header_index
-        + _min_row
-        - 1
-        + (page_token * page_size if not page_size is None else 0)
-        + (1 if page_token == 0 else 0)
-    )
-    max_row = _max_row if page_size is None else min(_max_row, min_row + page_size - 1)
-    if min_row > max_row:
+    try:
+        sheet_names = wb.sheet_names()
+        if sheet_name is None:
+            sheet_name = sheet_names[0]
+        ws = wb.sheet_by_name(sheet_name)
+        _min_col, _min_row, _max_col, _max_row = get_default_data_range(ws)
+        _min_row = max(data_range[1] - 1 if not data_range[1] is None else 0, _min_row)
+        _min_col = max(data_range[0] - 1 if not data_range[0] is None else 0, _min_col)
+        _max_row = min(
+            data_range[3] - 1 if not data_range[3] is None else _max_row, _max_row
+        )
+        _max_col = min(
+            data_range[2] - 1 if not data_range[2] is None else _max_col, _max_col
+        )
+        has_more = True
+        min_row = (
+            header_index
+            + _min_row
+            - 1
+            + (page_token * page_size if not page_size is None else 0)
+            + (1 if page_token == 0 else 0)
+        )
+        max_row = (
+            _max_row if page_size is None else min(_max_row, min_row + page_size - 1)
+        )
+        if min_row > max_row:
+            raise InvalidConfigValue(f"Page token is out of range.")
+        has_more = max_row < _max_row
+        header_row = header_index + _min_row - 1
+        header = next(iter_parsed_rows(ws, header_row, header_row, _min_col, _max_col))
+        _data = list(iter_parsed_rows(ws, min_row, max_row, _min_col, _max_col))
+    finally:
         close()
-        raise InvalidConfigValue(f"Page token is out of range.")
-    has_more = max_row < _max_row
-    header = [
-        _parse_cell(ws, header_index + _min_row - 1, colx)
-        for colx in range(_min_col, _max_col + 1)
-    ]
-    _data = [
-        [_parse_cell(ws, rowx, colx) for colx in range(_min_col, _max_col + 1)]
-        for rowx in range(min_row, max_row + 1)
-    ]
-
-    close()
     errors = []
     can_parse = True
     try:
@@ -224,3 +346,34 @@ def paginate_load_xls(
         "has_more": has_more,
     }
     return res
+
+
+@data_cache(get_cache_key=get_metadata_cache_key)
+def load_metadata_xls(file: FileItem) -> DataSourceMeta:
+    """Get the sheet names, dimensions and first rows, one sheet loaded at a time"""
+    wb, close = get_workbook(file)
+    try:
+        sheets: list[SheetMeta] = []
+        for sheet_name in wb.sheet_names():
+            ws = wb.sheet_by_name(sheet_name)
+            min_col, min_row, max_col, max_row = get_default_data_range(ws)
+            head = list(
+                iter_parsed_rows(
+                    ws,
+                    min_row,
+                    min(max_row, min_row + METADATA_HEAD_ROWS - 1),
+                    min_col,
+                    max_col,
+                )
+            )
+            wb.unload_sheet(sheet_name)
+            sheets.append(
+                get_sheet_meta(
+                    sheet_name,
+                    (min_col + 1, min_row + 1, max_col + 1, max_row + 1),
+                    head,
+                )
+            )
+        return {"sheets": sheets}
+    finally:
+        close()
@@ -3,14 +3,30 @@ from .read_xlsx import *
 from .constants import SUPPORTED_TYPES
 from .types import ReadXLSXConfig
 from ..core import DataParsePlugin
+from ..columnar import batch_columns
+from ..constants import DEFAULT_BATCH_SIZE
+from ..utils import batch_rows
 
 
 class XLSXParser(DataParsePlugin[FileItem, ReadXLSXConfig]):
     type = SUPPORTED_TYPES
     name = "XLSX Parser"
 
-    def parse(self, data, config, context):
-        return iter_row_xlsx(data, config)
+    def parse(
+        self,
+        data,
+        config,
+        context,
+        batch_size=DEFAULT_BATCH_SIZE,
+        columnar=False,
+        columns=None,
+    ):
+        if columnar:
+            return batch_columns(iter_values_xlsx(data, config, columns), batch_size)
+        return batch_rows(iter_row_xlsx(data, config, columns), batch_size)
 
     def preview(self, data, config):
         return paginate_load_xlsx(data, config, parse_data=True)
+
+    def metadata(self, data):
+        return load_metadata_xlsx(data)
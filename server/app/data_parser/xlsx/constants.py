@@ -5,3 +5,9 @@ DEFAULT_PAGE_SIZE = None
 DEFAULT_PAGE_TOKEN = 0
 DEFAULT_DATA_RANGE = (None, None, None, None)
 DEFAULT_PERFORMANCE_MODE = False
+# Image formats written as the original bytes, the others are converted to PNG
+PASSTHROUGH_IMAGE_FORMATS = {"png", "jpeg", "gif"}
+# Bytes of memory of a full openpyxl workbook per byte of its uncompressed parts
+WORKBOOK_MEMORY_FACTOR = 8
+# Bytes of memory of the read-only workbook per byte of the shared strings XML
+READ_ONLY_SHARED_STRINGS_FACTOR = 2
@@ -1,36 +1,49 @@
 """Excel parse plugin"""
 
 import os
-import itertools
-from io import FileIO
-from typing import DefaultDict
+import orjson
+import zipfile
+from io import FileIO, BytesIO
+from typing import DefaultDict, Iterable
 from collections import defaultdict
 from datetime import datetime, time, timedelta, date
 from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 from openpyxl import load_workbook, Workbook
-from openpyxl.utils import get_column_letter, range_boundaries
+from openpyxl.utils import get_column_letter, range_boundaries, coordinate_to_tuple
 from openpyxl.cell import Cell, ReadOnlyCell
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.drawing.image import Image as SheetImage
-from app.file import FileItem, get_md5_from_bytes
+from app.file import FileItem, create_file, get_md5_from_bytes
 from .constants import (
     DEFAULT_SHEET_NAME,
     DEFAULT_HEADER,
     DEFAULT_PAGE_TOKEN,
     DEFAULT_DATA_RANGE,
     DEFAULT_PERFORMANCE_MODE,
+    PASSTHROUGH_IMAGE_FORMATS,
+    WORKBOOK_MEMORY_FACTOR,
+    READ_ONLY_SHARED_STRINGS_FACTOR,
 )
 from .types import ReadXLSXConfig, DataRange
+from .stream_xlsx import StreamWorkbook, StreamWorksheet
 from ..types import (
     PaginationConfig,
     CanPaginationData,
     BasicValueType,
     FileValue,
+    UrlValue,
     ParsedData,
+    DataSourceMeta,
+    SheetMeta,
+    RowFilterConfig,
 )
+from ..constants import METADATA_HEAD_ROWS
 from ..exceptions import InvalidConfigValue, InvalidHeader
-from ..utils import data_cache, parse_data_to_dict
+from ..utils import data_cache, parse_data_to_dict, get_projection, get_sheet_meta
+from ..data_cache import dataCache
+from ..workbook_pool import workbookPool
+from ..row_filter import get_row_filter
 
 
 def parse_cell(cell: Cell | ReadOnlyCell) -> BasicValueType:
@@ -38,12 +51,21 @@ def parse_cell(cell: Cell | ReadOnlyCell) -> BasicValueType:
     if not isinstance(cell, ReadOnlyCell):
         link = cell.hyperlink
         if link is not None:
-            return {
-                "url": str(link.target),
-                "text": str(link.display),
-                "type": "url",
-            }
-    value = cell.value
+            return parse_hyperlink(link.target, link.display)
+    return parse_value(cell.value)
+
+
+def parse_hyperlink(target: str | None, display: str | None) -> UrlValue:
+    """Parse the hyperlink of the cell"""
+    return {
+        "url": str(target),
+        "text": str(display),
+        "type": "url",
+    }
+
+
+def parse_value(value) -> BasicValueType:
+    """Parse the raw value of the cell"""
     if value is None or isinstance(value, (str, int, float, bool)):
         return value
     if isinstance(value, time):
@@ -116,11 +138,11 @@ def close_wb_file(wb: Workbook, f: FileIO):
     return close
 
 
-def get_workbook(
+def open_workbook(
     file: FileItem,
     read_only: bool = False,
 ):
-    """Get the workbook object from the file
+    """Open the workbook object from the file
 
     Args:
         file (FileItem): file
@@ -140,6 +162,68 @@ def get_workbook(
     return (wb, close_wb_file(wb, f))
 
 
+def estimate_workbook_memory(file: FileItem, read_only: bool = False) -> int:
+    """Estimate the memory of the openpyxl workbook from the uncompressed size of its parts
+
+    The full workbook keeps an object for every cell, the read-only one only
+    keeps the shared strings and reads the sheets from the file.
+
+    Args:
+        file (FileItem): file
+        read_only (bool, optional): if the workbook is read-only. Defaults to False.
+
+    Returns:
+        int: estimated memory in bytes
+    """
+    with zipfile.ZipFile(file.file_path) as archive:
+        parts = archive.infolist()
+    if read_only:
+        return file.size + READ_ONLY_SHARED_STRINGS_FACTOR * sum(
+            part.file_size for part in parts if part.filename == "xl/sharedStrings.xml"
+        )
+    return WORKBOOK_MEMORY_FACTOR * sum(part.file_size for part in parts)
+
+
+def get_workbook(
+    file: FileItem,
+    read_only: bool = False,
+):
+    """Get the workbook object of the file from the pool
+
+    Args:
+        file (FileItem): file
+
+    Returns:
+        (Workbook, Callable[[], None]): workbook object and release function
+    """
+    return workbookPool.get(
+        (file.md5, "read_only" if read_only else "workbook"),
+        lambda: estimate_workbook_memory(file, read_only),
+        lambda: open_workbook(file, read_only),
+    )
+
+
+def get_stream_workbook(file: FileItem):
+    """Get the streaming workbook object of the file from the pool, used in performance mode
+
+    Args:
+        file (FileItem): file
+
+    Returns:
+        (StreamWorkbook, Callable[[], None]): workbook object and release function
+    """
+
+    def open_stream_workbook():
+        wb = StreamWorkbook(
+            file.file_path,
+            shared_strings_path=os.path.join(file.dir_path, "cache", "shared_strings"),
+        )
+        return (wb, wb.close)
+
+    # the shared strings are kept on disk, only the file is read
+    return workbookPool.get((file.md5, "stream"), file.size, open_stream_workbook)
+
+
 def validate_header(data: list[BasicValueType]):
     """Check if the file can be parsed"""
     header_checker = [isinstance(cell, (str, int, float)) for cell in data]
@@ -150,32 +234,75 @@ def validate_header(data: list[BasicValueType]):
     return True
 
 
-def load_image(
-    image: SheetImage, save_dir: str, parent_token: str
-) -> tuple[str, FileValue]:
-    anchor = (
-        f"{get_column_letter(image.anchor._from.col + 1)}{image.anchor._from.row + 1}"
-    )
-    _image = Image.open(image.ref).convert("RGB")
-    md5 = get_md5_from_bytes(_image.tobytes())
-    name = f"{md5}.{image.format}"
+def read_image(image: SheetImage) -> tuple[bytes, str]:
+    """Get the original bytes and format of the embedded image
+
+    The image is only decoded if its format can't be passed through, it is
+    converted to PNG then.
+    """
+    if image.format in PASSTHROUGH_IMAGE_FORMATS:
+        if isinstance(image.ref, BytesIO):
+            return image.ref.getvalue(), image.format
+        if isinstance(image.ref, str):
+            with open(image.ref, "rb") as f:
+                return f.read(), image.format
+    buffer = BytesIO()
+    Image.open(image.ref).save(buffer, format="png")
+    return buffer.getvalue(), "png"
+
+
+def hash_image(image: SheetImage) -> tuple[bytes, str, str]:
+    """Get the bytes, format and md5 of the embedded image"""
+    data, format = read_image(image)
+    return data, format, get_md5_from_bytes(data)
+
+
+def save_image(
+    image: tuple[bytes, str, str],
+    save_dir: str,
+    parent_token: str,
+    saved: dict[str, FileValue] | None = None,
+) -> FileValue:
+    """Write the hashed image, the image already in `saved` is not written again"""
+    data, format, md5 = image
+    name = f"{md5}.{format}"
+    if not saved is None and name in saved:
+        return saved[name]
     file_path = os.path.join(save_dir, name)
     if not os.path.exists(file_path):
-        _image.save(file_path)
+        create_file(file_path, data)
+    file_value: FileValue = {
+        "name": name,
+        "type": "file",
+        "size": len(data),
+        "md5": md5,
+        "token": None,
+        "parent_token": parent_token,
+    }
+    if not saved is None:
+        saved[name] = file_value
+    return file_value
+
+
+def get_image_anchor(image: SheetImage):
     return (
-        anchor,
-        {
-            "name": name,
-            "type": "file",
-            "size": os.path.getsize(file_path),
-            "md5": md5,
-            "token": None,
-            "parent_token": parent_token,
-        },
+        f"{get_column_letter(image.anchor._from.col + 1)}{image.anchor._from.row + 1}"
+    )
+
+
+def load_image(
+    image: SheetImage,
+    save_dir: str,
+    parent_token: str,
+    saved: dict[str, FileValue] | None = None,
+) -> tuple[str, FileValue]:
+    return (
+        get_image_anchor(image),
+        save_image(hash_image(image), save_dir, parent_token, saved),
     )
 
 
-def get_image_cache_key(ws: Worksheet, f: FileItem):
+def get_image_cache_key(ws: Worksheet, f: FileItem, *args, **kwargs):
     return os.path.join(f.dir_path, "cache", "images_map", f"{ws.title}.json")
 
 
@@ -184,86 +311,258 @@ def load_images(ws: Worksheet, f: FileItem):
     _images: list[SheetImage] = ws._images
     image_path = os.path.join(f.dir_path, "attachments")
     images: DefaultDict[str, list[FileValue]] = defaultdict(list)
-    if not os.path.exists(image_path) and len(_images) > 0:
-        os.makedirs(image_path)
-    if len(_images) > 0:
-        for i in _images:
-            anchor, file_value = load_image(i, image_path, f.token)
-            images[anchor].append(file_value)
+    saved: dict[str, FileValue] = {}
+    for i in _images:
+        anchor, file_value = load_image(i, image_path, f.token, saved)
+        images[anchor].append(file_value)
     return images
 
 
-@data_cache(get_cache_key=get_image_cache_key)
-def thread_load_images(ws: Worksheet, f: FileItem, max_workers: int = 32):
-    _images = ws._images
+def load_workbook_images(
+    wb: Workbook, f: FileItem, max_workers: int = 32
+) -> dict[str, DefaultDict[str, list[FileValue]]]:
+    """Load the images of all sheets in one pass, get the image map of each sheet
+
+    The images are hashed in threads, the same content is written once for the
+    workbook. The image maps are saved to the caches of the sheets.
+    """
     image_path = os.path.join(f.dir_path, "attachments")
-    images: DefaultDict[str, list[FileValue]] = defaultdict(list)
-    if not os.path.exists(image_path) and len(_images) > 0:
-        os.makedirs(image_path)
+    sheet_images = {ws.title: defaultdict(list) for ws in wb.worksheets}
+    _images = [(ws.title, image) for ws in wb.worksheets for image in ws._images]
     if len(_images) > 0:
+        saved: dict[str, FileValue] = {}
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            res = executor.map(
-                load_image,
-                _images,
-                itertools.repeat(image_path),
-                itertools.repeat(f.token),
+            hashed = executor.map(hash_image, [image for _, image in _images])
+            for (title, image), h in zip(_images, hashed):
+                sheet_images[title][get_image_anchor(image)].append(
+                    save_image(h, image_path, f.token, saved)
+                )
+    for ws in wb.worksheets:
+        cache_key = get_image_cache_key(ws, f)
+        if not os.path.exists(cache_key):
+            dataCache.set(cache_key, orjson.dumps(sheet_images[ws.title]))
+    return sheet_images
+
+
+@data_cache(get_cache_key=get_image_cache_key)
+def thread_load_images(ws: Worksheet, f: FileItem, max_workers: int = 32):
+    return load_workbook_images(ws.parent, f, max_workers)[ws.title]
+
+
+def get_hyperlink_cache_key(ws: StreamWorksheet, f: FileItem):
+    return os.path.join(f.dir_path, "cache", "hyperlinks_map", f"{ws.title}.json")
+
+
+@data_cache(get_cache_key=get_hyperlink_cache_key)
+def load_hyperlinks(ws: StreamWorksheet, f: FileItem) -> dict[str, UrlValue]:
+    """Get the anchor to url value map of the streaming worksheet"""
+    return {
+        anchor: parse_hyperlink(target, display)
+        for anchor, (target, display) in ws.hyperlinks.items()
+    }
+
+
+def get_hyperlink_rows(
+    links: dict[str, UrlValue],
+) -> DefaultDict[int, dict[int, UrlValue]]:
+    """Group the url values by row and column index"""
+    rows: DefaultDict[int, dict[int, UrlValue]] = defaultdict(dict)
+    for anchor, value in links.items():
+        row, col = coordinate_to_tuple(anchor)
+        rows[row][col] = value
+    return rows
+
+
+def set_hyperlinks(
+    values: list[BasicValueType],
+    row_links: dict[int, UrlValue],
+    columns: Iterable[int],
+):
+    """Replace the values of the cells with hyperlinks, `columns` are the column indexes of the values"""
+    for i, col in enumerate(columns):
+        if col in row_links:
+            values[i] = row_links[col]
+    return values
+
+
+def get_sheet_range(
+    ws: Worksheet | StreamWorksheet,
+    data_range: tuple[int, int, int, int] | tuple[None, None, None, None],
+) -> tuple[int, int, int, int]:
+    """Fill the missing boundaries of the data range with the worksheet dimensions"""
+    _default_range = [
+        ws.min_column,
+        ws.min_row,
+        ws.max_column,
+        ws.max_row,
+    ]
+    return tuple(
+        v if v is not None else _default_range[i] for i, v in enumerate(data_range)
+    )
+
+
+def iter_values_xlsx_stream(
+    file: FileItem,
+    sheet_name: str | None,
+    data_range: tuple[int, int, int, int] | tuple[None, None, None, None],
+    header_index: int,
+    columns: Iterable[str] | None = None,
+    filters: list[RowFilterConfig] | None = None,
+):
+    """Get the (header, row values) iterator from the streaming workbook
+
+    Only the cells of the header in `columns` are parsed if it is set. The
+    cells of the filtered columns are also read, to drop the rows not
+    matching `filters` before parsing them.
+    """
+    wb, close = get_stream_workbook(file)
+    try:
+        if sheet_name is None:
+            sheet_name = wb.sheetnames[0]
+        ws = wb[sheet_name]
+        _min_col, _min_row, _max_col, _max_row = get_sheet_range(ws, data_range)
+        header_row = _min_row + header_index - 1
+        header = [
+            parse_value(v)
+            for v in next(
+                ws.iter_rows(
+                    min_row=header_row,
+                    max_row=header_row,
+                    min_col=_min_col,
+                    max_col=_max_col,
+                )
             )
-        for anchor, file_value in res:
-            images[anchor].append(file_value)
-    return images
+        ]
+        validate_header(header)
+        header = [str(cell) for cell in header]
+        row_filter = get_row_filter(header, filters)
+        projection = get_projection(header, columns)
+        if not projection is None:
+            header = [header[i] for i in projection]
+        cols = None if projection is None else [_min_col + i for i in projection]
+        read_cols = cols
+        if not row_filter is None:
+            # the positions of the filtered columns in the read row
+            positions = {i: i for i in row_filter.columns}
+            if not cols is None:
+                read_cols = cols + [
+                    _min_col + i for i in row_filter.columns if not _min_col + i in cols
+                ]
+                positions = {i: read_cols.index(_min_col + i) for i in positions}
+        links = get_hyperlink_rows(load_hyperlinks(ws, file))
+        for row_idx, row in enumerate(
+            ws.iter_rows(
+                min_row=header_row,
+                max_row=_max_row,
+                min_col=_min_col,
+                max_col=_max_col,
+                columns=read_cols,
+            ),
+            header_row,
+        ):
+            if not row_filter is None and row_idx > header_row:
+                if not row_filter.match(lambda i: row[positions[i]]):
+                    continue
+            if not read_cols is cols:
+                row = row[: len(cols)]
+            values = [parse_value(v) for v in row]
+            if row_idx in links:
+                set_hyperlinks(
+                    values, links[row_idx], cols or range(_min_col, _max_col + 1)
+                )
+            yield header, values
+    finally:
+        close()
 
 
-def iter_row_xlsx(
+def iter_values_xlsx(
     file: FileItem,
     config: ReadXLSXConfig | None = None,
+    columns: Iterable[str] | None = None,
 ):
-    """Get the row iterator"""
+    """Get the (header, row values) iterator, the header list is shared by all rows
+
+    If `columns` is set, only the cells of the header in it are parsed.
+    """
     sheet_name, data_range, header_index, performance_mode = validate_read_config(
         config
     )
+    if performance_mode:
+        yield from iter_values_xlsx_stream(
+            file,
+            sheet_name,
+            data_range,
+            header_index,
+            columns,
+            (config or {}).get("filters"),
+        )
+        return
 
     wb, close = get_workbook(file, read_only=performance_mode)
-    if sheet_name is None:
-        sheet_name = wb.sheetnames[0]
-    ws = wb[sheet_name]
-    _min_col, _min_row, _max_col, _max_row = (
-        (
-            ws.min_column,
-            ws.min_row,
-            ws.max_column,
-            ws.max_row,
-        )
-        if all([c is None for c in data_range])
-        else data_range
-    )
-    header = [parse_cell(c) for c in ws[_min_row + header_index - 1]]
-    validate_header(header)
-    header = [str(cell) for cell in header]
-    images = thread_load_images(ws, file) if not performance_mode else {}
-    for row in ws.iter_rows(
-        min_row=header_index + _min_row - 1,
-        max_row=_max_row,
-        min_col=_min_col,
-        max_col=_max_col,
-    ):
-        yield dict(
-            zip(
-                header,
-                (
-                    [parse_cell(cell) for cell in row]
-                    if performance_mode or len(images) == 0
-                    else [
-                        (
-                            images[f"{get_column_letter(cell.column)}{cell.row}"]
-                            if f"{get_column_letter(cell.column)}{cell.row}" in images
-                            else parse_cell(cell)
-                        )
-                        for cell in row
-                    ]
-                ),
+    try:
+        if sheet_name is None:
+            sheet_name = wb.sheetnames[0]
+        ws = wb[sheet_name]
+        _min_col, _min_row, _max_col, _max_row = (
+            (
+                ws.min_column,
+                ws.min_row,
+                ws.max_column,
+                ws.max_row,
             )
+            if all([c is None for c in data_range])
+            else data_range
         )
-    close()
+        header = [parse_cell(c) for c in ws[_min_row + header_index - 1]]
+        validate_header(header)
+        header = [str(cell) for cell in header]
+        row_filter = get_row_filter(header, (config or {}).get("filters"))
+        projection = get_projection(header, columns)
+        if not projection is None:
+            header = [header[i] for i in projection]
+        images = thread_load_images(ws, file) if not performance_mode else {}
+        for row_idx, row in enumerate(
+            ws.iter_rows(
+                min_row=header_index + _min_row - 1,
+                max_row=_max_row,
+                min_col=_min_col,
+                max_col=_max_col,
+            )
+        ):
+            if (
+                row_idx > 0
+                and not row_filter is None
+                and not row_filter.match(
+                    lambda i: row[i].value if i < len(row) else None
+                )
+            ):
+                continue
+            if not projection is None:
+                row = [row[i] for i in projection if i < len(row)]
+            yield header, (
+                [parse_cell(cell) for cell in row]
+                if performance_mode or len(images) == 0
+                else [
+                    (
+                        images[f"{get_column_letter(cell.column)}{cell.row}"]
+                        if f"{get_column_letter(cell.column)}{cell.row}" in images
+                        else parse_cell(cell)
+                    )
+                    for cell in row
+                ]
+            )
+    finally:
+        close()
+
+
+def iter_row_xlsx(
+    file: FileItem,
+    config: ReadXLSXConfig | None = None,
+    columns: Iterable[str] | None = None,
+):
+    """Get the row iterator"""
+    for header, values in iter_values_xlsx(file, config, columns):
+        yield dict(zip(header, values))
 
 
 def get_paginate_cache_key(
@@ -321,69 +620,107 @@ def paginate_load_xlsx(
         _config
     )
 
-    wb, close = get_workbook(data, read_only=performance_mode)
-    sheet_names = wb.sheetnames
-    if sheet_name is None:
-        sheet_name = sheet_names[0]
-    ws = wb[sheet_name]
-    _default_range = [
-        ws.min_column,
-        ws.min_row,
-        ws.max_column,
-        ws.max_row,
-    ]
-    _min_col, _min_row, _max_col, _max_row = (
-        v if v is not None else _default_range[i] for i, v in enumerate(data_range)
+    wb, close = (
+        get_stream_workbook(data)
+        if performance_mode
+        else get_workbook(data, read_only=performance_mode)
     )
-    has_more = True
-    images = thread_load_images(ws, data) if not performance_mode else {}
-    min_row = (
-        header_index
-        + _min_row
-        - 1
-        + (page_token * page_size if not page_size is None else 0)
-        + (1 if page_token == 0 else 0)
-    )
-    max_row = _max_row if page_size is None else min(_max_row, min_row + page_size - 1)
-    if min_row > max_row:
-        close()
-        raise InvalidConfigValue(f"Header index or page token is out of range.")
-    has_more = max_row < _max_row
-    header = [
-        parse_cell(c)
-        for i, c in enumerate(ws[_min_row + header_index - 1])
-        if i < _max_col and i >= _min_col - 1
-    ]
-    _data = (
-        [
-            [parse_cell(cell) for cell in row]
-            for row in ws.iter_rows(
-                min_row=min_row,
-                max_row=max_row,
-                min_col=_min_col,
-                max_col=_max_col,
-            )
-        ]
-        if performance_mode or len(images) == 0
-        else [
+    try:
+        sheet_names = wb.sheetnames
+        if sheet_name is None:
+            sheet_name = sheet_names[0]
+        ws = wb[sheet_name]
+        _min_col, _min_row, _max_col, _max_row = get_sheet_range(ws, data_range)
+        has_more = True
+        images = thread_load_images(ws, data) if not performance_mode else {}
+        min_row = (
+            header_index
+            + _min_row
+            - 1
+            + (page_token * page_size if not page_size is None else 0)
+            + (1 if page_token == 0 else 0)
+        )
+        max_row = (
+            _max_row if page_size is None else min(_max_row, min_row + page_size - 1)
+        )
+        if min_row > max_row:
+            raise InvalidConfigValue(f"Header index or page token is out of range.")
+        has_more = max_row < _max_row
+        if performance_mode:
+            header_row = _min_row + header_index - 1
+            header = [
+                parse_value(v)
+                for v in next(
+                    ws.iter_rows(
+                        min_row=header_row,
+                        max_row=header_row,
+                        min_col=_min_col,
+                        max_col=_max_col,
+                    )
+                )
+            ]
+        else:
+            header = [
+                parse_cell(c)
+                for i, c in enumerate(ws[_min_row + header_index - 1])
+                if i < _max_col and i >= _min_col - 1
+            ]
+        links = (
+            get_hyperlink_rows(load_hyperlinks(ws, data)) if performance_mode else {}
+        )
+        _data = (
             [
                 (
-                    images[f"{get_column_letter(cell.column)}{cell.row}"]
-                    if f"{get_column_letter(cell.column)}{cell.row}" in images
-                    else parse_cell(cell)
+                    set_hyperlinks(
+                        [parse_value(v) for v in row],
+                        links[row_idx],
+                        range(_min_col, _max_col + 1),
+                    )
+                    if row_idx in links
+                    else [parse_value(v) for v in row]
+                )
+                for row_idx, row in enumerate(
+                    ws.iter_rows(
+                        min_row=min_row,
+                        max_row=max_row,
+                        min_col=_min_col,
+                        max_col=_max_col,
+                    ),
+                    min_row,
                 )
-                for cell in row
             ]
-            for row in ws.iter_rows(
-                min_row=min_row,
-                max_row=max_row,
-                min_col=_min_col,
-                max_col=_max_col,
+            if performance_mode
+            else (
+                [
+                    [parse_cell(cell) for cell in row]
+                    for row in ws.iter_rows(
+                        min_row=min_row,
+                        max_row=max_row,
+                        min_col=_min_col,
+                        max_col=_max_col,
+                    )
+                ]
+                if len(images) == 0
+                else [
+                    [
+                        (
+                            images[f"{get_column_letter(cell.column)}{cell.row}"]
+                            if f"{get_column_letter(cell.column)}{cell.row}" in images
+                            else parse_cell(cell)
+                        )
+                        for cell in row
+                    ]
+                    for row in ws.iter_rows(
+                        min_row=min_row,
+                        max_row=max_row,
+                        min_col=_min_col,
+                        max_col=_max_col,
+                    )
+                ]
             )
-        ]
-    )
-
-    close()
+        )
+    finally:
+        close()
     errors = []
     can_parse = True
 
@@ -432,3 +769,37 @@ def paginate_load_xlsx(
         "has_more": has_more,
     }
     return res
+
+
+def get_metadata_cache_key(file: FileItem):
+    return os.path.join(file.dir_path, "cache", "metadata", f"{file.md5}.json")
+
+
+@data_cache(get_cache_key=get_metadata_cache_key)
+def load_metadata_xlsx(file: FileItem) -> DataSourceMeta:
+    """Get the sheet names, dimensions and first rows without loading the cells
+
+    Only the workbook part, the `dimension` element and the first rows of each
+    worksheet are read.
+    """
+    wb, close = get_stream_workbook(file)
+    try:
+        sheets: list[SheetMeta] = []
+        for sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+            min_col, min_row, max_col, max_row = ws.dimensions
+            head = [
+                [parse_value(v) for v in row]
+                for row in ws.iter_rows(
+                    min_row=min_row,
+                    max_row=min(max_row, min_row + METADATA_HEAD_ROWS - 1),
+                    min_col=min_col,
+                    max_col=max_col,
+                )
+            ]
+            sheets.append(
+                get_sheet_meta(sheet_name, (min_col, min_row, max_col, max_row), head)
+            )
+        return {"sheets": sheets}
+    finally:
+        close()
@@ -0,0 +1,621 @@
+"""Streaming XLSX reader
+
+Read the worksheet xml directly from the zip package and yield rows as plain
+value tuples, without creating openpyxl cell objects.
+"""
+
+import os
+import re
+import mmap
+import uuid
+import shutil
+import posixpath
+import zipfile
+from array import array
+from typing import IO, Iterator, Sequence
+from warnings import warn
+from xml.etree.ElementTree import iterparse, fromstring
+from openpyxl.styles.numbers import (
+    BUILTIN_FORMATS,
+    is_date_format,
+    is_timedelta_format,
+)
+from openpyxl.utils import (
+    column_index_from_string,
+    get_column_letter,
+    range_boundaries,
+)
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, MAC_EPOCH
+from openpyxl.xml.constants import SHEET_MAIN_NS, REL_NS, PKG_REL_NS, ARC_WORKBOOK
+
+ROOT_RELS_PATH = "_rels/.rels"
+OFFICE_DOCUMENT_REL = f"{REL_NS}/officeDocument"
+SHARED_STRINGS_REL = f"{REL_NS}/sharedStrings"
+STYLES_REL = f"{REL_NS}/styles"
+
+RELATIONSHIP_TAG = f"{{{PKG_REL_NS}}}Relationship"
+SHEET_TAG = f"{{{SHEET_MAIN_NS}}}sheets/{{{SHEET_MAIN_NS}}}sheet"
+WORKBOOK_PR_TAG = f"{{{SHEET_MAIN_NS}}}workbookPr"
+NUM_FMT_TAG = f"{{{SHEET_MAIN_NS}}}numFmts/{{{SHEET_MAIN_NS}}}numFmt"
+CELL_XF_TAG = f"{{{SHEET_MAIN_NS}}}cellXfs/{{{SHEET_MAIN_NS}}}xf"
+SI_TAG = f"{{{SHEET_MAIN_NS}}}si"
+R_TAG = f"{{{SHEET_MAIN_NS}}}r"
+T_TAG = f"{{{SHEET_MAIN_NS}}}t"
+VALUE_TAG = f"{{{SHEET_MAIN_NS}}}v"
+INLINE_STRING_TAG = f"{{{SHEET_MAIN_NS}}}is"
+HYPERLINK_TAG = f"{{{SHEET_MAIN_NS}}}hyperlink"
+SHEET_ID_ATTR = f"{{{REL_NS}}}id"
+
+DIGITS = "0123456789"
+READ_CHUNK_SIZE = 1024 * 1024
+SHARED_STRINGS_DISK_SIZE = 64 * 1024 * 1024
+"""Shared strings parts from this uncompressed size are kept on disk"""
+STRINGS_FILE_NAME = "strings.bin"
+OFFSETS_FILE_NAME = "offsets.bin"
+OFFSETS_FLUSH_SIZE = 64 * 1024
+
+ROOT_TAG_RE = re.compile(rb"<[\w:]+\b[^>]*>")
+XMLNS_RE = re.compile(rb'\bxmlns(?::\w+)?="[^"]*"')
+SHEET_DATA_START_RE = re.compile(rb"<(\w+:)?sheetData\b[^>]*?(/?)>")
+DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\b[^>]*?\bref="([^"]*)"')
+ROW_NUMBER_RE = re.compile(rb'\br="(\d+)"')
+HYPERLINKS_RE = re.compile(rb"<(?:\w+:)?hyperlinks\b.*?</(?:\w+:)?hyperlinks>", re.S)
+HYPERLINKS_START_RE = re.compile(rb"<(?:\w+:)?hyperlinks\b")
+
+
+def _get_last_row_number(part: bytes, row_start: bytes) -> int | None:
+    """Get the number of the last row in the xml part from its `r` attribute"""
+    start = part.rfind(row_start)
+    if start == -1:
+        return None
+    match = ROW_NUMBER_RE.search(part, start, part.find(b">", start))
+    return int(match.group(1)) if match else None
+
+
+def _cast_number(value: str) -> int | float:
+    """Convert numbers as string to an int or float"""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _resolve_target(base: str, target: str) -> str:
+    """Resolve the relationship target to the path in the package"""
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), target))
+
+
+def _get_rels_path(part: str) -> str:
+    """Get the relationships path of the part"""
+    return posixpath.join(
+        posixpath.dirname(part), "_rels", f"{posixpath.basename(part)}.rels"
+    )
+
+
+def _get_text(node) -> str:
+    """Get the plain text of `si` or `is` element, phonetic runs excluded"""
+    t = node.find(T_TAG)
+    snippets = [t.text or ""] if t is not None else []
+    snippets.extend(r.findtext(T_TAG) or "" for r in node.iterfind(R_TAG))
+    return "".join(snippets)
+
+
+def read_shared_strings(source: IO) -> list[str]:
+    """Read in all shared strings in the table"""
+    strings = []
+    for _, node in iterparse(source):
+        if node.tag == SI_TAG:
+            strings.append(_get_text(node).replace("x005F_", ""))
+            node.clear()
+    return strings
+
+
+def write_shared_strings(source: IO, path: str):
+    """Write the shared strings as UTF-8 bytes and their int64 end offsets
+
+    The table is parsed as a stream and the parsed elements are dropped, so
+    neither the strings nor the elements are kept in memory. The directory is
+    only visible after all strings are written.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    try:
+        with (
+            open(os.path.join(tmp_path, STRINGS_FILE_NAME), "wb") as strings,
+            open(os.path.join(tmp_path, OFFSETS_FILE_NAME), "wb") as offsets_file,
+        ):
+            offset = 0
+            offsets = array("q", [0])
+            context = iterparse(source, events=("start", "end"))
+            _, root = next(context)
+            for event, node in context:
+                if event != "end" or node.tag != SI_TAG:
+                    continue
+                data = _get_text(node).replace("x005F_", "").encode("utf-8")
+                strings.write(data)
+                offset += len(data)
+                offsets.append(offset)
+                root.clear()
+                if len(offsets) >= OFFSETS_FLUSH_SIZE:
+                    offsets.tofile(offsets_file)
+                    offsets = array("q")
+            offsets.tofile(offsets_file)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Written by another reader at the same time
+            pass
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+class DiskSharedStrings(Sequence[str]):
+    """Shared strings table memory-mapped from the files of `write_shared_strings`
+
+    The strings are decoded when they are looked up.
+    """
+
+    def __init__(self, path: str):
+        self._files = [
+            open(os.path.join(path, name), "rb")
+            for name in (STRINGS_FILE_NAME, OFFSETS_FILE_NAME)
+        ]
+        self._maps = [
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            for f in self._files
+            if os.fstat(f.fileno()).st_size > 0
+        ]
+        self._strings = self._maps[0] if len(self._maps) == 2 else b""
+        self._offsets = memoryview(self._maps[-1]).cast("q")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        return self._strings[self._offsets[index] : self._offsets[index + 1]].decode(
+            "utf-8"
+        )
+
+    def close(self):
+        self._offsets.release()
+        for m in self._maps:
+            m.close()
+        for f in self._files:
+            f.close()
+
+
+def read_date_styles(source: bytes) -> tuple[set[int], set[int]]:
+    """Read the indexes of cell styles which refer to datetimes and timedeltas
+
+    Returns:
+        tuple[set[int], set[int]]: date style indexes, timedelta style indexes
+    """
+    tree = fromstring(source)
+    custom = {
+        int(fmt.get("numFmtId")): fmt.get("formatCode")
+        for fmt in tree.iterfind(NUM_FMT_TAG)
+    }
+    date_styles: set[int] = set()
+    timedelta_styles: set[int] = set()
+    for idx, xf in enumerate(tree.iterfind(CELL_XF_TAG)):
+        num_fmt_id = int(xf.get("numFmtId", 0))
+        fmt = custom.get(num_fmt_id, BUILTIN_FORMATS.get(num_fmt_id))
+        if fmt is None:
+            continue
+        if is_date_format(fmt):
+            date_styles.add(idx)
+        if is_timedelta_format(fmt):
+            timedelta_styles.add(idx)
+    return date_styles, timedelta_styles
+
+
+class StreamWorksheet:
+    """Worksheet which parse the xml source on demand"""
+
+    def __init__(self, parent: "StreamWorkbook", title: str, path: str):
+        self.parent = parent
+        self.title = title
+        self.path = path
+        self._dimensions: tuple[int, int, int, int] | None = None
+        self._hyperlinks: dict[str, tuple[str | None, str | None]] | None = None
+
+    def _get_source(self):
+        """Open the xml source, must close after use"""
+        return self.parent.archive.open(self.path)
+
+    def _read_head(self, src: IO) -> tuple[bytes, re.Match | None]:
+        """Read the source until the start tag of `sheetData`
+
+        Returns:
+            tuple[bytes, re.Match | None]: read bytes and the match of the start tag
+        """
+        buf = b""
+        while True:
+            chunk = src.read(READ_CHUNK_SIZE)
+            buf += chunk
+            match = SHEET_DATA_START_RE.search(buf)
+            if match is not None or not chunk:
+                return buf, match
+
+    def _read_dimensions(self):
+        with self._get_source() as src:
+            buf, match = self._read_head(src)
+        dimension = DIMENSION_RE.search(buf, 0, match.start() if match else len(buf))
+        if dimension is not None:
+            return range_boundaries(dimension.group(1).decode())
+        return self._calculate_dimensions()
+
+    def _calculate_dimensions(self):
+        """Loop through all the rows to get the size of a worksheet."""
+        min_col, min_row, max_col, max_row = None, None, 0, 0
+        for row_idx, cells in self._parse_rows():
+            if not cells:
+                continue
+            if min_row is None:
+                min_row = row_idx
+            max_row = row_idx
+            min_col = min(cells[0][0], min_col or cells[0][0])
+            max_col = max(cells[-1][0], max_col)
+        return (min_col or 1, min_row or 1, max_col or 1, max_row or 1)
+
+    @property
+    def dimensions(self) -> tuple[int, int, int, int]:
+        """(min_col, min_row, max_col, max_row) of the worksheet"""
+        if self._dimensions is None:
+            self._dimensions = self._read_dimensions()
+        return self._dimensions
+
+    @property
+    def min_column(self):
+        return self.dimensions[0]
+
+    @property
+    def min_row(self):
+        return self.dimensions[1]
+
+    @property
+    def max_column(self):
+        return self.dimensions[2]
+
+    @property
+    def max_row(self):
+        return self.dimensions[3]
+
+    def _read_hyperlinks(self) -> dict[str, tuple[str | None, str | None]]:
+        """Read the `hyperlinks` element after `sheetData` and the relationships
+
+        The source is decompressed in chunks without parsing the rows, only the
+        tail from the start tag of `hyperlinks` is kept.
+        """
+        with self._get_source() as src:
+            buf, _ = self._read_head(src)
+            root = ROOT_TAG_RE.search(buf)
+            namespaces = b" ".join(XMLNS_RE.findall(root.group(0))) if root else b""
+            while True:
+                start = HYPERLINKS_START_RE.search(buf)
+                if start is not None:
+                    buf = buf[start.start() :] + src.read()
+                    break
+                chunk = src.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return {}
+                # keep the end of the buffer in case the tag is cut by the chunk
+                buf = buf[-32:] + chunk
+        match = HYPERLINKS_RE.search(buf)
+        if match is None:
+            return {}
+        tree = fromstring(
+            b"<hyperlinks " + namespaces + b">" + match.group(0) + b"</hyperlinks>"
+        )
+        targets = self.parent._read_rels_targets(self.path)
+        links: dict[str, tuple[str | None, str | None]] = {}
+        for link in tree.iter(HYPERLINK_TAG):
+            ref = link.get("ref")
+            if not ref:
+                continue
+            rel_id = link.get(SHEET_ID_ATTR)
+            value = (targets.get(rel_id) if rel_id else None, link.get("display"))
+            if ":" in ref:
+                min_col, min_row, max_col, max_row = range_boundaries(ref)
+                for row in range(min_row, max_row + 1):
+                    for col in range(min_col, max_col + 1):
+                        links[f"{get_column_letter(col)}{row}"] = value
+            else:
+                links[ref] = value
+        return links
+
+    @property
+    def hyperlinks(self) -> dict[str, tuple[str | None, str | None]]:
+        """{coordinate: (target, display)} of the cells with hyperlinks"""
+        if self._hyperlinks is None:
+            self._hyperlinks = self._read_hyperlinks()
+        return self._hyperlinks
+
+    def _iter_row_elements(self, min_row: int = 1):
+        """Yield the `row` elements of `sheetData`
+
+        The source is decompressed in chunks, each chunk is cut at the last
+        complete row and parsed at once, so only one chunk lives in memory.
+        Chunks which end before `min_row` are skipped without parsing.
+        """
+        with self._get_source() as src:
+            buf, match = self._read_head(src)
+            if match is None or match.group(2):
+                return
+            prefix = match.group(1) or b""
+            row_start = b"<" + prefix + b"row"
+            row_end = b"</" + prefix + b"row>"
+            sheet_data_end = b"</" + prefix + b"sheetData>"
+            root = ROOT_TAG_RE.search(buf)
+            namespaces = b" ".join(XMLNS_RE.findall(root.group(0))) if root else b""
+            wrapper_start = b"<sheetData " + namespaces + b">"
+            wrapper_end = b"</sheetData>"
+            buf = buf[match.end() :]
+            chunk = buf
+            done = False
+            while not done:
+                end = buf.find(sheet_data_end)
+                if end != -1 or not chunk:
+                    part, done = (buf[:end] if end != -1 else buf), True
+                else:
+                    end = buf.rfind(row_end)
+                    if end == -1:
+                        chunk = src.read(READ_CHUNK_SIZE)
+                        buf += chunk
+                        continue
+                    end += len(row_end)
+                    part, buf = buf[:end], buf[end:]
+                    chunk = src.read(READ_CHUNK_SIZE)
+                    buf += chunk
+                if min_row > 1:
+                    last_row = _get_last_row_number(part, row_start)
+                    if last_row is not None and last_row < min_row:
+                        continue
+                yield from fromstring(wrapper_start + part + wrapper_end)
+
+    def _parse_rows(
+        self,
+        min_row: int = 1,
+        min_col: int = 1,
+        max_col: int | None = None,
+        columns: set[int] | None = None,
+    ) -> Iterator[tuple[int, list[tuple[int, object]]]]:
+        """Yield (row index, [(column index, value), ...]) of the rows from `min_row`
+
+        The cells not in `columns` are skipped without parsing their values.
+        """
+        parse_value = self.parent.parse_value
+        column_indexes: dict[str, int] = {}
+        row_counter = 0
+        for element in self._iter_row_elements(min_row):
+            r = element.get("r")
+            row_counter = int(r) if r else row_counter + 1
+            if row_counter < min_row:
+                continue
+            cells = []
+            col_counter = 0
+            for c in element:
+                ref = c.get("r")
+                if ref:
+                    letters = ref.rstrip(DIGITS)
+                    col_counter = column_indexes.get(letters)
+                    if col_counter is None:
+                        col_counter = column_indexes[letters] = (
+                            column_index_from_string(letters)
+                        )
+                else:
+                    col_counter += 1
+                if col_counter < min_col:
+                    continue
+                if max_col is not None and col_counter > max_col:
+                    break
+                if columns is not None and col_counter not in columns:
+                    continue
+                cells.append((col_counter, parse_value(c, ref)))
+            yield row_counter, cells
+
+    def iter_rows(
+        self,
+        min_row: int | None = None,
+        max_row: int | None = None,
+        min_col: int | None = None,
+        max_col: int | None = None,
+        columns: list[int] | None = None,
+    ) -> Iterator[tuple]:
+        """Iterate the rows as value tuples like openpyxl read-only worksheet
+
+        Missing rows and cells between the existing ones are filled with None.
+        If `columns` is set, only the values of these column indexes (start
+        from 1) are returned in the order.
+        """
+        min_row = min_row or 1
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+        if columns is None:
+            positions = None
+            width = max_col + 1 - min_col
+        else:
+            positions = {col: i for i, col in enumerate(columns)}
+            width = len(columns)
+            max_col = min(max_col, max(columns, default=min_col))
+        empty_row = (None,) * width
+        counter = min_row
+        for row_idx, cells in self._parse_rows(
+            min_row, min_col, max_col, None if positions is None else set(positions)
+        ):
+            if max_row is not None and row_idx > max_row:
+                # the rows missing before `max_row` are still returned
+                for _ in range(counter, max_row + 1):
+                    yield empty_row
+                break
+            while counter < row_idx:
+                counter += 1
+                yield empty_row
+            row = [None] * width
+            if positions is None:
+                for col_idx, value in cells:
+                    row[col_idx - min_col] = value
+            else:
+                for col_idx, value in cells:
+                    row[positions[col_idx]] = value
+            counter += 1
+            yield tuple(row)
+
+
+class StreamWorkbook:
+    """Workbook which reads the zip package itself
+
+    The shared strings table and the style to date lookup are built once when
+    opening, worksheets are parsed lazily while iterating rows.
+    """
+
+    def __init__(
+        self,
+        filename: str | IO,
+        shared_strings_path: str | None = None,
+        shared_strings_disk_size: int = SHARED_STRINGS_DISK_SIZE,
+    ):
+        """
+        Args:
+            filename (str | IO): file path or file object of the package
+            shared_strings_path (str | None, optional): directory to keep the large shared strings table on disk. Defaults to None, always in memory.
+            shared_strings_disk_size (int, optional): uncompressed size of the shared strings part from which it is kept on disk. Defaults to SHARED_STRINGS_DISK_SIZE.
+        """
+        self.archive = zipfile.ZipFile(filename, "r")
+        self.shared_strings_path = shared_strings_path
+        self.shared_strings_disk_size = shared_strings_disk_size
+        try:
+            self._load()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_rels(self, part: str) -> list[tuple[str, str, str]]:
+        """Read (id, type, target path) of the relationships of the part"""
+        rels_path = _get_rels_path(part)
+        if rels_path not in self.archive.NameToInfo:
+            return []
+        tree = fromstring(self.archive.read(rels_path))
+        return [
+            (
+                rel.get("Id"),
+                rel.get("Type"),
+                _resolve_target(part, rel.get("Target")),
+            )
+            for rel in tree.iter(RELATIONSHIP_TAG)
+        ]
+
+    def _read_rels_targets(self, part: str) -> dict[str, str]:
+        """Read {id: target} of the relationships of the part, the targets are not resolved"""
+        rels_path = _get_rels_path(part)
+        if rels_path not in self.archive.NameToInfo:
+            return {}
+        tree = fromstring(self.archive.read(rels_path))
+        return {rel.get("Id"): rel.get("Target") for rel in tree.iter(RELATIONSHIP_TAG)}
+
+    def _find_workbook_path(self):
+        if ROOT_RELS_PATH in self.archive.NameToInfo:
+            tree = fromstring(self.archive.read(ROOT_RELS_PATH))
+            for rel in tree.iter(RELATIONSHIP_TAG):
+                if rel.get("Type") == OFFICE_DOCUMENT_REL:
+                    return rel.get("Target").lstrip("/")
+        return ARC_WORKBOOK
+
+    def _load(self):
+        workbook_path = self._find_workbook_path()
+        rels = self._read_rels(workbook_path)
+        targets = {rel_id: target for rel_id, _, target in rels}
+        parts = {rel_type: target for _, rel_type, target in rels}
+
+        tree = fromstring(self.archive.read(workbook_path))
+        workbook_pr = tree.find(WORKBOOK_PR_TAG)
+        date1904 = workbook_pr is not None and workbook_pr.get("date1904") in (
+            "1",
+            "true",
+        )
+        self.epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+        self._sheets: dict[str, StreamWorksheet] = {}
+        for sheet in tree.iterfind(SHEET_TAG):
+            title = sheet.get("name")
+            self._sheets[title] = StreamWorksheet(
+                self, title, targets.get(sheet.get(SHEET_ID_ATTR))
+            )
+
+        shared_strings_path = parts.get(SHARED_STRINGS_REL)
+        self.shared_strings: Sequence[str] = []
+        if shared_strings_path in self.archive.NameToInfo:
+            self.shared_strings = self._load_shared_strings(shared_strings_path)
+
+        styles_path = parts.get(STYLES_REL)
+        self.date_styles: set[int] = set()
+        self.timedelta_styles: set[int] = set()
+        if styles_path in self.archive.NameToInfo:
+            self.date_styles, self.timedelta_styles = read_date_styles(
+                self.archive.read(styles_path)
+            )
+
+    def _load_shared_strings(self, part: str) -> Sequence[str]:
+        """Read the shared strings, memory-mapped from the cache if the part is large"""
+        info = self.archive.getinfo(part)
+        if (
+            self.shared_strings_path is None
+            or info.file_size < self.shared_strings_disk_size
+        ):
+            with self.archive.open(part) as src:
+                return read_shared_strings(src)
+        if not os.path.exists(self.shared_strings_path):
+            with self.archive.open(part) as src:
+                write_shared_strings(src, self.shared_strings_path)
+        return DiskSharedStrings(self.shared_strings_path)
+
+    @property
+    def sheetnames(self) -> list[str]:
+        return list(self._sheets.keys())
+
+    def __getitem__(self, key: str) -> StreamWorksheet:
+        if key not in self._sheets:
+            raise KeyError(f"Worksheet {key} does not exist.")
+        return self._sheets[key]
+
+    def parse_value(self, c, coordinate: str | None = None):
+        """Parse the value of the `c` element like openpyxl does with `data_only`"""
+        data_type = c.get("t", "n")
+        if data_type == "inlineStr":
+            child = c.find(INLINE_STRING_TAG)
+            return _get_text(child) if child is not None else None
+        value = c.findtext(VALUE_TAG) or None
+        if value is None:
+            return None
+        match data_type:
+            case "n":
+                value = _cast_number(value)
+                style_id = c.get("s")
+                if style_id and int(style_id) in self.date_styles:
+                    try:
+                        return from_excel(
+                            value,
+                            self.epoch,
+                            timedelta=int(style_id) in self.timedelta_styles,
+                        )
+                    except (OverflowError, ValueError):
+                        warn(
+                            f"Cell {coordinate} is marked as a date but the serial value {value} is outside the limits for dates. The cell will be treated as an error."
+                        )
+                        return "#VALUE!"
+                return value
+            case "s":
+                return self.shared_strings[int(value)]
+            case "b":
+                return bool(int(value))
+            case "d":
+                return from_ISO8601(value)
+            case _:
+                return value
+
+    def close(self):
+        if isinstance(getattr(self, "shared_strings", None), DiskSharedStrings):
+            self.shared_strings.close()
+        self.archive.close()
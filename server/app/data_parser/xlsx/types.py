@@ -1,5 +1,5 @@
 from typing import TypedDict, Optional
-from ..types import DataRange
+from ..types import DataRange, RowFilterConfig
 
 
 class ReadXLSXConfig(TypedDict):
@@ -28,3 +28,11 @@ class ReadXLSXConfig(TypedDict):
 
     Default: False
     """
+
+    filters: Optional[list[RowFilterConfig]]
+    """Row filters on the raw cell values, only the rows matching all of them are parsed
+
+    Default: None
+
+    Example: [{"field": "status", "op": "eq", "value": "done"}, {"field": "date", "op": "range", "min": "2024-01-01"}]
+    """
@@ -11,6 +11,10 @@ FILE_EXPIRED_TIME = int(os.getenv("FILE_EXPIRED_TIME", 24 * 60 * 60 * 1000))
 USER_LIMIT = int(os.getenv("FILE_NUMBER_LIMIT", 3))
 ENV_SIZE_LIMIT = os.getenv("FILE_SIZE_LIMIT", None)
 SIZE_LIMIT = int(ENV_SIZE_LIMIT) if ENV_SIZE_LIMIT is not None else None
+COPY_CHUNK_SIZE = int(os.getenv("FILE_COPY_CHUNK_SIZE", 1024 * 1024))
+"""Bytes read at a time when an uploaded file is written to its location"""
 
 # multipart upload
 CHUNK_META_FILE_NAME = os.getenv("FILE_CHUNK_META_FILE_NAME", "_chunk_meta.json")
+CHUNK_RECORD_DIR_NAME = os.getenv("FILE_CHUNK_RECORD_DIR_NAME", "_chunks")
+"""Dir of the records of the chunks written into the file"""
@@ -1,10 +1,11 @@
 """File module to manage files"""
 
 import os
+import io
 import shutil
 import uuid
 import glob
-from typing import IO
+from typing import IO, Callable
 from time import time
 from dataclasses import dataclass
 import orjson
@@ -12,6 +13,7 @@ from werkzeug.utils import secure_filename
 from app.schemes import User
 from app.token import TokenManager, TokenMeta, tokenclass
 from app.utils import timestamp_s_to_ms
+from app.log import logger
 from .exceptions import (
     NoFileException,
     ChunkNotFoundException,
@@ -24,11 +26,16 @@ from .constants import (
     FILE_META_FILE_NAME,
     ORIGIN_FILE_DIR_NAME,
     CHUNK_META_FILE_NAME,
+    CHUNK_RECORD_DIR_NAME,
     USER_LIMIT,
 )
 from .utils import (
     create_file,
+    create_file_from_stream,
+    preallocate_file,
+    write_file_at,
     get_file_md5,
+    get_md5_from_bytes,
     read_json_file,
     read_file,
     get_file_from_url,
@@ -63,6 +70,15 @@ class ChunkMeta:
     total_size: int
 
 
+@dataclass(frozen=True)
+class ChunkRecord:
+    """Range of a chunk written into the file, `md5` is set if the chunk digest was checked"""
+
+    offset: int
+    size: int
+    md5: str | None = None
+
+
 @dataclass(frozen=True, slots=True)
 class FileItem:
     token: str
@@ -92,6 +108,23 @@ class FileManager:
         self.token_manager = token_manager
         self.user_limit = user_limit
         self.size_limit = size_limit
+        self.save_hooks: list[Callable[[FileItem], None]] = []
+        self.delete_hooks: list[Callable[[FileItem], None]] = []
+
+    def add_save_hook(self, hook: Callable[[FileItem], None]):
+        """Add a function called with the file item once an uploaded file is saved"""
+        self.save_hooks.append(hook)
+
+    def add_delete_hook(self, hook: Callable[[FileItem], None]):
+        """Add a function called with the file item before the file is deleted"""
+        self.delete_hooks.append(hook)
+
+    def call_hooks(self, hooks: list[Callable[[FileItem], None]], file: FileItem):
+        for hook in hooks:
+            try:
+                hook(file)
+            except Exception as e:
+                logger.error(f"Error when call hook of {file.token}: {e}")
 
     def get_file_path(
         self,
@@ -135,6 +168,10 @@ class FileManager:
         file_path = self.get_file_path_from_token_meta(token_meta)
         if not os.path.exists(file_path):
             raise NoFileException(f"Not Found file: {token}({file_path}).")
+        if os.path.exists(
+            os.path.join(os.path.dirname(file_path), CHUNK_META_FILE_NAME)
+        ):
+            raise NoFileException(f"File {token} is not assembled.")
         file_dir = self.get_file_dir_from_file_path(file_path)
         file_meta = self.get_file_meta(file_dir)
         return FileItem(
@@ -155,16 +192,24 @@ class FileManager:
         return file
 
     def save_file(
-        self, tenant_key: str, base_id: str, user_id: str, filename: str, data: IO
+        self,
+        tenant_key: str,
+        base_id: str,
+        user_id: str,
+        filename: str,
+        data: bytes | IO[bytes],
     ):
+        """Save the bytes or the binary stream, the stream is copied in chunks and never read into memory"""
         if not self.can_save_file(tenant_key, user_id, base_id):
             raise FileNumberLimitException(
                 f"Each user is limited to upload {self.user_limit} files per base. "
             )
-        if self.size_limit and len(data) > self.size_limit:
-            raise InvalidateFileException(
-                f"The size of file ({len(data) / (1024 * 1024)} MB) exceed file size limit ({self.size_limit / (1024 * 1024)} MB). "
-            )
+        if isinstance(data, (bytes, bytearray)):
+            if self.size_limit and len(data) > self.size_limit:
+                raise InvalidateFileException(
+                    f"The size of file ({len(data) / (1024 * 1024)} MB) exceed file size limit ({self.size_limit / (1024 * 1024)} MB). "
+                )
+            data = io.BytesIO(data)
         uid = str(uuid.uuid4())
         created_time = timestamp_s_to_ms(time())
         file_token_meta = FileTokenMeta(
@@ -177,14 +222,31 @@ class FileManager:
         )
         file_path = self.get_file_path_from_token_meta(file_token_meta)
         token = self.token_manager.encode_token(file_token_meta)
-        create_file(file_path, data)
-        md5 = get_file_md5(file_path)
-        size = os.path.getsize(file_path)
+        try:
+            md5, size = create_file_from_stream(file_path, data, self.size_limit)
+        except InvalidateFileException:
+            shutil.rmtree(
+                os.path.dirname(self.get_file_dir_from_file_path(file_path)),
+                ignore_errors=True,
+            )
+            raise
         file_meta = FileMeta(
             md5=md5, created_time=created_time, uuid=uid, token=token, size=size
         )
         meta_path = os.path.dirname(os.path.dirname(file_path))
         self.save_file_meta(meta_path, file_meta)
+        self.call_hooks(
+            self.save_hooks,
+            FileItem(
+                token=token,
+                file_path=file_path,
+                dir_path=meta_path,
+                md5=md5,
+                created_time=created_time,
+                uuid=uid,
+                size=size,
+            ),
+        )
         return token
 
     def start_chunk(
@@ -229,53 +291,104 @@ class FileManager:
             os.path.join(meta_path, ORIGIN_FILE_DIR_NAME, CHUNK_META_FILE_NAME),
             orjson.dumps(chunk_meta),
         )
+        # the chunks are written at their offsets, no assembly copy is needed
+        preallocate_file(file_path, size)
         return token
 
+    def get_chunk_record_path(self, raw_dir: str, index: int):
+        return os.path.join(raw_dir, CHUNK_RECORD_DIR_NAME, str(index))
+
     def save_file_chunk(
         self,
         token: str,
         index: int,
-        data: IO,
+        data: bytes,
+        md5: str | None = None,
     ):
+        """Write the chunk (index start from 1) at its offset of the file
+
+        The chunks can be saved concurrently and in any order. All the chunks
+        but the last one have the same size, and the last one ends the file.
+
+        Args:
+            md5 (str | None, optional): MD5 of the chunk, checked before it is written. Defaults to None.
+        """
         token_meta = self.token_manager.decode_token(token)
         file_path = self.get_file_path_from_token_meta(token_meta)
         raw_dir = os.path.dirname(file_path)
-        self.get_chunk_meta(raw_dir)
-        chunk_path = os.path.join(raw_dir, str(index))
-        if os.path.exists(chunk_path):
+        chunk_meta = self.get_chunk_meta(raw_dir)
+        if index < 1 or index > chunk_meta.chunks:
+            raise InvalidateFileException(
+                f"Chunk index {index} out of range [1, {chunk_meta.chunks}]."
+            )
+        record_path = self.get_chunk_record_path(raw_dir, index)
+        if os.path.exists(record_path):
             return
-        create_file(chunk_path, data)
+        size = len(data)
+        if index == chunk_meta.chunks:
+            offset = chunk_meta.total_size - size
+        else:
+            offset = (index - 1) * size
+        if offset < 0 or offset + size > chunk_meta.total_size:
+            raise InvalidateFileException(
+                f"Chunk {index} ({size} bytes) exceed the file size ({chunk_meta.total_size} bytes)."
+            )
+        if not md5 is None and get_md5_from_bytes(data) != md5:
+            raise InvalidateFileException(f"Chunk {index} MD5 != {md5}.")
+        write_file_at(file_path, data, offset)
+        # the record is created after the data is written, it marks the chunk as saved
+        create_file(
+            record_path, orjson.dumps(ChunkRecord(offset=offset, size=size, md5=md5))
+        )
 
     def check_file_chunk(self, token: str, index: int):
-        file = self.get_file_from_token(token)
-        chunk_path = os.path.join(os.path.dirname(file.file_path), str(index))
-        return os.path.exists(chunk_path)
+        token_meta = self.token_manager.decode_token(token)
+        file_path = self.get_file_path_from_token_meta(token_meta)
+        return os.path.exists(
+            self.get_chunk_record_path(os.path.dirname(file_path), index)
+        )
 
     def assemble_file_chunks(self, token: str):
+        """Check the chunks cover the file and its MD5
+
+        The file is hashed once, the MD5 keys the caches of the file so the
+        one sent by the client is never trusted.
+        """
         token_meta = self.token_manager.decode_token(token)
         file_path = self.get_file_path_from_token_meta(token_meta)
-        chunk_meta = self.get_chunk_meta(os.path.dirname(file_path))
-        chunks = chunk_meta.chunks
         raw_dir = os.path.dirname(file_path)
-        chunk_paths: list[str] = []
-        with open(file_path, "wb") as target:
-            for i in range(1, chunks + 1):
-                chunk_path = os.path.join(raw_dir, str(i))
-                if not os.path.exists(chunk_path):
-                    raise ChunkNotFoundException(f"Chunk {i} of {token} not found.")
-                chunk_data = read_file(chunk_path, mode="rb")
-                target.write(chunk_data)
-                chunk_paths.append(chunk_path)
-        for p in chunk_paths:
-            os.remove(p)
+        chunk_meta = self.get_chunk_meta(raw_dir)
+        records: list[ChunkRecord] = []
+        for i in range(1, chunk_meta.chunks + 1):
+            record_path = self.get_chunk_record_path(raw_dir, i)
+            if not os.path.exists(record_path):
+                raise ChunkNotFoundException(f"Chunk {i} of {token} not found.")
+            records.append(ChunkRecord(**read_json_file(record_path)))
+        chunk_meta_path = os.path.join(raw_dir, CHUNK_META_FILE_NAME)
+
+        def reject(message: str):
+            os.remove(chunk_meta_path)
+            self.delete_file(token)
+            raise InvalidateFileException(message)
+
+        offset = 0
+        for record in records:
+            if record.offset != offset:
+                reject(f"Chunks of {token} overlap or leave a gap at {offset} bytes.")
+            offset += record.size
+        if offset != chunk_meta.total_size:
+            reject(
+                f"Chunks size ({offset}) != upload file size ({chunk_meta.total_size})."
+            )
         target_md5 = get_file_md5(file_path)
         if target_md5 != chunk_meta.md5:
-            self.delete_file(token)
-            raise InvalidateFileException(
+            reject(
                 f"Assembled file's MD5({target_md5}) != upload file MD5({chunk_meta.md5})."
             )
-        os.remove(os.path.join(os.path.dirname(file_path), CHUNK_META_FILE_NAME))
+        shutil.rmtree(os.path.join(raw_dir, CHUNK_RECORD_DIR_NAME))
+        os.remove(chunk_meta_path)
         file = self.get_file_from_token(token)
+        self.call_hooks(self.save_hooks, file)
         return file
 
     def save_file_meta(self, meta_path: str, file_meta: FileMeta):
@@ -299,6 +412,7 @@ class FileManager:
 
     def delete_file(self, token: str):
         file = self.get_file_from_token(token)
+        self.call_hooks(self.delete_hooks, file)
         shutil.rmtree(os.path.dirname(file.dir_path))
 
     def get_user_dir(
@@ -350,14 +464,17 @@ class FileManager:
     def get_user_manager(
         self, user: User, user_limit: int = None, size_limit: int = None
     ):
-        """Get user file manager"""
-        return UserFileManager(
+        """Get user file manager, sharing the hooks"""
+        manager = UserFileManager(
             self.root,
             self.token_manager,
             user,
             user_limit or self.user_limit,
             size_limit or self.size_limit,
         )
+        manager.save_hooks = self.save_hooks
+        manager.delete_hooks = self.delete_hooks
+        return manager
 
 
 class UserFileManager(FileManager):
@@ -380,7 +497,7 @@ class UserFileManager(FileManager):
             user.tenant_key, user.base_id, user.user_id, created_time, uuid, filename
         )
 
-    def save_file(self, filename: str, data: IO):
+    def save_file(self, filename: str, data: bytes | IO[bytes]):
         user = self.user
         return super().save_file(
             user.tenant_key, user.base_id, user.user_id, filename, data
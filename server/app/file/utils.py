@@ -1,15 +1,18 @@
 import os
+import uuid
 import hashlib
 import httpx
 import re
 from typing import IO
 import orjson
+from .constants import COPY_CHUNK_SIZE
 from .exceptions import (
     CreateDirException,
     CreateFileException,
     CaculateMD5Exception,
     InValidUrlException,
     GetFileFromUrlException,
+    InvalidateFileException,
 )
 
 
@@ -38,6 +41,117 @@ def create_file(
         raise CreateFileException(f"Create file {filename} error: {e}")
 
 
+def replace_file(filename: str, data: bytes):
+    """Create file by renaming a temporary file to it, so the readers never see a partial file
+
+    Args:
+        filename (str): file path
+        data (bytes): file data
+    """
+    tmp_path = f"{filename}.{uuid.uuid4().hex}.tmp"
+    try:
+        create_file(tmp_path, data, "wb")
+        os.replace(tmp_path, filename)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def create_file_from_stream(
+    filename: str,
+    data: IO[bytes],
+    size_limit: int | None = None,
+    chunk_size: int = COPY_CHUNK_SIZE,
+):
+    """Create file from the stream in chunks, the MD5 and the size are computed in the same pass
+
+    Args:
+        filename (str): file path
+        data (IO[bytes]): binary stream, read from its current position
+        size_limit (int | None, optional): max bytes of the file, the partial file is removed if exceeded. Defaults to None.
+        chunk_size (int, optional): bytes read at a time. Defaults to COPY_CHUNK_SIZE.
+
+    Returns:
+        (str, int): MD5 and size
+    """
+    dirname = os.path.dirname(filename)
+    if not os.path.exists(dirname):
+        try:
+            os.makedirs(dirname, exist_ok=True)
+        except Exception as e:
+            raise CreateDirException(f"Create {dirname} error: {e}")
+    h = hashlib.md5()
+    size = 0
+    try:
+        with open(filename, "wb") as f:
+            while chunk := data.read(chunk_size):
+                size += len(chunk)
+                if size_limit and size > size_limit:
+                    raise InvalidateFileException(
+                        f"Exceed file size limit ({size_limit / (1024 * 1024)} MB). "
+                    )
+                h.update(chunk)
+                f.write(chunk)
+    except InvalidateFileException:
+        os.remove(filename)
+        raise
+    except Exception as e:
+        raise CreateFileException(f"Create file {filename} error: {e}")
+    return h.hexdigest(), size
+
+
+def preallocate_file(filename: str, size: int):
+    """Create the file of `size` bytes, the blocks are allocated if the system supports it
+
+    Args:
+        filename (str): file path
+        size (int): file size
+    """
+    try:
+        with open(filename, "wb") as f:
+            if size <= 0:
+                return
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except (AttributeError, OSError):
+                # not supported by the system or the file system, the file is sparse
+                f.truncate(size)
+    except Exception as e:
+        raise CreateFileException(f"Create file {filename} error: {e}")
+
+
+def write_file_at(filename: str, data: bytes, offset: int):
+    """Write the data at the offset of the existing file, the other bytes are kept
+
+    The positional writes of the different ranges can run concurrently.
+
+    Args:
+        filename (str): file path
+        data (bytes): data
+        offset (int): byte offset
+    """
+    try:
+        if not hasattr(os, "pwrite"):
+            with open(filename, "rb+") as f:
+                f.seek(offset)
+                f.write(data)
+            return
+        fd = os.open(filename, os.O_WRONLY)
+        try:
+            view = memoryview(data)
+            while view:
+                n = os.pwrite(fd, view, offset)
+                view = view[n:]
+                offset += n
+        finally:
+            os.close(fd)
+    except Exception as e:
+        raise CreateFileException(f"Write file {filename} error: {e}")
+
+
 async def async_create_file(
     filename: str, data: IO, mode: str = "wb+", encoding: str | None = None
 ):
@@ -1,18 +1,18 @@
 from __future__ import annotations
-from typing import Literal, Optional
+from typing import Any, Literal, Optional
 from pydantic import BaseModel, Field
 
 
 class DataRangeModel(BaseModel):
     """Data range"""
 
-    min_row: int = Field(default=1, description="Min row", gt=1)
+    min_row: int = Field(default=1, description="Min row", ge=1)
     """Min row"""
-    max_row: Optional[int] = Field(default=None, description="Max row", gt=1)
+    max_row: Optional[int] = Field(default=None, description="Max row", ge=1)
     """Max row"""
-    min_col: int = Field(default=1, description="Min column", gt=1)
+    min_col: int = Field(default=1, description="Min column", ge=1)
     """Min column"""
-    max_col: Optional[int] = Field(default=None, description="Max column", gt=1)
+    max_col: Optional[int] = Field(default=None, description="Max column", ge=1)
     """Max column"""
 
 
@@ -21,8 +21,19 @@ class DataSourceModel[T](BaseModel):
     source_type: Literal["file", "network"]
 
 
-class CSVParserConfigModel(BaseModel):
-    """CSV data parser config model."""
+class RowFilterModel(BaseModel):
+    """Row filter on the raw values of a column."""
+
+    field: str = Field(description="Field name in the header")
+    op: Literal["eq", "in", "range", "not_empty"] = Field(description="Operator")
+    value: Optional[Any] = Field(default=None, description="Value of `eq`")
+    values: Optional[list[Any]] = Field(default=None, description="Values of `in`")
+    min: Optional[Any] = Field(default=None, description="Inclusive min of `range`")
+    max: Optional[Any] = Field(default=None, description="Inclusive max of `range`")
+
+
+class ParserConfigModel(BaseModel):
+    """Basic data parser config model."""
 
     data_range: Optional[str | DataRangeModel] = Field(
         default=None,
@@ -38,6 +49,25 @@ class CSVParserConfigModel(BaseModel):
         default=1,
         description="Header row index, start from 1\n\nDefault: 1",
     )
+    filters: Optional[list[RowFilterModel]] = Field(
+        default=None,
+        description="Row filters on the raw cell values, only the rows matching all of them are parsed",
+        examples=[[{"field": "status", "op": "eq", "value": "done"}]],
+    )
+
+
+class CSVParserConfigModel(ParserConfigModel):
+    """CSV data parser config model."""
+
+    engine: Optional[Literal["python", "pandas"]] = Field(
+        default=None,
+        description="CSV reader engine, `pandas` reads the file in chunks with the C parser of pandas\n\nDefault: python",
+    )
+    workers: Optional[int] = Field(
+        default=None,
+        description="Number of processes parsing the byte ranges of the file in parallel, only for the `python` engine\n\nDefault: 1",
+        ge=1,
+    )
 
 
 class CSVDataSourceModel(DataSourceModel[Literal[".csv"]]):
@@ -50,7 +80,7 @@ class CSVDataSourceModel(DataSourceModel[Literal[".csv"]]):
     )
 
 
-class XLSParserConfigModel(CSVParserConfigModel):
+class XLSParserConfigModel(ParserConfigModel):
     """XLS data parser config."""
 
     sheet_name: Optional[str] = Field(
@@ -85,6 +115,57 @@ class XLSXDataSourceModel(DataSourceModel[Literal[".xlsx", ".xlsm", ".xltx", ".x
     source_type: Literal["file"] = Field(default="file", description="Data source type")
 
 
+class ArrowParserConfigModel(BaseModel):
+    """Parquet and Arrow IPC data parser config model."""
+
+    filters: Optional[list[RowFilterModel]] = Field(
+        default=None,
+        description="Row filters on the raw cell values, only the rows matching all of them are parsed",
+        examples=[[{"field": "status", "op": "eq", "value": "done"}]],
+    )
+
+
+class ParquetDataSourceModel(DataSourceModel[Literal[".parquet"]]):
+    """Parquet data source model."""
+
+    token: str = Field(description="File token for the Parquet file")
+    source_type: Literal["file"] = Field(default="file", description="Data source type")
+
+
+class ArrowDataSourceModel(DataSourceModel[Literal[".arrow", ".feather"]]):
+    """Arrow IPC data source model."""
+
+    token: str = Field(description="File token for the Arrow IPC or Feather file")
+    source_type: Literal["file"] = Field(default="file", description="Data source type")
+
+
+class NDJSONParserConfigModel(BaseModel):
+    """NDJSON data parser config model."""
+
+    flatten_depth: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Depth of the nested objects flattened into the header columns, 0 keeps the top-level keys only. If None, all the nested objects are flattened",
+    )
+    separator: Optional[str] = Field(
+        default=".",
+        min_length=1,
+        description="Separator joining the keys of the flattened nested objects",
+    )
+    filters: Optional[list[RowFilterModel]] = Field(
+        default=None,
+        description="Row filters on the raw cell values, only the rows matching all of them are parsed",
+        examples=[[{"field": "status", "op": "eq", "value": "done"}]],
+    )
+
+
+class NDJSONDataSourceModel(DataSourceModel[Literal[".jsonl", ".ndjson"]]):
+    """NDJSON data source model."""
+
+    token: str = Field(description="File token for the NDJSON file")
+    source_type: Literal["file"] = Field(default="file", description="Data source type")
+
+
 class PaginationConfigModel[C: dict](BaseModel):
     """Pagination config model."""
 
@@ -111,6 +192,15 @@ class DataPreviewRequestBodyModel[C: dict, D: DataSourceModel](BaseModel):
     data_source: D
 
 
+class DataMetadataRequestBodyModel[D: DataSourceModel](BaseModel):
+    data_source: D
+
+
+class DataProfileRequestBodyModel[C: dict, D: DataSourceModel](BaseModel):
+    config: Optional[C] = Field(default=None, description="Config")
+    data_source: D
+
+
 class DataMetaModel[E: dict](BaseModel):
     fields: list[str] = Field(description="Fields")
     total: int = Field(description="Total count")
@@ -191,3 +281,87 @@ class CSVDataPreviewResponseDataModel(
     """CSV data preview request body model."""
 
     pass
+
+
+class ArrowDataPreviewExtraModel(BaseModel):
+    """Parquet and Arrow IPC data preview extra model."""
+
+    data_range: DataRangeModel
+    header_index: int = Field(description="Header row index, start from 0")
+
+
+class ArrowDataPreviewResponseDataModel(
+    DataPreviewResponseDataModel[ArrowDataPreviewExtraModel]
+):
+    """Parquet and Arrow IPC data preview response model."""
+
+    pass
+
+
+class NDJSONDataPreviewResponseDataModel(
+    DataPreviewResponseDataModel[ArrowDataPreviewExtraModel]
+):
+    """NDJSON data preview response model."""
+
+    pass
+
+
+class SheetMetaModel(BaseModel):
+    """Sheet metadata model."""
+
+    name: str = Field(description="Sheet name")
+    """Sheet name"""
+    data_range: DataRangeModel
+    rows: int = Field(description="Row count")
+    """Row count"""
+    cols: int = Field(description="Column count")
+    """Column count"""
+    head: list[list[str | int | float | UrlValue | list[FileValue] | None | bool]] = (
+        Field(description="The first rows")
+    )
+    """The first rows"""
+    header_candidates: list[int] = Field(
+        description="Rows in the data range which can be used as header, start from 1"
+    )
+    """Rows in the data range which can be used as header, start from 1"""
+
+
+class DataSourceMetaModel(BaseModel):
+    """Data source metadata model."""
+
+    sheets: list[SheetMetaModel] = Field(description="Sheets")
+    """Sheets"""
+
+
+class ColumnProfileModel(BaseModel):
+    """Column statistics model."""
+
+    name: str = Field(description="Field name")
+    """Field name"""
+    type: str = Field(description="Most common type of the non-empty values")
+    """Most common type of the non-empty values"""
+    types: dict[str, int] = Field(description="Count of the values of each type")
+    """Count of the values of each type"""
+    count: int = Field(description="Value count")
+    """Value count"""
+    nulls: int = Field(description="Count of the empty values")
+    """Count of the empty values"""
+    null_ratio: float = Field(description="Ratio of the empty values")
+    """Ratio of the empty values"""
+    distinct: int = Field(description="Approximate count of the distinct values")
+    """Approximate count of the distinct values"""
+    samples: list[str | int | float | UrlValue | list[FileValue] | None | bool] = Field(
+        description="Sample values"
+    )
+    """Sample values"""
+
+
+class DataProfileModel(BaseModel):
+    """Data statistics model."""
+
+    fields: list[str] = Field(description="Fields")
+    """Fields"""
+    total: int = Field(description="Row count")
+    """Row count"""
+    columns: list[ColumnProfileModel] = Field(description="Column statistics")
+    """Column statistics"""
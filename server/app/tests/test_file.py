@@ -3,10 +3,13 @@
 import os
 import math
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+import pytest
 from app.token import TokenManager
 from app.file.core import FileManager, FileTokenMeta
 from app.file.constants import FILE_CACHE_DIR, USER_LIMIT, SIZE_LIMIT
-from app.file.utils import get_file_md5
+from app.file.exceptions import InvalidateFileException
+from app.file.utils import get_file_md5, get_md5_from_bytes
 from app.tests.utils import DEFAULT_SECURITY_KEY
 
 fileTokenManager = TokenManager(FileTokenMeta, DEFAULT_SECURITY_KEY)
@@ -39,25 +42,87 @@ def test_file():
         file = fileManager.get_file_from_token(file_token)
         assert os.path.exists(file.file_path)
         fileManager.delete_file(file_token)
-    chunk_size = 1 * 1024 * 1024
+    with open(TEST_FILE_PATH, "rb") as f:
+        file_token = fileManager.save_file(
+            test_user["tenant_key"],
+            test_user["base_id"],
+            test_user["user_id"],
+            test_user["filename"],
+            f,
+        )
+        file = fileManager.get_file_from_token(file_token)
+        assert file.md5 == get_file_md5(TEST_FILE_PATH)
+        assert file.size == os.path.getsize(TEST_FILE_PATH)
+        fileManager.delete_file(file_token)
+    limited_manager = FileManager(
+        FILE_CACHE_DIR, fileTokenManager, USER_LIMIT, size_limit=1024
+    )
+    with open(TEST_FILE_PATH, "rb") as f, pytest.raises(InvalidateFileException):
+        limited_manager.save_file(
+            test_user["tenant_key"],
+            test_user["base_id"],
+            test_user["user_id"],
+            test_user["filename"],
+            f,
+        )
+    assert not limited_manager.get_user_file_list(
+        test_user["tenant_key"], test_user["user_id"], test_user["base_id"]
+    )
+    chunk_size = 64 * 1024
     total_size = os.path.getsize(TEST_FILE_PATH)
     chunks = math.ceil(total_size / chunk_size)
+    md5 = get_file_md5(TEST_FILE_PATH)
+    for check_chunk_md5 in [False, True]:
+        token = fileManager.start_chunk(
+            tenant_key="tenant_key",
+            base_id="base_id",
+            user_id="user_id",
+            filename="data.xlsx",
+            md5=md5,
+            size=total_size,
+            chunks=chunks,
+        )
+        with open(TEST_FILE_PATH, "rb") as f:
+            data = f.read()
+        chunk_data = [
+            data[(i - 1) * chunk_size : i * chunk_size] for i in range(1, chunks + 1)
+        ]
+        # the chunks arrive concurrently and in any order
+        with ThreadPoolExecutor(4) as executor:
+            list(
+                executor.map(
+                    lambda i: fileManager.save_file_chunk(
+                        token,
+                        i,
+                        chunk_data[i - 1],
+                        (
+                            get_md5_from_bytes(chunk_data[i - 1])
+                            if check_chunk_md5
+                            else None
+                        ),
+                    ),
+                    reversed(range(1, chunks + 1)),
+                )
+            )
+        assert fileManager.check_file_chunk(token, chunks)
+        file = fileManager.assemble_file_chunks(token)
+        assert file.md5 == md5
+        assert file.read(mode="rb") == data
+        fileManager.delete_file(token)
+    # the file MD5 sent by the client is checked even if the chunk MD5s are
     token = fileManager.start_chunk(
         tenant_key="tenant_key",
         base_id="base_id",
         user_id="user_id",
         filename="data.xlsx",
-        md5=get_file_md5(TEST_FILE_PATH),
-        size=os.path.getsize(TEST_FILE_PATH),
+        md5=get_md5_from_bytes(b"another file"),
+        size=total_size,
         chunks=chunks,
     )
     for i in range(1, chunks + 1):
-        start = (i - 1) * chunk_size
-        end = min(total_size, start + chunk_size)
-        with open(TEST_FILE_PATH, "rb") as f:
-            f.seek(start)
-            chunk_data = f.read(end - start)
-            fileManager.save_file_chunk(token, i, chunk_data)
-    file = fileManager.assemble_file_chunks(token)
-    fileManager.delete_file(token)
+        fileManager.save_file_chunk(
+            token, i, chunk_data[i - 1], get_md5_from_bytes(chunk_data[i - 1])
+        )
+    with pytest.raises(InvalidateFileException):
+        fileManager.assemble_file_chunks(token)
     shutil.rmtree(FILE_CACHE_DIR)